@@ -6,10 +6,28 @@ import os
 
 dirs_to_clean = ['./data', './wal']
 
+
+def remove_dir(dir_path):
+    """Remove a directory, unlinking its files in a single scandir pass."""
+    # Move the directory aside first so the path can be recreated straight away
+    stage = dir_path + '.deleting'
+    if os.path.exists(stage):
+        shutil.rmtree(stage)
+    os.rename(dir_path, stage)
+
+    with os.scandir(stage) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(stage)
+
+
 for dir_path in dirs_to_clean:
     if os.path.exists(dir_path):
         print(f"Removing {dir_path}...")
-        shutil.rmtree(dir_path)
+        remove_dir(dir_path)
         print(f"  ✓ Cleaned {dir_path}")
     else:
         print(f"  - {dir_path} doesn't exist, skipping")
@@ -0,0 +1,209 @@
+"""Generated predicate kernels for table scans."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .storage_engine import MISSING, Table
+
+Kernel = Callable[[Table, Optional[Iterable[int]], Sequence[Any]], List[Tuple[Any, Dict[str, Any]]]]
+
+KeyKernel = Callable[[Table, Optional[Iterable[int]], Sequence[Any]], List[Any]]
+
+SlotKernel = Callable[[Table, Optional[Iterable[int]], Sequence[Any]], List[int]]
+
+SelectKernel = Callable[[Table, Optional[Iterable[int]], Sequence[Any], Optional[int]], List[Dict[str, Any]]]
+
+# Compiled kernels (LRU) keyed by the tuple of condition columns, plus
+# what a match returns, or for SELECT the projected columns and the
+# table's column layout; both guarded by one lock
+_eq_kernels: 'OrderedDict[Tuple[Tuple[str, ...], str], Callable]' = OrderedDict()
+_select_kernels: 'OrderedDict[Tuple[Tuple[str, ...], Optional[Tuple[str, ...]], Tuple[str, ...]], SelectKernel]' = OrderedDict()
+_kernel_cache_size = 256
+_lock = threading.Lock()
+
+
+def _eq_tests(columns: Tuple[str, ...]) -> Tuple[str, str]:
+    """Source for binding the compared columns and values, and testing a slot against them."""
+    names = [f"v{i}" for i in range(len(columns))]
+    setup = f"    {', '.join(names)}, = values\n" if names else ""
+    for i, col in enumerate(columns):
+        # A column no row has ever had is missing everywhere
+        setup += (
+            f"    c{i} = table.columns.get({col!r})\n"
+            f"    if c{i} is None:\n"
+            f"        c{i} = [MISSING] * len(keys)\n"
+        )
+    tests = " and ".join(f"c{i}[slot] == {name}" for i, name in enumerate(names))
+    return setup, tests or "True"
+
+
+def positions(values: List[Any], value: Any) -> Iterator[int]:
+    """
+    Yield the positions in values of items equal to value.
+    
+    Each step is a list.index() call, so the comparisons between matches
+    run in C rather than once per item in the interpreter. Like list.index
+    it also yields items that are value itself; kernels recheck ==.
+    """
+    index = values.index
+    i = -1
+    try:
+        while True:
+            i = index(value, i + 1)
+            yield i
+    except ValueError:
+        return
+
+
+def _cached(cache: 'OrderedDict[Any, Callable]', cache_key: Any, build: Callable[[], Callable]) -> Callable:
+    """Get a kernel from an LRU cache, compiling it with build on a miss."""
+    with _lock:
+        kernel = cache.get(cache_key)
+        if kernel is not None:
+            cache.move_to_end(cache_key)
+            return kernel
+    
+    kernel = build()
+    with _lock:
+        kernel = cache.setdefault(cache_key, kernel)
+        if len(cache) > _kernel_cache_size:
+            cache.popitem(last=False)
+    return kernel
+
+
+def _compile(source: str, name: str, filename: str) -> Callable:
+    """Compile generated source and return the function it defines."""
+    namespace: Dict[str, Any] = {'MISSING': MISSING, 'positions': positions}
+    exec(compile(source, filename, "exec"), namespace)
+    return namespace[name]
+
+
+# What an equality kernel returns for each match
+_MATCH_ITEMS = {
+    'pairs': "(keys[slot], row(slot))",
+    'keys': "keys[slot]",
+    'slots': "slot",
+}
+
+
+def _compile_eq_kernel(columns: Tuple[str, ...], item: str) -> Callable:
+    """Generate a fused equality filter for a fixed tuple of columns."""
+    setup, tests = _eq_tests(columns)
+    # Without index candidates, scan the first compared column in C, or
+    # take every slot when there is nothing to compare
+    scan = "positions(c0, v0)" if columns else "range(len(keys))"
+    source = (
+        "def match_eq(table, slots, values):\n"
+        "    keys = table.keys\n"
+        f"{setup}"
+        "    row = table.row\n"
+        "    if slots is None:\n"
+        f"        slots = {scan}\n"
+        f"    return [{_MATCH_ITEMS[item]} for slot in slots\n"
+        f"            if {tests}]\n"
+    )
+    return _compile(source, 'match_eq', f"<match_eq {columns} {item}>")
+
+
+def _compile_select_kernel(columns: Tuple[str, ...], projection: Optional[Tuple[str, ...]],
+                           layout: Tuple[str, ...]) -> SelectKernel:
+    """Generate a SELECT loop filtering on columns and assembling result rows."""
+    setup, tests = _eq_tests(columns)
+    if projection is None:
+        out = layout
+        tag = True
+    else:
+        out = tuple(col for col in projection if col in layout)
+        tag = '_key' in projection
+    
+    # Read each output column into a local and build the row as a dict
+    # display, unless one of them is missing from this row
+    names = [f"x{i}" for i in range(len(out))]
+    setup += "".join(f"    o{i} = table.columns[{col!r}]\n" for i, col in enumerate(out))
+    reads = "; ".join(f"{name} = o{i}[slot]" for i, name in enumerate(names))
+    display = ", ".join(f"{col!r}: {name}" for col, name in zip(out, names))
+    pairs = ", ".join(f"({col!r}, {name})" for col, name in zip(out, names))
+    missing = " or ".join(f"{name} is MISSING" for name in names) or "False"
+    build = (
+        f"{reads}\n"
+        f"row = {{{display}}}\n"
+        f"if {missing}:\n"
+        f"    row = {{col: value for col, value in ({pairs},) if value is not MISSING}}\n"
+    ) if names else "row = {}\n"
+    if tag:
+        # Keys generated by the executor are bytes; results expose them as hex
+        build += "row['_key'] = key.hex() if type(key) is bytes else key\n"
+    build += "append(row)\nif len(rows) == limit:\n    break\n"
+    body = "".join(f"            {line}\n" for line in build.splitlines())
+    
+    if columns:
+        # Without index candidates, scan the first compared column in C
+        loop = (
+            "    if slots is None:\n"
+            "        slots = positions(c0, v0)\n"
+            "    for slot in slots:\n"
+            f"        if {tests}:\n"
+            "            key = keys[slot]\n"
+        )
+    else:
+        loop = (
+            "    pairs = enumerate(keys) if slots is None else [(slot, keys[slot]) for slot in slots]\n"
+            "    for slot, key in pairs:\n"
+            "        if True:\n"
+        )
+    source = (
+        "def select_rows(table, slots, values, limit):\n"
+        "    keys = table.keys\n"
+        f"{setup}"
+        "    rows = []\n"
+        "    append = rows.append\n"
+        f"{loop}"
+        f"{body}"
+        "    return rows\n"
+    )
+    return _compile(source, 'select_rows', f"<select_rows {columns} {projection}>")
+
+
+def match_eq(columns: Tuple[str, ...]) -> Kernel:
+    """
+    Get the kernel finding the rows of a table equal on columns.
+    
+    The kernel takes the Table, the candidate slots (None to scan them
+    all) and the values to compare against, in the order of columns, and
+    returns the matching (key, row) pairs. The predicates are unrolled over
+    the column lists, so only matching rows are ever assembled into dicts.
+    """
+    return _eq_kernel(columns, 'pairs')
+
+
+def match_keys(columns: Tuple[str, ...]) -> KeyKernel:
+    """Get the kernel like match_eq's that returns only the matching keys."""
+    return _eq_kernel(columns, 'keys')
+
+
+def match_slots(columns: Tuple[str, ...]) -> SlotKernel:
+    """Get the kernel like match_eq's that returns only the matching slots."""
+    return _eq_kernel(columns, 'slots')
+
+
+def _eq_kernel(columns: Tuple[str, ...], item: str) -> Callable:
+    """Get the cached equality kernel for columns returning item per match."""
+    return _cached(_eq_kernels, (columns, item), lambda: _compile_eq_kernel(columns, item))
+
+
+def select_rows(columns: Tuple[str, ...], projection: Optional[Tuple[str, ...]],
+                layout: Tuple[str, ...]) -> SelectKernel:
+    """
+    Get the kernel producing SELECT result rows from a Table.
+    
+    The kernel takes the Table, the candidate slots (None to scan them
+    all), the values to compare columns against and an optional limit, at
+    which it stops scanning. Matching rows come back tagged with their
+    '_key' (hex for bytes keys), or reduced to the projected columns
+    present in the row when projection is given, in a single pass. Rows are
+    assembled for the table's column layout, the names of its columns in
+    order, so a kernel only fits tables with that layout.
+    """
+    return _cached(_select_kernels, (columns, projection, layout),
+                   lambda: _compile_select_kernel(columns, projection, layout))
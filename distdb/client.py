@@ -1,34 +1,56 @@
 """Client library for connecting to DistDB."""
 
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from itertools import groupby
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
 
 from .config import Config
 from .node import Node
+from .sql_parser import ParsedQuery
 
 
 logger = logging.getLogger(__name__)
 
 
+def _where_clause(where: Dict[str, Any]) -> str:
+    """Build a WHERE clause with a placeholder per condition column."""
+    return "WHERE " + " AND ".join(f"{col} = ?" for col in where)
+
+
 class Client:
     """Client for interacting with DistDB."""
     
-    def __init__(self, node_address: Optional[str] = None):
+    def __init__(self, node_address: Optional[str] = None, stmt_cache_size: int = 256):
         """
         Initialize client.
         
         Args:
             node_address: Address of node to connect to (node_id@host:port)
                          If None, starts a local node.
+            stmt_cache_size: Number of prepared statements to keep
         """
         self.node_address = node_address
         self.local_node: Optional[Node] = None
         
+        # Prepared statements (LRU): (operation, table, statement shape) -> parsed template
+        self._stmt_cache: 'OrderedDict[Tuple, ParsedQuery]' = OrderedDict()
+        self._stmt_cache_size = stmt_cache_size
+        self._stmt_cache_lock = threading.Lock()
+        
+        # Writes queued between begin() and commit()
+        self._batch: Optional['Pipeline'] = None
+        
         if node_address is None:
             # Start a local node
             config = Config()
             self.local_node = Node(config)
             self.local_node.start()
+            # A node alone in its cluster elects itself straight away; wait
+            # for that so the first write is not turned away
+            if len(self.local_node.cluster_manager.get_all_nodes()) == 1:
+                self.local_node.replication_manager.wait_for_leader(config.election_timeout_max)
         else:
             # TODO: In a full implementation, would connect via gRPC
             # For now, only support local node
@@ -38,12 +60,17 @@ class Client:
         """
         Execute a SQL query.
         
+        Only SELECTs may run while a batch is open: any other statement
+        would apply ahead of the writes queued before it.
+        
         Args:
             sql: SQL query string
             
         Returns:
             Query result dictionary
         """
+        if self._batch is not None and sql.lstrip()[:6].upper() != 'SELECT':
+            raise ValueError("Only SELECT can be executed while a batch is open; commit() first")
         if self.local_node:
             return self.local_node.execute_query(sql)
         else:
@@ -60,12 +87,72 @@ class Client:
         Returns:
             List of result rows
         """
-        result = self.execute(sql)
+        return self._rows(self.execute(sql))
+    
+    def _rows(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Extract rows from a SELECT result, raising on failure."""
         if result.get('status') == 'success' and 'rows' in result:
             return result['rows']
         else:
             raise Exception(result.get('message', 'Query failed'))
     
+    def prepare(self, sql: str) -> 'PreparedStatement':
+        """
+        Prepare a statement with ``?`` placeholders for repeated execution.
+        
+        The SQL is parsed once; calling the returned statement with a value
+        per placeholder executes it. Writes are queued while a batch is open.
+        
+        Args:
+            sql: SQL statement with ? placeholders
+            
+        Returns:
+            Callable prepared statement
+        """
+        key = ('sql', sql)
+        parsed = self._cached_statement(key)
+        if parsed is None:
+            parsed = self._prepare(key, sql)
+        return PreparedStatement(self, parsed)
+    
+    def _prepare(self, key: Tuple, sql: str) -> ParsedQuery:
+        """
+        Prepare a parameterized statement and cache it under its shape key.
+        
+        Args:
+            key: Cache key identifying the statement shape
+            sql: SQL template with ? placeholders
+            
+        Returns:
+            Parsed statement template
+        """
+        if not self.local_node:
+            # TODO: Prepare statements via gRPC
+            raise NotImplementedError("Remote queries not yet implemented")
+        
+        parsed = self.local_node.prepare(sql)
+        with self._stmt_cache_lock:
+            self._stmt_cache[key] = parsed
+            if len(self._stmt_cache) > self._stmt_cache_size:
+                self._stmt_cache.popitem(last=False)
+        return parsed
+    
+    def _cached_statement(self, key: Tuple) -> Optional[ParsedQuery]:
+        """Get the prepared statement cached under key, marking it recently used."""
+        with self._stmt_cache_lock:
+            parsed = self._stmt_cache.get(key)
+            if parsed is not None:
+                self._stmt_cache.move_to_end(key)
+            return parsed
+    
+    def _execute_prepared(self, parsed: ParsedQuery, params: Sequence[Any]) -> Dict[str, Any]:
+        """Execute a prepared statement with parameters bound in order."""
+        if self.local_node:
+            return self.local_node.execute_prepared(parsed, params)
+        else:
+            # TODO: Send prepared statements via gRPC
+            raise NotImplementedError("Remote queries not yet implemented")
+    
     def execute_many(self, sql_statements: List[str]) -> List[Dict[str, Any]]:
         """
         Execute multiple SQL statements.
@@ -109,17 +196,86 @@ class Client:
         Returns:
             Result dictionary
         """
-        columns = ', '.join(values.keys())
-        value_strs = []
-        for v in values.values():
-            if isinstance(v, str):
-                value_strs.append(f"'{v}'")
-            else:
-                value_strs.append(str(v))
-        values_str = ', '.join(value_strs)
+        return self._write(self._insert_statement(table_name, values), list(values.values()))
+    
+    def _insert_statement(self, table_name: str, values: Dict[str, Any]) -> ParsedQuery:
+        """Get the prepared INSERT for a table and set of columns."""
+        key = ('insert', table_name, tuple(values))
+        parsed = self._cached_statement(key)
+        if parsed is None:
+            columns = ', '.join(values.keys())
+            placeholders = ', '.join('?' * len(values))
+            
+            sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+            parsed = self._prepare(key, sql)
+        return parsed
+    
+    def insert_many(self, table_name: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Insert multiple rows using multi-row INSERT statements.
         
-        sql = f"INSERT INTO {table_name} ({columns}) VALUES ({values_str})"
-        return self.execute(sql)
+        Consecutive rows with the same columns are sent together as one
+        prepared INSERT ... VALUES (?, ...), (?, ...) statement of up to
+        max_batch_size rows, with the values bound as parameters just as
+        insert() binds them. Rows are inserted in the order given.
+        
+        The statements are not one transaction: should one fail, the rows
+        of the statements before it stay inserted, and the error result
+        lists their keys. While a batch is open the statements are queued.
+        
+        Args:
+            table_name: Name of the table
+            rows: List of dictionaries of column values
+            
+        Returns:
+            Result dictionary; on error the failing statement's result, with
+            rows_affected and inserted_keys covering the rows inserted before it
+        """
+        statements = self._insert_many_statements(table_name, rows)
+        if self._batch is not None:
+            for parsed, params in statements:
+                self._batch.queue(parsed, params)
+            return {
+                'status': 'queued',
+                'message': f'{len(rows)} rows queued',
+                'rows_affected': 0
+            }
+        
+        inserted_keys = []
+        for parsed, params in statements:
+            result = self._execute_prepared(parsed, params)
+            if result.get('status') != 'success':
+                return {**result, 'rows_affected': len(inserted_keys), 'inserted_keys': inserted_keys}
+            inserted_keys.extend(result.get('inserted_keys') or [result.get('inserted_key')])
+        
+        return {
+            'status': 'success',
+            'message': f'{len(inserted_keys)} rows inserted',
+            'rows_affected': len(inserted_keys),
+            'inserted_keys': inserted_keys
+        }
+    
+    def _insert_many_statements(self, table_name: str,
+                                rows: List[Dict[str, Any]]) -> Iterator[Tuple[ParsedQuery, List[Any]]]:
+        """Yield the prepared INSERT and its parameters for each chunk of rows, in order."""
+        batch_size = self.local_node.config.max_batch_size if self.local_node else len(rows)
+        # Split into runs of rows with the same columns, keeping their order
+        for columns, run in groupby(rows, key=tuple):
+            run = list(run)
+            for start in range(0, len(run), batch_size):
+                chunk = run[start:start + batch_size]
+                parsed = self._insert_many_statement(table_name, columns, len(chunk))
+                yield parsed, [v for row in chunk for v in row.values()]
+    
+    def _insert_many_statement(self, table_name: str, columns: Tuple[str, ...], count: int) -> ParsedQuery:
+        """Get the prepared multi-row INSERT for a table, set of columns and number of rows."""
+        key = ('insert_many', table_name, columns, count)
+        parsed = self._cached_statement(key)
+        if parsed is None:
+            row = '(' + ', '.join('?' * len(columns)) + ')'
+            sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES {', '.join([row] * count)}"
+            parsed = self._prepare(key, sql)
+        return parsed
     
     def select(self, table_name: str, where: Optional[Dict[str, Any]] = None,
               order_by: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -135,24 +291,62 @@ class Client:
         Returns:
             List of result rows
         """
-        sql = f"SELECT * FROM {table_name}"
-        
-        if where:
-            conditions = []
-            for col, val in where.items():
-                if isinstance(val, str):
-                    conditions.append(f"{col} = '{val}'")
-                else:
-                    conditions.append(f"{col} = {val}")
-            sql += " WHERE " + " AND ".join(conditions)
+        where = where or {}
+        parsed = self._select_statement(table_name, None, where, order_by, limit)
+        return self._rows(self._execute_prepared(parsed, list(where.values())))
+    
+    def select_columnar(self, table_name: str, columns: Optional[List[str]] = None,
+                        where: Optional[Dict[str, Any]] = None, order_by: Optional[str] = None,
+                        limit: Optional[int] = None) -> Dict[str, List[Any]]:
+        """
+        Select rows from a table as a list of values per column.
         
-        if order_by:
-            sql += f" ORDER BY {order_by}"
+        No dict is built per row: each column's values are gathered
+        straight from storage, aligned by position. Rows lacking a column
+        hold None.
         
-        if limit:
-            sql += f" LIMIT {limit}"
+        Args:
+            table_name: Name of the table
+            columns: Columns to return (all columns and '_key' if None)
+            where: WHERE conditions (column: value)
+            order_by: ORDER BY column
+            limit: LIMIT number
+            
+        Returns:
+            Dictionary of column name to list of values
+        """
+        where = where or {}
+        parsed = self._select_statement(table_name, columns, where, order_by, limit)
+        if not self.local_node:
+            # TODO: Send columnar queries via gRPC
+            raise NotImplementedError("Remote queries not yet implemented")
         
-        return self.query(sql)
+        result = self.local_node.execute_columnar(parsed, list(where.values()))
+        if result.get('status') == 'success':
+            return result['columns']
+        else:
+            raise Exception(result.get('message', 'Query failed'))
+    
+    def _select_statement(self, table_name: str, columns: Optional[List[str]], where: Dict[str, Any],
+                          order_by: Optional[str], limit: Optional[int]) -> ParsedQuery:
+        """Get the prepared SELECT for a table, projection, WHERE columns, order and limit."""
+        projection = tuple(columns) if columns else None
+        key = ('select', table_name, projection, tuple(where), order_by, limit)
+        parsed = self._cached_statement(key)
+        if parsed is None:
+            parts = [f"SELECT {', '.join(columns) if columns else '*'} FROM {table_name}"]
+            
+            if where:
+                parts.append(_where_clause(where))
+            
+            if order_by:
+                parts.append(f"ORDER BY {order_by}")
+            
+            if limit:
+                parts.append(f"LIMIT {limit}")
+            
+            parsed = self._prepare(key, " ".join(parts))
+        return parsed
     
     def update(self, table_name: str, values: Dict[str, Any], 
               where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -167,25 +361,23 @@ class Client:
         Returns:
             Result dictionary
         """
-        set_parts = []
-        for col, val in values.items():
-            if isinstance(val, str):
-                set_parts.append(f"{col} = '{val}'")
-            else:
-                set_parts.append(f"{col} = {val}")
-        
-        sql = f"UPDATE {table_name} SET {', '.join(set_parts)}"
-        
-        if where:
-            conditions = []
-            for col, val in where.items():
-                if isinstance(val, str):
-                    conditions.append(f"{col} = '{val}'")
-                else:
-                    conditions.append(f"{col} = {val}")
-            sql += " WHERE " + " AND ".join(conditions)
-        
-        return self.execute(sql)
+        where = where or {}
+        parsed = self._update_statement(table_name, values, where)
+        return self._write(parsed, [*values.values(), *where.values()])
+    
+    def _update_statement(self, table_name: str, values: Dict[str, Any],
+                          where: Dict[str, Any]) -> ParsedQuery:
+        """Get the prepared UPDATE for a table, set columns and WHERE columns."""
+        key = ('update', table_name, tuple(values), tuple(where))
+        parsed = self._cached_statement(key)
+        if parsed is None:
+            parts = [f"UPDATE {table_name} SET", ", ".join(f"{col} = ?" for col in values)]
+            
+            if where:
+                parts.append(_where_clause(where))
+            
+            parsed = self._prepare(key, " ".join(parts))
+        return parsed
     
     def delete(self, table_name: str, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -198,18 +390,76 @@ class Client:
         Returns:
             Result dictionary
         """
-        sql = f"DELETE FROM {table_name}"
+        where = where or {}
+        return self._write(self._delete_statement(table_name, where), list(where.values()))
+    
+    def _delete_statement(self, table_name: str, where: Dict[str, Any]) -> ParsedQuery:
+        """Get the prepared DELETE for a table and WHERE columns."""
+        key = ('delete', table_name, tuple(where))
+        parsed = self._cached_statement(key)
+        if parsed is None:
+            parts = [f"DELETE FROM {table_name}"]
+            
+            if where:
+                parts.append(_where_clause(where))
+            
+            parsed = self._prepare(key, " ".join(parts))
+        return parsed
+    
+    def pipeline(self) -> 'Pipeline':
+        """
+        Start queueing writes to send together.
         
-        if where:
-            conditions = []
-            for col, val in where.items():
-                if isinstance(val, str):
-                    conditions.append(f"{col} = '{val}'")
-                else:
-                    conditions.append(f"{col} = {val}")
-            sql += " WHERE " + " AND ".join(conditions)
+        Use as ``with client.pipeline() as pipe:``; the inserts, updates and
+        deletes queued on pipe are executed when the block exits, as a
+        single replicated batch sharing one WAL sync.
         
-        return self.execute(sql)
+        Returns:
+            Pipeline queueing writes for this client
+        """
+        return Pipeline(self)
+    
+    def begin(self) -> 'Pipeline':
+        """
+        Start queueing writes until commit().
+        
+        Until then insert, insert_many, update, delete and prepared writes
+        only queue their write and return a 'queued' result; execute() and
+        the DDL helpers raise ValueError for anything but a SELECT.
+        
+        Returns:
+            Pipeline the writes are queued on
+        """
+        if self._batch is not None:
+            raise ValueError("A batch is already open")
+        self._batch = Pipeline(self)
+        return self._batch
+    
+    def commit(self) -> List[Dict[str, Any]]:
+        """
+        Execute the writes queued since begin() as one batch.
+        
+        Returns:
+            Result dictionary per queued write, in order
+        """
+        batch, self._batch = self._batch, None
+        if batch is None:
+            raise ValueError("No batch is open")
+        return batch.execute()
+    
+    def _write(self, parsed: ParsedQuery, params: List[Any]) -> Dict[str, Any]:
+        """Execute a prepared write, or queue it while a batch is open."""
+        if self._batch is not None:
+            return self._batch.queue(parsed, params)
+        return self._execute_prepared(parsed, params)
+    
+    def _execute_batch(self, statements: List[Tuple[ParsedQuery, List[Any]]]) -> List[Dict[str, Any]]:
+        """Execute prepared writes with their parameters as one batch."""
+        if self.local_node:
+            return self.local_node.execute_batch(statements)
+        else:
+            # TODO: Send batches via gRPC
+            raise NotImplementedError("Remote queries not yet implemented")
     
     def create_index(self, index_name: str, table_name: str, 
                     columns: List[str], index_type: str = 'btree') -> Dict[str, Any]:
@@ -242,3 +492,88 @@ class Client:
         """Close the client and stop local node if running."""
         if self.local_node:
             self.local_node.stop()
+
+
+class PreparedStatement:
+    """
+    A statement parsed once by Client.prepare().
+    
+    Calling it with a value per ``?`` placeholder, in order, executes it
+    and returns the result dictionary.
+    """
+    
+    def __init__(self, client: Client, parsed: ParsedQuery):
+        self.client = client
+        self.parsed = parsed
+    
+    @property
+    def param_count(self) -> int:
+        """Number of parameters the statement takes."""
+        return self.parsed.param_count
+    
+    def __call__(self, *params: Any) -> Dict[str, Any]:
+        if self.parsed.query_type in ('INSERT', 'UPDATE', 'DELETE'):
+            return self.client._write(self.parsed, list(params))
+        return self.client._execute_prepared(self.parsed, params)
+
+
+class Pipeline:
+    """
+    Writes queued on a Client to be executed together.
+    
+    Created by Client.pipeline(). insert, update and delete take the same
+    arguments as on the Client but only queue the write; execute() (called
+    on leaving a with block without an error) sends everything queued in
+    one batch and appends a result per write, in order, to results.
+    """
+    
+    def __init__(self, client: Client):
+        self.client = client
+        self.results: List[Dict[str, Any]] = []
+        self._statements: List[Tuple[ParsedQuery, List[Any]]] = []
+    
+    def __enter__(self) -> 'Pipeline':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+    
+    def __len__(self) -> int:
+        return len(self._statements)
+    
+    def queue(self, parsed: ParsedQuery, params: List[Any]) -> Dict[str, Any]:
+        """Queue a prepared write with its parameters."""
+        self._statements.append((parsed, params))
+        return {
+            'status': 'queued',
+            'message': 'Write queued',
+            'rows_affected': 0
+        }
+    
+    def insert(self, table_name: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        """Queue inserting a row."""
+        parsed = self.client._insert_statement(table_name, values)
+        return self.queue(parsed, list(values.values()))
+    
+    def update(self, table_name: str, values: Dict[str, Any],
+               where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue updating rows."""
+        where = where or {}
+        parsed = self.client._update_statement(table_name, values, where)
+        return self.queue(parsed, [*values.values(), *where.values()])
+    
+    def delete(self, table_name: str, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Queue deleting rows."""
+        where = where or {}
+        parsed = self.client._delete_statement(table_name, where)
+        return self.queue(parsed, list(where.values()))
+    
+    def execute(self) -> List[Dict[str, Any]]:
+        """Execute the queued writes, returning their results."""
+        statements, self._statements = self._statements, []
+        if not statements:
+            return []
+        results = self.client._execute_batch(statements)
+        self.results.extend(results)
+        return results
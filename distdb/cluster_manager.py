@@ -1,9 +1,11 @@
 """Cluster manager for node discovery and health monitoring."""
 
+import heapq
 import threading
 import time
-from typing import List, Dict, Set, Optional, Callable
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, replace
+from typing import List, Dict, Set, Optional, Callable, Tuple
 
 
 @dataclass
@@ -29,6 +31,22 @@ class ClusterManager:
         self.nodes: Dict[str, NodeInfo] = {}
         self.nodes[node_id] = NodeInfo(node_id, host, port, time.time())
         
+        # Immutable view of self.nodes, republished after every structural
+        # mutation so readers can iterate it without taking the lock
+        self._snapshot: Tuple[NodeInfo, ...] = tuple(self.nodes.values())
+        
+        # Monotonic last-heartbeat time per node, stored in a fixed slot so
+        # update_heartbeat is a single indexed store with no lock. Slots of
+        # removed nodes are reused by the next nodes to join.
+        self._slots: Dict[str, int] = {node_id: 0}
+        self._last_seen = array('d', [time.monotonic()])
+        self._free_slots: List[int] = []
+        
+        # Pending expirations as (monotonic deadline, node_id). Only the entry
+        # matching _deadlines[node_id] is live; others are dropped when popped.
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        
         # Callbacks
         self.on_node_added: Optional[Callable[[str], None]] = None
         self.on_node_removed: Optional[Callable[[str], None]] = None
@@ -37,6 +55,7 @@ class ClusterManager:
         self.lock = threading.RLock()
         self.monitor_thread: Optional[threading.Thread] = None
         self.running = False
+        self._stop_event = threading.Event()
     
     def start(self):
         """Start cluster monitoring."""
@@ -45,6 +64,7 @@ class ClusterManager:
                 return
             
             self.running = True
+            self._stop_event.clear()
             self.monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
             self.monitor_thread.start()
     
@@ -52,71 +72,134 @@ class ClusterManager:
         """Stop cluster monitoring."""
         with self.lock:
             self.running = False
-            if self.monitor_thread:
-                self.monitor_thread.join(timeout=2.0)
+            self._stop_event.set()
+            monitor_thread = self.monitor_thread
+        
+        if monitor_thread:
+            monitor_thread.join(timeout=2.0)
+    
+    @property
+    def _timeout(self) -> float:
+        """Time without a heartbeat after which a node is considered dead."""
+        return self.heartbeat_interval * 3  # 3x heartbeat interval
+    
+    def _touch(self, node_id: str):
+        """Record a heartbeat for node_id, allocating its slot on first sight. Caller holds the lock."""
+        slot = self._slots.get(node_id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._last_seen[slot] = time.monotonic()
+            else:
+                slot = len(self._last_seen)
+                self._last_seen.append(time.monotonic())
+            self._slots[node_id] = slot
+        else:
+            self._last_seen[slot] = time.monotonic()
+    
+    def _schedule_expiry(self, node_id: str, deadline: float):
+        """Make deadline the live expiry for node_id. Caller holds the lock."""
+        self._deadlines[node_id] = deadline
+        heapq.heappush(self._expiry_heap, (deadline, node_id))
     
     def add_node(self, node_id: str, host: str, port: int):
         """Add a node to the cluster."""
         with self.lock:
             if node_id not in self.nodes:
                 self.nodes[node_id] = NodeInfo(node_id, host, port, time.time())
+                self._snapshot = tuple(self.nodes.values())
+                self._touch(node_id)
+                self._schedule_expiry(node_id, time.monotonic() + self._timeout)
                 if self.on_node_added:
                     self.on_node_added(node_id)
             else:
                 # Update existing node
                 self.nodes[node_id].host = host
                 self.nodes[node_id].port = port
-                self.nodes[node_id].last_seen = time.time()
                 self.nodes[node_id].is_alive = True
+                self._touch(node_id)
+                if node_id != self.node_id and node_id not in self._deadlines:
+                    self._schedule_expiry(node_id, time.monotonic() + self._timeout)
     
     def remove_node(self, node_id: str):
         """Remove a node from the cluster."""
         with self.lock:
             if node_id in self.nodes and node_id != self.node_id:
                 del self.nodes[node_id]
+                self._snapshot = tuple(self.nodes.values())
+                self._deadlines.pop(node_id, None)
+                self._free_slots.append(self._slots.pop(node_id))
                 if self.on_node_removed:
                     self.on_node_removed(node_id)
     
     def update_heartbeat(self, node_id: str):
         """Update heartbeat timestamp for a node."""
-        with self.lock:
-            if node_id in self.nodes:
-                self.nodes[node_id].last_seen = time.time()
-                if not self.nodes[node_id].is_alive:
-                    self.nodes[node_id].is_alive = True
+        slot = self._slots.get(node_id)
+        info = self.nodes.get(node_id)
+        if slot is None or info is None:
+            return
+        
+        # Fast path: refresh the slot; the monitor re-checks it before
+        # declaring the node dead, so no heap push is needed here
+        self._last_seen[slot] = time.monotonic()
+        
+        if not info.is_alive:
+            with self.lock:
+                if node_id in self.nodes and not info.is_alive:
+                    info.is_alive = True
+                    self._schedule_expiry(node_id, time.monotonic() + self._timeout)
                     if self.on_node_added:
                         self.on_node_added(node_id)
     
     def get_alive_nodes(self) -> List[str]:
         """Get list of alive nodes."""
-        with self.lock:
-            return [nid for nid, info in self.nodes.items() if info.is_alive]
+        return [info.node_id for info in self._snapshot if info.is_alive]
     
     def get_node_info(self, node_id: str) -> Optional[NodeInfo]:
         """Get information about a node."""
-        with self.lock:
-            return self.nodes.get(node_id)
+        info = self.nodes.get(node_id)
+        slot = self._slots.get(node_id)
+        if info is None or slot is None:
+            return info
+        # Translate the monotonic heartbeat time back to wall-clock time
+        last_seen = time.time() - (time.monotonic() - self._last_seen[slot])
+        return replace(info, last_seen=last_seen)
     
     def get_all_nodes(self) -> List[str]:
         """Get all known nodes (alive or not)."""
-        with self.lock:
-            return list(self.nodes.keys())
+        return [info.node_id for info in self._snapshot]
     
     def _monitor_loop(self):
-        """Monitor node health."""
+        """Monitor node health, waking only when the earliest expiry is due."""
         while self.running:
-            time.sleep(self.heartbeat_interval)
-            
             with self.lock:
-                now = time.time()
-                timeout = self.heartbeat_interval * 3  # 3x heartbeat interval
+                heap = self._expiry_heap
+                timeout = self._timeout
+                now = time.monotonic()
                 
-                for node_id, info in list(self.nodes.items()):
-                    if node_id == self.node_id:
+                while heap and heap[0][0] <= now:
+                    deadline, node_id = heapq.heappop(heap)
+                    # Skip entries superseded by a later schedule or removal
+                    if self._deadlines.get(node_id) != deadline:
                         continue
                     
-                    # Check if node has timed out
-                    if info.is_alive and (now - info.last_seen) > timeout:
-                        info.is_alive = False
-                        if self.on_node_removed:
-                            self.on_node_removed(node_id)
+                    info = self.nodes.get(node_id)
+                    if info is None or not info.is_alive:
+                        del self._deadlines[node_id]
+                        continue
+                    
+                    # Heartbeats only refresh the slot, so push the node back
+                    # if it has been seen since this deadline was scheduled
+                    expiry = self._last_seen[self._slots[node_id]] + timeout
+                    if expiry > now:
+                        self._schedule_expiry(node_id, expiry)
+                        continue
+                    
+                    del self._deadlines[node_id]
+                    info.is_alive = False
+                    if self.on_node_removed:
+                        self.on_node_removed(node_id)
+                
+                wait = heap[0][0] - now if heap else self.heartbeat_interval
+            
+            self._stop_event.wait(timeout=wait)
@@ -22,6 +22,7 @@ class Config:
     data_dir: str = "./data"
     wal_dir: str = "./wal"
     snapshot_interval: int = 1000  # Operations between snapshots
+    wal_dsync: bool = False  # Open WAL files O_DSYNC instead of fsyncing
     
     # Performance settings
     max_batch_size: int = 100
@@ -36,12 +37,23 @@ class Config:
     @classmethod
     def from_env(cls) -> 'Config':
         """Create configuration from environment variables."""
+        env = os.environ
+        
+        port = int(env.get('DISTDB_PORT', '5000'))
+        if not 0 < port < 65536:
+            raise ValueError(f"DISTDB_PORT must be between 1 and 65535, got {port}")
+        
+        replication_factor = int(env.get('DISTDB_REPLICATION_FACTOR', '3'))
+        if replication_factor < 1:
+            raise ValueError(f"DISTDB_REPLICATION_FACTOR must be at least 1, got {replication_factor}")
+        
         return cls(
-            node_id=os.getenv('DISTDB_NODE_ID', 'node1'),
-            host=os.getenv('DISTDB_HOST', 'localhost'),
-            port=int(os.getenv('DISTDB_PORT', '5000')),
-            cluster_nodes=os.getenv('DISTDB_CLUSTER_NODES', '').split(',') if os.getenv('DISTDB_CLUSTER_NODES') else [],
-            replication_factor=int(os.getenv('DISTDB_REPLICATION_FACTOR', '3')),
-            data_dir=os.getenv('DISTDB_DATA_DIR', './data'),
-            wal_dir=os.getenv('DISTDB_WAL_DIR', './wal'),
+            node_id=env.get('DISTDB_NODE_ID', 'node1'),
+            host=env.get('DISTDB_HOST', 'localhost'),
+            port=port,
+            cluster_nodes=nodes.split(',') if (nodes := env.get('DISTDB_CLUSTER_NODES')) else [],
+            replication_factor=replication_factor,
+            data_dir=env.get('DISTDB_DATA_DIR', './data'),
+            wal_dir=env.get('DISTDB_WAL_DIR', './wal'),
+            wal_dsync=env.get('DISTDB_WAL_DSYNC', '').lower() in ('1', 'true', 'yes'),
         )
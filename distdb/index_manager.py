@@ -1,9 +1,25 @@
 """Index manager for fast lookups."""
 
 import threading
-from typing import Any, Dict, List, Optional, Set, Tuple
-from sortedcontainers import SortedDict
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple, Union
+from sortedcontainers import SortedList
 from collections import defaultdict
+from operator import itemgetter
+
+# Deferred single-row inserts an index queues before adding them in a
+# batch anyway, so a write-only workload doesn't hold every row it inserted
+# (SortedList's default load factor)
+_MAX_PENDING = 1000
+
+
+def _make_key_getter(columns: List[str]) -> Callable[[Dict[str, Any]], Any]:
+    """Compile a function extracting the index key for columns from a row."""
+    if len(columns) == 1:
+        column = columns[0]
+        return lambda row: row.get(column)
+    # Unrolled tuple display, avoiding a generator round trip per row
+    getters = ", ".join(f"row.get({col!r})" for col in columns)
+    return eval(compile(f"lambda row: ({getters})", "<index key>", "eval"))
 
 
 class Index:
@@ -12,20 +28,81 @@ class Index:
     def __init__(self, table: str, columns: List[str]):
         self.table = table
         self.columns = columns
-        self.lock = threading.RLock()
+        self.lock = threading.Lock()
+        # Rows inserted one at a time since the index was last read. They are
+        # added in a single batch by the next lookup, delete or batch insert,
+        # so a run of single-row INSERTs costs one bulk insert.
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
     
     def insert(self, key: str, row: Dict[str, Any]):
-        """Insert a row into the index."""
+        """
+        Insert a row into the index, deferred until the index is next used.
+        
+        A row that cannot be indexed is rejected here, as an immediate
+        insert would reject it, rather than when the queue is flushed.
+        """
+        with self.lock:
+            self._check_indexable(row)
+            self._pending.append((key, row))
+            if len(self._pending) >= _MAX_PENDING:
+                self._flush_pending()
+    
+    def _flush_pending(self):
+        """Add the deferred rows in one batch. Caller holds the lock."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        try:
+            self._insert_batch(pending)
+        except BaseException:
+            # Keep the rows for the next flush rather than losing them
+            self._pending[:0] = pending
+            raise
+    
+    def _check_indexable(self, row: Dict[str, Any]):
+        """Raise TypeError if row cannot be indexed alongside the rows already in. Caller holds the lock."""
+    
+    def _insert_batch(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """
+        Add a batch of (key, row) pairs. Caller holds the lock.
+        
+        May raise TypeError for a row that cannot be indexed, leaving
+        the index holding a subset of the batch, each row either fully
+        added or not at all.
+        """
         raise NotImplementedError
     
     def delete(self, key: str, row: Dict[str, Any]):
         """Delete a row from the index."""
         raise NotImplementedError
     
+    def insert_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Insert a batch of (key, row) pairs under a single lock acquisition."""
+        with self.lock:
+            self._flush_pending()
+            self._insert_batch(items)
+    
+    def delete_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Delete a batch of (key, row) pairs from the index."""
+        for key, row in items:
+            self.delete(key, row)
+    
+    def bulk_load(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Build the index from a table's existing (key, row) pairs."""
+        self.insert_many(list(items))
+    
     def lookup(self, **conditions) -> Set[str]:
         """Lookup rows matching conditions."""
         raise NotImplementedError
     
+    def lookup_readonly(self, **conditions) -> Collection[str]:
+        """Lookup rows matching conditions without copying the postings.
+        
+        The result may be the index's own storage: callers must not mutate
+        it and should consume it straight away.
+        """
+        return self.lookup(**conditions)
+    
     def range_scan(self, column: str, start: Any, end: Any) -> Set[str]:
         """Range scan for sorted indexes."""
         raise NotImplementedError
@@ -36,47 +113,121 @@ class HashIndex(Index):
     
     def __init__(self, table: str, columns: List[str]):
         super().__init__(table, columns)
-        # index_value -> set of row keys
-        self.index: Dict[Any, Set[str]] = defaultdict(set)
+        # index_value -> row key, or set of row keys once a value has more
+        # than one row. Unique values (primary/foreign keys) are the common
+        # case, so they are stored bare instead of paying for a set each.
+        # Single-column indexes key the postings by the bare column value,
+        # composite ones by a value tuple.
+        self.index: Dict[Any, Union[str, Set[str]]] = {}
+        # Get index key from row, specialized to this column list
+        self._get_index_key = _make_key_getter(columns)
     
-    def _get_index_key(self, row: Dict[str, Any]) -> Optional[Tuple]:
-        """Get index key from row."""
-        try:
-            return tuple(row.get(col) for col in self.columns)
-        except (KeyError, TypeError):
-            return None
+    @staticmethod
+    def _add_posting(index: Dict[Any, Union[str, Set[str]]], index_key: Any, key: str):
+        """Add key to the postings of index_key, promoting a bare key to a set."""
+        postings = index.get(index_key)
+        if postings is None:
+            index[index_key] = key
+        elif type(postings) is set:
+            postings.add(key)
+        elif postings != key:
+            index[index_key] = {postings, key}
     
-    def insert(self, key: str, row: Dict[str, Any]):
-        """Insert a row into the hash index."""
-        with self.lock:
-            index_key = self._get_index_key(row)
-            if index_key is not None:
-                self.index[index_key].add(key)
+    @staticmethod
+    def _remove_posting(index: Dict[Any, Union[str, Set[str]]], index_key: Any, key: str):
+        """Remove key from the postings of index_key, demoting a singleton set."""
+        postings = index.get(index_key)
+        if postings is None:
+            return
+        if type(postings) is set:
+            postings.discard(key)
+            if len(postings) == 1:
+                index[index_key] = next(iter(postings))
+            elif not postings:
+                del index[index_key]
+        elif postings == key:
+            del index[index_key]
     
     def delete(self, key: str, row: Dict[str, Any]):
         """Delete a row from the hash index."""
         with self.lock:
-            index_key = self._get_index_key(row)
-            if index_key is not None and index_key in self.index:
-                self.index[index_key].discard(key)
-                if not self.index[index_key]:
-                    del self.index[index_key]
+            self._flush_pending()
+            try:
+                self._remove_posting(self.index, self._get_index_key(row), key)
+            except TypeError:
+                return
+    
+    def _insert_batch(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Add a batch of rows. Caller holds the lock."""
+        index = self.index
+        get_index_key = self._get_index_key
+        add_posting = self._add_posting
+        for key, row in items:
+            try:
+                add_posting(index, get_index_key(row), key)
+            except TypeError:
+                # Unhashable value, cannot be indexed
+                continue
+    
+    def delete_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Delete a batch of rows under a single lock acquisition."""
+        index = self.index
+        get_index_key = self._get_index_key
+        remove_posting = self._remove_posting
+        with self.lock:
+            self._flush_pending()
+            for key, row in items:
+                try:
+                    remove_posting(index, get_index_key(row), key)
+                except TypeError:
+                    continue
     
     def lookup(self, **conditions) -> Set[str]:
         """Lookup rows matching exact conditions."""
         with self.lock:
-            # Build lookup key from conditions
+            self._flush_pending()
             try:
-                lookup_key = tuple(conditions.get(col) for col in self.columns)
-                return self.index.get(lookup_key, set()).copy()
-            except (KeyError, TypeError):
+                postings = self.index.get(self._get_index_key(conditions))
+            except TypeError:
+                return set()
+            if postings is None:
                 return set()
+            return postings.copy() if type(postings) is set else {postings}
+    
+    def lookup_readonly(self, **conditions) -> Collection[str]:
+        """Lookup rows matching exact conditions, returning the postings uncopied."""
+        if self._pending:
+            with self.lock:
+                self._flush_pending()
+        try:
+            postings = self.index.get(self._get_index_key(conditions))
+        except TypeError:
+            return ()
+        if postings is None:
+            return ()
+        return postings if type(postings) is set else (postings,)
     
     def range_scan(self, column: str, start: Any, end: Any) -> Set[str]:
         """Hash indexes don't support range scans."""
         raise NotImplementedError("Hash indexes don't support range scans")
 
 
+class _Top:
+    """Sentinel comparing greater than anything, to bound (value, ...) entries from above."""
+    
+    def __gt__(self, other: Any) -> bool:
+        return True
+    
+    def __lt__(self, other: Any) -> bool:
+        return False
+
+
+_TOP = _Top()
+
+# Row key of a (value, key is bytes, row key) entry
+_row_key = itemgetter(2)
+
+
 class BTreeIndex(Index):
     """B-tree index for range queries."""
     
@@ -86,8 +237,14 @@ class BTreeIndex(Index):
         if len(columns) != 1:
             raise ValueError("BTreeIndex only supports single column")
         
-        # value -> set of row keys
-        self.index: SortedDict = SortedDict()
+        # Sorted (value, key is bytes, row key) entries. One flat list
+        # instead of a set per distinct value; all rows for a value (or
+        # value range) are a slice between (start,) and (end, _TOP).
+        # SortedList already stores them in blocks of contiguous sorted
+        # sublists, so a slice is copied a block at a time. Rows written
+        # by the executor have bytes keys and others str keys; the flag
+        # orders the two apart, so ties on value never compare str to bytes.
+        self.index: SortedList = SortedList()
     
     def _get_index_value(self, row: Dict[str, Any]) -> Any:
         """Get index value from row."""
@@ -96,32 +253,108 @@ class BTreeIndex(Index):
         except (KeyError, TypeError):
             return None
     
-    def insert(self, key: str, row: Dict[str, Any]):
-        """Insert a row into the B-tree index."""
-        with self.lock:
-            value = self._get_index_value(row)
-            if value is not None:
-                if value not in self.index:
-                    self.index[value] = set()
-                self.index[value].add(key)
+    def _bounds(self, start: Any, end: Any) -> Tuple[int, int]:
+        """Positions of the entries with start <= value <= end; None is unbounded."""
+        index = self.index
+        try:
+            lo = 0 if start is None else index.bisect_left((start,))
+            hi = len(index) if end is None else index.bisect_right((end, _TOP))
+        except TypeError:
+            # A bound of a type the values don't compare with matches nothing
+            return 0, 0
+        return lo, hi
+    
+    def _check_indexable(self, row: Dict[str, Any]):
+        """Raise TypeError if the row's value does not compare with the values already indexed."""
+        value = self._get_index_value(row)
+        if value is None:
+            return
+        if self.index:
+            other = self.index[0][0]
+        else:
+            column = self.columns[0]
+            other = next((v for _, pending in self._pending
+                          if (v := pending.get(column)) is not None), None)
+            if other is None:
+                return
+        # Orders the value the way SortedList.add would, so it raises alike
+        value < other
     
     def delete(self, key: str, row: Dict[str, Any]):
         """Delete a row from the B-tree index."""
         with self.lock:
+            self._flush_pending()
             value = self._get_index_value(row)
-            if value is not None and value in self.index:
-                self.index[value].discard(key)
-                if not self.index[value]:
-                    del self.index[value]
+            if value is not None:
+                try:
+                    self.index.discard((value, type(key) is bytes, key))
+                except TypeError:
+                    # Never indexed: it doesn't compare with the values
+                    return
+    
+    def _insert_batch(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Add a batch of rows. Caller holds the lock."""
+        index = self.index
+        column = self.columns[0]
+        pairs = sorted({pair for key, row in items
+                        if (pair := (row.get(column), type(key) is bytes, key))[0] is not None and pair not in index})
+        if len(pairs) * 4 >= len(index):
+            # Merge the two sorted runs with a single sort, as
+            # SortedList.update does, but before touching the list: a value
+            # that doesn't compare with the others fails here with the
+            # index intact
+            merged = list(index)
+            merged += pairs
+            merged.sort()
+            index.clear()
+            index.update(merged)
+        else:
+            # A few pairs into a large index; each add compares before it
+            # inserts
+            for pair in pairs:
+                index.add(pair)
+    
+    def delete_many(self, items: List[Tuple[str, Dict[str, Any]]]):
+        """Delete a batch of rows under a single lock acquisition."""
+        index = self.index
+        column = self.columns[0]
+        with self.lock:
+            self._flush_pending()
+            for key, row in items:
+                value = row.get(column)
+                if value is not None:
+                    try:
+                        index.discard((value, type(key) is bytes, key))
+                    except TypeError:
+                        continue
+    
+    def bulk_load(self, items: Iterable[Tuple[str, Dict[str, Any]]]):
+        """Build the index from existing rows with one sort instead of per-row inserts."""
+        column = self.columns[0]
+        pairs = sorted({(value, type(key) is bytes, key) for key, row in items
+                        if (value := row.get(column)) is not None})
+        with self.lock:
+            self._flush_pending()
+            if self.index:
+                self.index.update([pair for pair in pairs if pair not in self.index])
+            else:
+                # Already sorted, so the list is loaded in a single linear pass
+                self.index = SortedList(pairs)
     
     def lookup(self, **conditions) -> Set[str]:
         """Lookup rows matching exact value."""
+        return set(self.lookup_readonly(**conditions))
+    
+    def lookup_readonly(self, **conditions) -> Collection[str]:
+        """Lookup rows matching exact value, without building a set."""
+        column = self.columns[0]
+        if column not in conditions or conditions[column] is None:
+            return ()
+        value = conditions[column]
         with self.lock:
-            column = self.columns[0]
-            if column in conditions:
-                value = conditions[column]
-                return self.index.get(value, set()).copy()
-            return set()
+            self._flush_pending()
+            lo, hi = self._bounds(value, value)
+            return list(map(_row_key, self.index[lo:hi]))
     
     def range_scan(self, column: str, start: Any = None, end: Any = None) -> Set[str]:
         """Range scan on the indexed column."""
@@ -129,27 +362,9 @@ class BTreeIndex(Index):
             if column != self.columns[0]:
                 raise ValueError(f"Index is on {self.columns[0]}, not {column}")
             
-            result = set()
-            
-            # Determine range
-            if start is None and end is None:
-                # Full scan
-                for keys in self.index.values():
-                    result.update(keys)
-            elif start is None:
-                # Scan up to end
-                for value in self.index.irange(maximum=end):
-                    result.update(self.index[value])
-            elif end is None:
-                # Scan from start
-                for value in self.index.irange(minimum=start):
-                    result.update(self.index[value])
-            else:
-                # Scan from start to end
-                for value in self.index.irange(minimum=start, maximum=end):
-                    result.update(self.index[value])
-            
-            return result
+            self._flush_pending()
+            lo, hi = self._bounds(start, end)
+            return set(map(_row_key, self.index[lo:hi]))
 
 
 class IndexManager:
@@ -158,7 +373,9 @@ class IndexManager:
     def __init__(self):
         # table -> index_name -> Index
         self.indexes: Dict[str, Dict[str, Index]] = defaultdict(dict)
-        self.lock = threading.RLock()
+        # (table, column) -> indexes covering that column
+        self._col_to_indexes: Dict[Tuple[str, str], List[Index]] = defaultdict(list)
+        self.lock = threading.Lock()
     
     def create_index(self, index_name: str, table: str, columns: List[str], index_type: str = 'btree') -> Index:
         """Create a new index."""
@@ -174,13 +391,20 @@ class IndexManager:
                 raise ValueError(f"Unknown index type: {index_type}")
             
             self.indexes[table][index_name] = index
+            for col in columns:
+                self._col_to_indexes[(table, col)].append(index)
             return index
     
     def drop_index(self, table: str, index_name: str):
         """Drop an index."""
         with self.lock:
             if table in self.indexes and index_name in self.indexes[table]:
-                del self.indexes[table][index_name]
+                index = self.indexes[table].pop(index_name)
+                for col in index.columns:
+                    candidates = self._col_to_indexes[(table, col)]
+                    candidates.remove(index)
+                    if not candidates:
+                        del self._col_to_indexes[(table, col)]
     
     def get_index(self, table: str, index_name: str) -> Optional[Index]:
         """Get an index by name."""
@@ -192,6 +416,15 @@ class IndexManager:
         with self.lock:
             return dict(self.indexes.get(table, {}))
     
+    def indexes_covering(self, table: str, columns: Iterable[str]) -> List[Index]:
+        """Get the indexes on table covering any of columns."""
+        with self.lock:
+            covering: Dict[Index, None] = {}
+            for col in columns:
+                for index in self._col_to_indexes.get((table, col), ()):
+                    covering[index] = None
+            return list(covering)
+    
     def insert_row(self, table: str, key: str, row: Dict[str, Any]):
         """Update all indexes when a row is inserted."""
         with self.lock:
@@ -204,15 +437,37 @@ class IndexManager:
             for index in self.indexes.get(table, {}).values():
                 index.delete(key, row)
     
+    def insert_rows(self, table: str, items: List[Tuple[str, Dict[str, Any]]]):
+        """Update all indexes for a batch of inserted (key, row) pairs."""
+        with self.lock:
+            for index in self.indexes.get(table, {}).values():
+                index.insert_many(items)
+    
+    def delete_rows(self, table: str, items: List[Tuple[str, Dict[str, Any]]]):
+        """Update all indexes for a batch of deleted (key, row) pairs."""
+        with self.lock:
+            for index in self.indexes.get(table, {}).values():
+                index.delete_many(items)
+    
     def find_best_index(self, table: str, conditions: Dict[str, Any]) -> Optional[Index]:
         """Find the best index for given conditions."""
         with self.lock:
             best_index = None
             best_score = -1
             
-            for index in self.indexes.get(table, {}).values():
+            # Only indexes covering at least one condition column can score
+            col_to_indexes = self._col_to_indexes
+            candidates: Dict[Index, None] = {}
+            for col in conditions:
+                for index in col_to_indexes.get((table, col), ()):
+                    candidates[index] = None
+            
+            for index in candidates:
+                # Lookups need a value for every indexed column
+                if not all(col in conditions for col in index.columns):
+                    continue
                 # Calculate how many columns match
-                score = sum(1 for col in index.columns if col in conditions)
+                score = len(index.columns)
                 if score > best_score:
                     best_score = score
                     best_index = index
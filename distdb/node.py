@@ -2,13 +2,15 @@
 
 import threading
 import logging
-from typing import Optional, Dict, Any
+import queue
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Sequence, Tuple
 from pathlib import Path
 
 from .config import Config
 from .storage_engine import StorageEngine
 from .index_manager import IndexManager
-from .sql_parser import SQLParser
+from .sql_parser import SQLParser, ParsedQuery
 from .query_executor import QueryExecutor
 from .shard_manager import ShardManager
 from .replication import ReplicationManager
@@ -18,6 +20,37 @@ from .utils import setup_logging
 
 logger = logging.getLogger(__name__)
 
+# Statements that must go through the Raft log
+_WRITE_KEYWORDS = frozenset({'INSERT', 'UPDATE', 'DELETE'})
+_DDL_KEYWORDS = frozenset({'CREATE', 'DROP'})
+_REPLICATED_TYPES = frozenset({'INSERT', 'UPDATE', 'DELETE', 'CREATE_TABLE', 'DROP_TABLE'})
+
+# Seconds a write queued for the coalescer waits between checks that the
+# coalescer thread is still there to replicate it
+_COALESCER_CHECK_INTERVAL = 1.0
+
+
+def _is_write_sql(sql: str) -> bool:
+    """Tell from the leading keywords whether sql is a replicated write."""
+    words = sql.split(None, 2)
+    if not words:
+        return False
+    first = words[0].upper()
+    if first in _WRITE_KEYWORDS:
+        return True
+    return first in _DDL_KEYWORDS and len(words) > 1 and words[1].upper() == 'TABLE'
+
+
+@dataclass
+class _PendingWrite:
+    """A write waiting for the Raft entry that carries it to be applied."""
+    sql: str
+    parsed_query: ParsedQuery
+    params: Optional[Sequence[Any]] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[Exception] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
 
 class Node:
     """Database node coordinating all components."""
@@ -38,7 +71,8 @@ class Node:
         self.storage = StorageEngine(
             config.data_dir,
             config.wal_dir,
-            config.snapshot_interval
+            config.snapshot_interval,
+            wal_dsync=config.wal_dsync
         )
         
         self.index_manager = IndexManager()
@@ -68,15 +102,11 @@ class Node:
             if node_spec:
                 try:
                     # Expected format: node_id@host:port
-                    parts = node_spec.split('@')
-                    if len(parts) == 2:
-                        node_id = parts[0]
-                        host_port = parts[1].split(':')
-                        if len(host_port) == 2:
-                            host = host_port[0]
-                            port = int(host_port[1])
-                            self.cluster_manager.add_node(node_id, host, port)
-                            self.shard_manager.add_node(node_id)
+                    node_id, at, host_port = node_spec.partition('@')
+                    host, colon, port = host_port.partition(':')
+                    if at and colon and '@' not in host_port and ':' not in port:
+                        self.cluster_manager.add_node(node_id, host, int(port))
+                        self.shard_manager.add_node(node_id)
                 except Exception as e:
                     logger.error(f"Error adding node {node_spec}: {e}")
         
@@ -91,6 +121,11 @@ class Node:
         # Set replication callback
         self.replication_manager.set_apply_callback(self._apply_replicated_command)
         
+        # Write coalescing: concurrent writes queue up while a Raft entry is
+        # in flight and are replicated together as one batch entry
+        self._write_queue: 'queue.Queue[Optional[_PendingWrite]]' = queue.Queue()
+        self._coalescer_thread: Optional[threading.Thread] = None
+        
         self.running = False
         self.lock = threading.RLock()
         
@@ -105,6 +140,8 @@ class Node:
             logger.info(f"Starting node {self.node_id}")
             self.running = True
             self.cluster_manager.start()
+            self._coalescer_thread = threading.Thread(target=self._coalesce_writes, daemon=True)
+            self._coalescer_thread.start()
             logger.info(f"Node {self.node_id} started")
     
     def stop(self):
@@ -115,6 +152,10 @@ class Node:
             
             logger.info(f"Stopping node {self.node_id}")
             self.running = False
+            if self._coalescer_thread:
+                self._write_queue.put(None)
+                self._coalescer_thread.join(timeout=2.0)
+                self._coalescer_thread = None
             self.cluster_manager.stop()
             self.replication_manager.shutdown()
             self.storage.close()
@@ -122,34 +163,117 @@ class Node:
     
     def execute_query(self, sql: str) -> Dict[str, Any]:
         """Execute a SQL query."""
+        return self._execute(sql)
+    
+    def prepare(self, sql: str) -> ParsedQuery:
+        """Parse a statement containing ``?`` placeholders for repeated execution."""
+        return self.sql_parser.prepare(sql)
+    
+    def execute_prepared(self, parsed_query: ParsedQuery, params: Sequence[Any]) -> Dict[str, Any]:
+        """Execute a prepared statement with bound parameters, skipping the SQL parse."""
+        return self._execute(parsed_query.sql, parsed_query, params)
+    
+    def execute_columnar(self, parsed_query: ParsedQuery, params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """Execute a prepared SELECT, returning its result as a list of values per column."""
         try:
-            # Parse the query
-            parsed_query = self.sql_parser.parse(sql)
+            result = self.query_executor.execute_columnar(parsed_query.bind(params))
+        except Exception as e:
+            logger.error(f"Error executing query: {e}", exc_info=True)
+            return {
+                'status': 'error',
+                'message': str(e),
+                'node_id': self.node_id
+            }
+        result['node_id'] = self.node_id
+        return result
+    
+    def execute_batch(self, statements: Sequence[Tuple[ParsedQuery, Sequence[Any]]]) -> List[Dict[str, Any]]:
+        """
+        Execute prepared writes with their parameters as one batch.
+        
+        The writes are replicated together, max_batch_size per batch entry,
+        and each entry is applied under a single WAL sync. A result
+        is returned per write, in order.
+        """
+        if not self.replication_manager.is_leader():
+            return [self._not_leader_error() for _ in statements]
+        
+        pending_writes = []
+        for prepared, params in statements:
+            pending = _PendingWrite(prepared.sql, prepared, params)
+            try:
+                pending.parsed_query = prepared.bind(params)
+                if pending.parsed_query.query_type not in _REPLICATED_TYPES:
+                    raise ValueError(f"Cannot batch {pending.parsed_query.query_type} statements")
+            except Exception as e:
+                pending.error = e
+            pending_writes.append(pending)
+        
+        valid = [pending for pending in pending_writes if pending.error is None]
+        max_batch = self.config.max_batch_size
+        for start in range(0, len(valid), max_batch):
+            self._replicate_writes(valid[start:start + max_batch])
+        
+        results = []
+        is_leader = self.replication_manager.is_leader()
+        for pending in pending_writes:
+            if pending.error is not None:
+                logger.error(f"Error executing query: {pending.error}")
+                results.append({
+                    'status': 'error',
+                    'message': str(pending.error),
+                    'node_id': self.node_id
+                })
+            else:
+                result = pending.result
+                result['node_id'] = self.node_id
+                result['is_leader'] = is_leader
+                results.append(result)
+        return results
+    
+    @staticmethod
+    def _not_leader_error() -> Dict[str, Any]:
+        """Result returned when a write reaches a follower."""
+        return {
+            'status': 'error',
+            'message': 'Not the leader, cannot write',
+            'is_leader': False
+        }
+    
+    def _execute(self, sql: str, prepared: Optional[ParsedQuery] = None,
+                 params: Optional[Sequence[Any]] = None) -> Dict[str, Any]:
+        """Execute a SQL query, or a prepared statement with its parameters."""
+        try:
+            # Parse the query. A follower rejects writes without parsing them.
+            if prepared is None:
+                if _is_write_sql(sql) and not self.replication_manager.is_leader():
+                    return self._not_leader_error()
+                parsed_query = self.sql_parser.parse(sql)
+            else:
+                parsed_query = prepared.bind(params)
             
             # For write operations, replicate via Raft
-            if parsed_query.query_type in ('INSERT', 'UPDATE', 'DELETE', 'CREATE_TABLE', 'DROP_TABLE'):
+            if parsed_query.query_type in _REPLICATED_TYPES:
                 if not self.replication_manager.is_leader():
-                    return {
-                        'status': 'error',
-                        'message': 'Not the leader, cannot write',
-                        'is_leader': False
-                    }
+                    return self._not_leader_error()
                 
-                # Replicate the write
-                command = {
-                    'type': 'sql',
-                    'sql': sql
-                }
-                success = self.replication_manager.replicate_write(command)
+                # Replicate the write, batched with any concurrent writes
+                # when the coalescer is running
+                pending = _PendingWrite(sql, parsed_query, params)
+                coalescer_thread = self._coalescer_thread
+                if coalescer_thread is not None and coalescer_thread.is_alive():
+                    self._write_queue.put(pending)
+                    self._wait_coalesced(pending, coalescer_thread)
+                else:
+                    self._replicate_writes([pending])
                 
-                if not success:
-                    return {
-                        'status': 'error',
-                        'message': 'Failed to replicate write'
-                    }
+                if pending.error is not None:
+                    raise pending.error
+                result = pending.result
+            else:
+                # Execute the query
+                result = self.query_executor.execute(parsed_query)
             
-            # Execute the query
-            result = self.query_executor.execute(parsed_query)
             result['node_id'] = self.node_id
             result['is_leader'] = self.replication_manager.is_leader()
             
@@ -163,16 +287,128 @@ class Node:
                 'node_id': self.node_id
             }
     
-    def _apply_replicated_command(self, command: Dict[str, Any]):
-        """Called when a replicated command is committed."""
+    def _wait_coalesced(self, pending: _PendingWrite, coalescer_thread: threading.Thread):
+        """
+        Wait for the coalescer to resolve a queued write.
+        
+        Should the coalescer thread stop or die first, a write it never
+        took is taken back and replicated inline, and one it took but did
+        not finish is failed.
+        """
+        while not pending.done.wait(_COALESCER_CHECK_INTERVAL):
+            if coalescer_thread.is_alive():
+                continue
+            # Taking the write out under the queue's mutex means the
+            # coalescer can no longer get it
+            write_queue = self._write_queue
+            with write_queue.mutex:
+                try:
+                    write_queue.queue.remove(pending)
+                    taken_back = True
+                except ValueError:
+                    taken_back = False
+            if taken_back:
+                self._replicate_writes([pending])
+            elif not pending.done.is_set():
+                pending.error = RuntimeError("Write coalescer stopped before replicating the write")
+            return
+    
+    def _coalesce_writes(self):
+        """Replicate queued writes, draining everything queued into one entry."""
+        max_batch = self.config.max_batch_size
+        while True:
+            pending = self._write_queue.get()
+            if pending is None:
+                return
+            
+            # Writes that queued up while the previous entry was in flight
+            # share the next one; there is no extra wait for stragglers
+            batch = [pending]
+            stop = False
+            while len(batch) < max_batch:
+                try:
+                    pending = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stop = True
+                    break
+                batch.append(pending)
+            
+            self._replicate_writes(batch)
+            if stop:
+                return
+    
+    def _replicate_writes(self, batch: List[_PendingWrite]):
+        """Replicate a batch of writes as one Raft entry and resolve each of them."""
+        commands = []
         try:
-            if command.get('type') == 'sql':
-                sql = command.get('sql')
-                if sql:
-                    parsed_query = self.sql_parser.parse(sql)
-                    self.query_executor.execute(parsed_query)
+            # The pending writes ride along so the apply callback executes
+            # their parsed queries without parsing them again
+            for pending in batch:
+                command = {'type': 'sql', 'sql': pending.sql, '_pending': pending}
+                if pending.params is not None:
+                    command['params'] = list(pending.params)
+                commands.append(command)
+            
+            success = self.replication_manager.replicate_batch(commands)
+            
+            if not success:
+                for pending in batch:
+                    pending.result = {
+                        'status': 'error',
+                        'message': 'Failed to replicate write'
+                    }
         except Exception as e:
-            logger.error(f"Error applying replicated command: {e}", exc_info=True)
+            for pending in batch:
+                if pending.result is None and pending.error is None:
+                    pending.error = e
+        finally:
+            # The committed entry has been applied by _apply_replicated_command
+            for command in commands:
+                command.pop('_pending', None)
+            for pending in batch:
+                pending.done.set()
+    
+    def _apply_replicated_command(self, command: Dict[str, Any]):
+        """
+        Called when a replicated command is committed.
+        
+        On the leader the command still carries its pending writes; each
+        result (or error) is handed back to the request waiting on it.
+        """
+        command_type = command.get('type')
+        if command_type == 'sql':
+            statements = [command]
+        elif command_type == 'batch':
+            statements = [operation for operation in command.get('operations', [])
+                          if operation.get('type') == 'sql']
+        else:
+            return
+        
+        # The whole entry is made durable with one WAL sync at the end
+        with self.storage.deferred_sync():
+            for statement in statements:
+                pending = statement.get('_pending')
+                try:
+                    if pending is not None:
+                        pending.result = self.query_executor.execute(pending.parsed_query)
+                        continue
+                    
+                    sql = statement.get('sql')
+                    if not sql:
+                        continue
+                    if 'params' in statement:
+                        parsed_query = self.sql_parser.prepare(sql).bind(statement['params'])
+                    else:
+                        parsed_query = self.sql_parser.parse(sql)
+                    self.query_executor.execute(parsed_query)
+                except Exception as e:
+                    if pending is not None:
+                        # Reported to the waiting request by _execute
+                        pending.error = e
+                    else:
+                        logger.error(f"Error applying replicated command: {e}", exc_info=True)
     
     def _on_node_added(self, node_id: str):
         """Called when a node is added to the cluster."""
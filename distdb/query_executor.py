@@ -1,11 +1,15 @@
 """Query executor for executing parsed SQL queries."""
 
-import threading
-import uuid
-from typing import List, Dict, Any, Optional
-from .storage_engine import StorageEngine
+import heapq
+import os
+from itertools import repeat
+from operator import is_, itemgetter
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from .storage_engine import MISSING, StorageEngine, Table
 from .index_manager import IndexManager
 from .sql_parser import ParsedQuery
+from ._kernels import match_eq, match_keys, match_slots, select_rows
+from .utils import ReadWriteLock
 
 
 class QueryExecutor:
@@ -14,29 +18,35 @@ class QueryExecutor:
     def __init__(self, storage: StorageEngine, index_manager: IndexManager):
         self.storage = storage
         self.index_manager = index_manager
-        self.lock = threading.RLock()
+        # SELECTs share the lock; DDL and writes take it exclusively
+        self.lock = ReadWriteLock()
     
     def execute(self, query: ParsedQuery) -> Dict[str, Any]:
         """Execute a parsed query and return results."""
-        with self.lock:
-            if query.query_type == 'CREATE_TABLE':
-                return self._execute_create_table(query)
-            elif query.query_type == 'DROP_TABLE':
-                return self._execute_drop_table(query)
-            elif query.query_type == 'CREATE_INDEX':
-                return self._execute_create_index(query)
-            elif query.query_type == 'DROP_INDEX':
-                return self._execute_drop_index(query)
-            elif query.query_type == 'INSERT':
-                return self._execute_insert(query)
-            elif query.query_type == 'SELECT':
-                return self._execute_select(query)
-            elif query.query_type == 'UPDATE':
-                return self._execute_update(query)
-            elif query.query_type == 'DELETE':
-                return self._execute_delete(query)
-            else:
-                raise ValueError(f"Unknown query type: {query.query_type}")
+        if query.query_type == 'SELECT':
+            # Takes the read lock itself, only while gathering rows
+            return self._execute_select(query)
+        
+        # Wait for the WAL only after releasing the write lock, so writers
+        # queued behind this one can share its fsync
+        with self.storage.deferred_sync():
+            with self.lock.write_lock():
+                if query.query_type == 'CREATE_TABLE':
+                    return self._execute_create_table(query)
+                elif query.query_type == 'DROP_TABLE':
+                    return self._execute_drop_table(query)
+                elif query.query_type == 'CREATE_INDEX':
+                    return self._execute_create_index(query)
+                elif query.query_type == 'DROP_INDEX':
+                    return self._execute_drop_index(query)
+                elif query.query_type == 'INSERT':
+                    return self._execute_insert(query)
+                elif query.query_type == 'UPDATE':
+                    return self._execute_update(query)
+                elif query.query_type == 'DELETE':
+                    return self._execute_delete(query)
+                else:
+                    raise ValueError(f"Unknown query type: {query.query_type}")
     
     def _execute_create_table(self, query: ParsedQuery) -> Dict[str, Any]:
         """Execute CREATE TABLE."""
@@ -70,9 +80,8 @@ class QueryExecutor:
             query.index_type
         )
         
-        # Build index from existing data
-        for key, row in self.storage.scan(query.table):
-            index.insert(key, row)
+        # Build index from existing data in one bulk load
+        index.bulk_load(self.storage.scan_view(query.table))
         
         return {
             'status': 'success',
@@ -91,63 +100,100 @@ class QueryExecutor:
     
     def _execute_insert(self, query: ParsedQuery) -> Dict[str, Any]:
         """Execute INSERT."""
-        # Generate a unique key
-        key = str(uuid.uuid4())
+        if query.values_batch:
+            return self._execute_insert_many(query)
+        
+        # Generate a unique key: 16 random bytes, a third of the size of a
+        # uuid string and cheaper to hash and compare
+        key = os.urandom(16)
+        
+        # Copy the values: parsed queries are cached and may be executed again
+        values = dict(query.values)
         
         # Insert into storage
-        self.storage.put(query.table, key, query.values)
+        self.storage.put(query.table, key, values)
         
         # Update indexes
-        self.index_manager.insert_row(query.table, key, query.values)
+        self.index_manager.insert_row(query.table, key, values)
         
         return {
             'status': 'success',
             'message': 'Row inserted',
             'rows_affected': 1,
-            'inserted_key': key
+            'inserted_key': key.hex()
+        }
+    
+    def _execute_insert_many(self, query: ParsedQuery) -> Dict[str, Any]:
+        """Execute a multi-row INSERT."""
+        batch = query.values_batch
+        
+        # Draw the random bytes for every key at once rather than per row
+        random_bytes = os.urandom(16 * len(batch))
+        items = [
+            (random_bytes[i * 16:(i + 1) * 16], dict(values))
+            for i, values in enumerate(batch)
+        ]
+        self.storage.put_many(query.table, items)
+        
+        # Update indexes once for the whole batch
+        self.index_manager.insert_rows(query.table, items)
+        
+        return {
+            'status': 'success',
+            'message': f'{len(items)} rows inserted',
+            'rows_affected': len(items),
+            'inserted_keys': [key.hex() for key, _ in items]
         }
     
     def _execute_select(self, query: ParsedQuery) -> Dict[str, Any]:
         """Execute SELECT."""
-        # Get candidate rows
-        if query.conditions:
-            # Try to use an index
-            index = self.index_manager.find_best_index(query.table, query.conditions)
-            if index:
-                # Use index
-                candidate_keys = index.lookup(**query.conditions)
+        conditions = query.conditions or {}
+        project = bool(query.columns) and query.columns != ['*']
+        
+        # Projection is fused into the scan kernel specialized for this query
+        # shape, which then only assembles the projected columns. Sorting
+        # needs the ORDER BY columns too, so any not projected are carried
+        # along and dropped after the sort. LIMIT is fused as well unless the
+        # rows must be sorted first.
+        fused = not query.order_by
+        projection = tuple(query.columns) if project else None
+        extra: Tuple[str, ...] = ()
+        if project and query.order_by:
+            extra = tuple(dict.fromkeys(col for col, _ in query.order_by if col not in projection))
+        
+        ordered = None
+        with self.lock.read_lock():
+            table = self.storage.table_view(query.table)
+            if table is None:
                 rows = []
-                for key in candidate_keys:
-                    row = self.storage.get(query.table, key)
-                    if row and self._matches_conditions(row, query.conditions):
-                        rows.append({**row, '_key': key})
             else:
-                # Full table scan
-                rows = []
-                for key, row in self.storage.scan(query.table):
-                    if self._matches_conditions(row, query.conditions):
-                        rows.append({**row, '_key': key})
-        else:
-            # No conditions, scan all
-            rows = [{**row, '_key': key} for key, row in self.storage.scan(query.table)]
+                slots, residual = self._candidate_slots(table, query.table, conditions)
+                if query.order_by and not residual:
+                    ordered = self._sorted_slots(table, slots, query.order_by, query.limit)
+                if ordered is not None:
+                    # Already in order and cut to the limit: assemble just those rows
+                    extra = ()
+                    kernel = select_rows((), projection, tuple(table.columns))
+                    rows = kernel(table, ordered, (), None)
+                else:
+                    kernel = select_rows(tuple(residual), projection and projection + extra,
+                                         tuple(table.columns))
+                    rows = kernel(table, slots, tuple(residual.values()), query.limit if fused else None)
         
+        # Sorting and projection work on the local list, outside the lock
         # Apply ORDER BY
-        if query.order_by:
-            for col, direction in reversed(query.order_by):
-                reverse = (direction == 'DESC')
-                rows.sort(key=lambda r: r.get(col, ''), reverse=reverse)
+        if query.order_by and ordered is None:
+            rows = self._sort_rows(rows, query.order_by, query.limit)
         
         # Apply LIMIT
         if query.limit is not None:
             rows = rows[:query.limit]
         
-        # Project columns
-        if query.columns and query.columns != ['*']:
-            projected_rows = []
+        # Drop the columns only carried along for sorting
+        if extra:
             for row in rows:
-                projected_row = {col: row.get(col) for col in query.columns if col in row}
-                projected_rows.append(projected_row)
-            rows = projected_rows
+                for col in extra:
+                    row.pop(col, None)
         
         return {
             'status': 'success',
@@ -155,24 +201,207 @@ class QueryExecutor:
             'row_count': len(rows)
         }
     
+    def execute_columnar(self, query: ParsedQuery) -> Dict[str, Any]:
+        """
+        Execute a SELECT, returning its result as a list of values per column.
+        
+        The matching slots are found and ordered without assembling any
+        row, then each output column is gathered from its column list in
+        one pass; rows lacking a column hold None. SELECT * returns every
+        column of the table and '_key'. ORDER BY on several columns falls
+        back to sorting rows.
+        """
+        if query.query_type != 'SELECT':
+            raise ValueError(f"Cannot return {query.query_type} results by column")
+        conditions = query.conditions or {}
+        project = bool(query.columns) and query.columns != ['*']
+        
+        with self.lock.read_lock():
+            table = self.storage.table_view(query.table)
+            if table is None:
+                return self._columnar_result({col: [] for col in query.columns} if project else {})
+            
+            # Without conditions, order or limit, whole columns are copied
+            slots: Optional[Sequence[int]] = None
+            if conditions:
+                slots, residual = self._candidate_slots(table, query.table, conditions)
+                slots = match_slots(tuple(residual))(table, slots, tuple(residual.values()))
+            elif query.order_by or query.limit is not None:
+                slots = range(len(table.keys))
+            if query.order_by:
+                slots = self._order_slots(table, slots, query.order_by, query.limit)
+            if slots is not None or not query.order_by:
+                if query.limit is not None:
+                    slots = slots[:query.limit]
+                names = list(query.columns) if project else [*table.columns, '_key']
+                return self._columnar_result({name: self._gather(table, name, slots) for name in names})
+        
+        rows = self._execute_select(query)['rows']
+        names = list(query.columns) if project else list(dict.fromkeys(col for row in rows for col in row))
+        return self._columnar_result({name: [row.get(name) for row in rows] for name in names})
+    
+    @staticmethod
+    def _columnar_result(columns: Dict[str, List[Any]]) -> Dict[str, Any]:
+        """Result of a columnar SELECT."""
+        return {
+            'status': 'success',
+            'columns': columns,
+            'row_count': len(next(iter(columns.values()), ()))
+        }
+    
+    @staticmethod
+    def _gather(table: Table, name: str, slots: Optional[Sequence[int]]) -> List[Any]:
+        """The values of a column (or '_key') at slots (None for all), None where missing."""
+        if name == '_key':
+            keys = table.keys if slots is None else map(table.keys.__getitem__, slots)
+            return [key.hex() if type(key) is bytes else key for key in keys]
+        values = table.columns.get(name)
+        if values is None:
+            return [None] * len(table.keys if slots is None else slots)
+        gathered = values.copy() if slots is None else list(map(values.__getitem__, slots))
+        # An identity test in C; `MISSING in gathered` would call back into
+        # MISSING.__eq__ for every value
+        if any(map(is_, gathered, repeat(MISSING))):
+            gathered = [None if value is MISSING else value for value in gathered]
+        return gathered
+    
+    def _order_slots(self, table: Table, slots: Sequence[int], order_by: List[Tuple[str, str]],
+                     limit: Optional[int]) -> Optional[List[int]]:
+        """Sort slots by a single ORDER BY column, or None if the rows must be sorted instead."""
+        ordered = self._sorted_slots(table, slots, order_by, limit)
+        if ordered is not None or len(order_by) != 1:
+            return ordered
+        values = table.columns.get(order_by[0][0])
+        if values is None:
+            return None
+        try:
+            return sorted(slots, key=values.__getitem__, reverse=order_by[0][1] == 'DESC')
+        except TypeError:
+            return None
+    
+    def _candidate_slots(self, table: Table, table_name: str,
+                         conditions: Dict[str, Any]) -> Tuple[Optional[List[int]], Dict[str, Any]]:
+        """
+        Get the slots a WHERE clause can match via an index, or None to scan
+        the whole table, along with the conditions left for the scan to check.
+        
+        The index resolves the conditions on its columns exactly, so only the
+        others need testing against the candidate rows.
+        """
+        if conditions:
+            index = self.index_manager.find_best_index(table_name, conditions)
+            if index:
+                slot_of = table.slots.get
+                slots = [slot for key in index.lookup_readonly(**conditions)
+                         if (slot := slot_of(key)) is not None]
+                residual = {col: value for col, value in conditions.items() if col not in index.columns}
+                return slots, residual
+        return None, conditions
+    
+    def _sorted_slots(self, table: Table, slots: Optional[List[int]],
+                      order_by: List[Tuple[str, str]], limit: Optional[int]) -> Optional[List[int]]:
+        """
+        Pick the first limit candidate slots (None for all) in the order of
+        a single ORDER BY column.
+        
+        The slot numbers are selected keyed by the column list's
+        __getitem__, so only the rows kept are ever assembled. Returns None
+        when the rows must be sorted instead: with no LIMIT below the
+        candidate count, where assembling rows in slot order and sorting
+        them is faster, for several sort columns, or for values that do not
+        compare, such as a column some rows lack.
+        """
+        if len(order_by) != 1 or limit is None:
+            return None
+        values = table.columns.get(order_by[0][0])
+        candidates = range(len(table.keys)) if slots is None else slots
+        if values is None or limit >= len(candidates):
+            return None
+        
+        select = heapq.nlargest if order_by[0][1] == 'DESC' else heapq.nsmallest
+        try:
+            return select(limit, candidates, key=values.__getitem__)
+        except TypeError:
+            return None
+    
+    def _sort_rows(self, rows: List[Dict[str, Any]], order_by: List[Tuple[str, str]],
+                   limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Sort rows by the ORDER BY columns with a single sort.
+        
+        With a LIMIT smaller than the result, only the first limit rows are
+        selected with a heap (O(n log k)) rather than sorting everything.
+        """
+        columns = [col for col, _ in order_by]
+        descending = [direction == 'DESC' for _, direction in order_by]
+        partial = limit is not None and limit < len(rows)
+        
+        if len(columns) == 1 or all(descending) or not any(descending):
+            # One direction for every column: a plain key does it
+            if len(columns) == 1:
+                col = columns[0]
+                key = lambda r: r.get(col, '')
+            else:
+                key = lambda r: tuple([r.get(col, '') for col in columns])
+            reverse = descending[0]
+            if partial:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return select(limit, rows, key=key)
+            rows.sort(key=key, reverse=reverse)
+            return rows
+        
+        # Mixed directions: negate the descending columns, which only works
+        # for numbers; otherwise fall back to one stable sort per column,
+        # last column first
+        keyed = []
+        try:
+            for r in rows:
+                keyed.append((tuple([-r.get(col, '') if desc else r.get(col, '')
+                                     for col, desc in zip(columns, descending)]), r))
+        except TypeError:
+            for col, desc in reversed(list(zip(columns, descending))):
+                rows.sort(key=lambda r: r.get(col, ''), reverse=desc)
+            return rows[:limit] if partial else rows
+        
+        if partial:
+            keyed = heapq.nsmallest(limit, keyed, key=itemgetter(0))
+        else:
+            keyed.sort(key=itemgetter(0))
+        return [r for _, r in keyed]
+    
     def _execute_update(self, query: ParsedQuery) -> Dict[str, Any]:
         """Execute UPDATE."""
-        rows_affected = 0
+        # Only indexes over a changed column need their entries moved; an
+        # UPDATE of unindexed columns is just the storage write, which sets
+        # the new values straight into the matched rows' column lists
+        indexes = self.index_manager.indexes_covering(query.table, query.values)
+        if not indexes:
+            keys = self._match_keys(query.table, query.conditions)
+            if keys:
+                self.storage.update_many(query.table, keys, query.values)
+            return {
+                'status': 'success',
+                'message': f'{len(keys)} rows updated',
+                'rows_affected': len(keys)
+            }
         
         # Find matching rows
-        for key, row in self.storage.scan(query.table):
-            if self._matches_conditions(row, query.conditions):
-                # Update indexes - remove old entry
-                self.index_manager.delete_row(query.table, key, row)
-                
-                # Update row
-                updated_row = {**row, **query.values}
-                self.storage.put(query.table, key, updated_row)
-                
-                # Update indexes - add new entry
-                self.index_manager.insert_row(query.table, key, updated_row)
-                
-                rows_affected += 1
+        old_items = self._scan_matching(query.table, query.conditions)
+        new_items = [(key, {**row, **query.values}) for key, row in old_items]
+        
+        # Update indexes - remove old entries
+        for index in indexes:
+            index.delete_many(old_items)
+        
+        # Update rows
+        if new_items:
+            self.storage.put_many(query.table, new_items)
+        
+        # Update indexes - add new entries
+        for index in indexes:
+            index.insert_many(new_items)
+        
+        rows_affected = len(new_items)
         
         return {
             'status': 'success',
@@ -182,19 +411,14 @@ class QueryExecutor:
     
     def _execute_delete(self, query: ParsedQuery) -> Dict[str, Any]:
         """Execute DELETE."""
-        rows_affected = 0
-        
         # Find matching rows
-        keys_to_delete = []
-        for key, row in self.storage.scan(query.table):
-            if self._matches_conditions(row, query.conditions):
-                keys_to_delete.append((key, row))
+        keys_to_delete = self._scan_matching(query.table, query.conditions)
         
         # Delete them
         for key, row in keys_to_delete:
             self.storage.delete(query.table, key)
-            self.index_manager.delete_row(query.table, key, row)
-            rows_affected += 1
+        self.index_manager.delete_rows(query.table, keys_to_delete)
+        rows_affected = len(keys_to_delete)
         
         return {
             'status': 'success',
@@ -202,9 +426,22 @@ class QueryExecutor:
             'rows_affected': rows_affected
         }
     
-    def _matches_conditions(self, row: Dict[str, Any], conditions: Dict[str, Any]) -> bool:
-        """Check if a row matches the WHERE conditions."""
-        for col, value in conditions.items():
-            if row.get(col) != value:
-                return False
-        return True
+    def _match_keys(self, table: str, conditions: Dict[str, Any]) -> List[Any]:
+        """Find the keys of the rows matching the WHERE conditions, without assembling the rows."""
+        data = self.storage.table_view(table)
+        if data is None:
+            return []
+        slots, residual = self._candidate_slots(data, table, conditions) if conditions else (None, {})
+        return match_keys(tuple(residual))(data, slots, tuple(residual.values()))
+    
+    def _scan_matching(self, table: str, conditions: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Find the (key, row) pairs matching the WHERE conditions, via an index if one fits."""
+        if not conditions:
+            return self.storage.scan(table)
+        # Called under the write lock; matches are collected before any
+        # row is changed, so the table's columns can be read in place
+        data = self.storage.table_view(table)
+        if data is None:
+            return []
+        slots, residual = self._candidate_slots(data, table, conditions)
+        return match_eq(tuple(residual))(data, slots, tuple(residual.values()))
@@ -1,12 +1,17 @@
 """Simplified Raft-based replication for consistency."""
 
+import heapq
+import itertools
+import logging
 import time
 import random
 import threading
 from enum import Enum
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from dataclasses import dataclass
 
+logger = logging.getLogger(__name__)
+
 
 class NodeState(Enum):
     """Raft node states."""
@@ -28,6 +33,68 @@ class LogEntry:
             self.timestamp = time.time()
 
 
+class RaftScheduler:
+    """Single thread running named timers from a heap of deadlines."""
+    
+    def __init__(self):
+        # (deadline, seq, name, callback); only the entry whose seq matches
+        # _live[name] fires, rescheduled or cancelled ones are skipped
+        self._heap: List[Tuple[float, int, str, Callable[[], None]]] = []
+        self._live: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition(threading.Lock())
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def schedule(self, name: str, delay: float, callback: Callable[[], None]):
+        """Run callback after delay seconds, replacing any pending timer with this name."""
+        with self._cond:
+            seq = next(self._seq)
+            self._live[name] = seq
+            heapq.heappush(self._heap, (time.monotonic() + delay, seq, name, callback))
+            self._cond.notify()
+    
+    def cancel(self, name: str):
+        """Cancel the pending timer with this name, if any."""
+        with self._cond:
+            self._live.pop(name, None)
+    
+    def shutdown(self):
+        """Stop the scheduler thread; pending timers never fire."""
+        with self._cond:
+            self._running = False
+            self._live.clear()
+            self._cond.notify()
+    
+    def _run(self):
+        """Sleep until the earliest deadline and fire the timers that are due."""
+        while True:
+            due = []
+            with self._cond:
+                while self._running and not due:
+                    heap = self._heap
+                    now = time.monotonic()
+                    while heap and heap[0][0] <= now:
+                        _, seq, name, callback = heapq.heappop(heap)
+                        if self._live.get(name) == seq:
+                            del self._live[name]
+                            due.append(callback)
+                    if not due:
+                        self._cond.wait(timeout=heap[0][0] - now if heap else None)
+                if not self._running:
+                    return
+            
+            # Callbacks take the Raft lock, so run them without holding ours.
+            # This is the only timer thread: a failing callback is logged and
+            # the loop goes on, or every later election and heartbeat is lost.
+            for callback in due:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"Raft timer callback {callback!r} failed: {e}", exc_info=True)
+
+
 class RaftNode:
     """Simplified Raft consensus implementation."""
     
@@ -60,11 +127,22 @@ class RaftNode:
         
         # Threading
         self.lock = threading.RLock()
-        self.election_timer: Optional[threading.Timer] = None
-        self.heartbeat_timer: Optional[threading.Timer] = None
+        # Held while applying committed entries, which happens outside lock
+        # so that is_leader() and heartbeats never wait on a write; it keeps
+        # entries applied once each and in log order
+        self._apply_lock = threading.Lock()
+        # Set while this node is the leader, for wait_for_leader
+        self._leader_event = threading.Event()
+        # Election and heartbeat timers share one scheduler thread
+        self.scheduler = RaftScheduler()
         self.last_heartbeat = time.time()
         
-        self._reset_election_timer()
+        if len(all_nodes) == 1:
+            # No other node can win or split the vote, so a lone node
+            # elects itself straight away
+            self.scheduler.schedule('election', 0, self._on_election_timeout)
+        else:
+            self._reset_election_timer()
     
     def set_apply_callback(self, callback: Callable[[Dict[str, Any]], None]):
         """Set callback for applying committed entries."""
@@ -85,29 +163,36 @@ class RaftNode:
             
             # In a real implementation, would replicate to followers
             # For simplicity, we'll auto-commit after majority  
-            self._try_commit()
-            
-            return True
+            self._try_commit_locked()
+        
+        # Applied before returning, so the write is visible once it returns
+        self._apply_committed_entries()
+        return True
     
-    def _try_commit(self):
-        """Try to commit entries."""
-        with self.lock:
-            if self.state == NodeState.LEADER:
-                # Simplified: immediately commit as we're the only node
-                # In real Raft, would wait for majority replication
-                if len(self.log) > self.commit_index:
-                    self.commit_index = len(self.log)
-                    self._apply_committed_entries()
+    def _try_commit_locked(self):
+        """Try to commit entries. Caller holds the lock."""
+        if self.state == NodeState.LEADER:
+            # Simplified: immediately commit as we're the only node
+            # In real Raft, would wait for majority replication
+            if len(self.log) > self.commit_index:
+                self.commit_index = len(self.log)
     
     def _apply_committed_entries(self):
-        """Apply committed but not yet applied entries."""
-        with self.lock:
-            while self.last_applied < self.commit_index:
-                self.last_applied += 1
-                if self.last_applied <= len(self.log):
-                    entry = self.log[self.last_applied - 1]
-                    if self.apply_callback:
-                        self.apply_callback(entry.command)
+        """Apply committed but not yet applied entries. Caller must not hold the lock."""
+        with self._apply_lock:
+            # Copy the committed slice, then run the callbacks (and the
+            # WAL syncs they wait on) without the Raft lock
+            with self.lock:
+                start, end = self.last_applied, self.commit_index
+                entries = self.log[start:end]
+            if not entries:
+                return
+            
+            callback = self.apply_callback
+            for index, entry in enumerate(entries, start + 1):
+                self.last_applied = index
+                if callback:
+                    callback(entry.command)
     
     def request_vote(self, candidate_term: int, candidate_id: str, 
                     last_log_index: int, last_log_term: int) -> bool:
@@ -118,6 +203,7 @@ class RaftNode:
                 self.current_term = candidate_term
                 self.voted_for = None
                 self.state = NodeState.FOLLOWER
+                self._leader_event.clear()
             
             # Vote if we haven't voted or voted for this candidate
             if candidate_term == self.current_term:
@@ -138,12 +224,22 @@ class RaftNode:
                       prev_log_index: int, prev_log_term: int,
                       entries: List[LogEntry], leader_commit: int) -> bool:
         """Handle AppendEntries RPC (heartbeat)."""
+        # Fast path for the common heartbeat from the current leader with
+        # nothing new to commit: no state changes beyond the heartbeat time
+        # and election timer, so skip the lock. The reads and the float
+        # store are each atomic; anything else takes the locked path.
+        if leader_term == self.current_term and leader_commit <= self.commit_index:
+            self.last_heartbeat = time.time()
+            self._reset_election_timer()
+            return True
+        
         with self.lock:
             # Update term if necessary
             if leader_term > self.current_term:
                 self.current_term = leader_term
                 self.voted_for = None
                 self.state = NodeState.FOLLOWER
+                self._leader_event.clear()
             
             # Reject if term is old
             if leader_term < self.current_term:
@@ -157,14 +253,15 @@ class RaftNode:
             # For simplicity, just update commit index
             if leader_commit > self.commit_index:
                 self.commit_index = min(leader_commit, len(self.log))
-                self._apply_committed_entries()
-            
-            return True
+        
+        self._apply_committed_entries()
+        return True
     
     def _start_election(self):
         """Start a new election."""
         with self.lock:
             self.state = NodeState.CANDIDATE
+            self._leader_event.clear()
             self.current_term += 1
             self.voted_for = self.node_id
             
@@ -180,6 +277,7 @@ class RaftNode:
         """Become the leader."""
         with self.lock:
             self.state = NodeState.LEADER
+            self._leader_event.set()
             
             # Initialize leader state
             for node in self.all_nodes:
@@ -196,22 +294,12 @@ class RaftNode:
             if self.state == NodeState.LEADER:
                 # In real implementation, would send AppendEntries to all followers
                 # Schedule next heartbeat
-                self.heartbeat_timer = threading.Timer(
-                    self.heartbeat_interval, 
-                    self._send_heartbeat
-                )
-                self.heartbeat_timer.daemon = True
-                self.heartbeat_timer.start()
+                self.scheduler.schedule('heartbeat', self.heartbeat_interval, self._send_heartbeat)
     
     def _reset_election_timer(self):
         """Reset the election timeout timer."""
-        if self.election_timer:
-            self.election_timer.cancel()
-        
         timeout = random.uniform(self.election_timeout_min, self.election_timeout_max)
-        self.election_timer = threading.Timer(timeout, self._on_election_timeout)
-        self.election_timer.daemon = True
-        self.election_timer.start()
+        self.scheduler.schedule('election', timeout, self._on_election_timeout)
     
     def _on_election_timeout(self):
         """Called when election timeout expires."""
@@ -224,6 +312,10 @@ class RaftNode:
         with self.lock:
             return self.state == NodeState.LEADER
     
+    def wait_for_leader(self, timeout: Optional[float] = None) -> bool:
+        """Block until this node is the leader, or timeout seconds pass; return whether it is."""
+        return self._leader_event.wait(timeout)
+    
     def get_leader_id(self) -> Optional[str]:
         """Get the current leader ID."""
         with self.lock:
@@ -235,10 +327,7 @@ class RaftNode:
     def shutdown(self):
         """Shutdown the Raft node."""
         with self.lock:
-            if self.election_timer:
-                self.election_timer.cancel()
-            if self.heartbeat_timer:
-                self.heartbeat_timer.cancel()
+            self.scheduler.shutdown()
 
 
 class ReplicationManager:
@@ -262,11 +351,21 @@ class ReplicationManager:
     
     def replicate_write(self, operation: Dict[str, Any]) -> bool:
         """Replicate a write operation."""
-        with self.lock:
-            if not self.raft.is_leader():
-                return False
-            
-            return self.raft.append_entry(operation)
+        # append_entry rejects the write itself when not the leader, and
+        # orders concurrent writes under the Raft lock
+        return self.raft.append_entry(operation)
+    
+    def replicate_batch(self, operations: List[Dict[str, Any]]) -> bool:
+        """
+        Replicate several write operations as a single log entry.
+        
+        The entry is committed and applied once, as a 'batch' command
+        holding the operations in order, so the whole batch costs one log
+        append and one apply callback.
+        """
+        if len(operations) == 1:
+            return self.replicate_write(operations[0])
+        return self.replicate_write({'type': 'batch', 'operations': operations})
     
     def set_apply_callback(self, callback: Callable):
         """Set callback for when entries are committed."""
@@ -276,6 +375,10 @@ class ReplicationManager:
         """Check if this node is the leader."""
         return self.raft.is_leader()
     
+    def wait_for_leader(self, timeout: Optional[float] = None) -> bool:
+        """Block until this node is the leader, or timeout seconds pass; return whether it is."""
+        return self.raft.wait_for_leader(timeout)
+    
     def shutdown(self):
         """Shutdown replication."""
         self.raft.shutdown()
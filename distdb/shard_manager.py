@@ -1,8 +1,10 @@
 """Shard manager for data distribution using consistent hashing."""
 
 import bisect
+import itertools
 import threading
-from typing import List, Dict, Set, Optional
+from functools import lru_cache
+from typing import List, Dict, Set, Optional, Tuple
 from .utils import VirtualNode, hash_key
 
 
@@ -11,10 +13,39 @@ class ConsistentHashRing:
     
     def __init__(self, num_virtual_nodes: int = 150):
         self.num_virtual_nodes = num_virtual_nodes
-        self.ring: List[VirtualNode] = []
+        # Every node gets a small dense index, so replica walks can track the
+        # nodes they have seen in an int bitmask. Index 0 is the tombstone.
+        self._node_idx: Dict[str, int] = {}
+        self._node_list: List[Optional[str]] = [None]
+        # The ring as parallel lists sorted by virtual node hash: lookups
+        # bisect the plain ints in _hashes and read the owner's index from
+        # _slots. Removed nodes leave tombstones in _slots until more than a
+        # quarter of the ring is dead, when it is compacted.
+        self._hashes: List[int] = []
+        self._slots: List[int] = []
+        self._tombstones = 0
+        # node_id -> its positions in the ring lists
+        self._positions: Dict[str, List[int]] = {}
         self.nodes: Set[str] = set()
+        # Bumped on every membership change, so callers can cache lookups
+        self.version = 0
         self.lock = threading.RLock()
     
+    def _rebuild(self, entries: List[Tuple[int, int]]):
+        """Reset the ring to the given live (hash, node index) entries. Caller holds the lock."""
+        entries.sort()
+        self._hashes = [hash_value for hash_value, _ in entries]
+        self._slots = [slot for _, slot in entries]
+        self._tombstones = 0
+        self._positions = {}
+        node_list = self._node_list
+        for pos, slot in enumerate(self._slots):
+            self._positions.setdefault(node_list[slot], []).append(pos)
+    
+    def _live_entries(self) -> List[Tuple[int, int]]:
+        """(hash, node index) pairs of the ring without tombstones. Caller holds the lock."""
+        return [(hash_value, slot) for hash_value, slot in zip(self._hashes, self._slots) if slot]
+    
     def add_node(self, node_id: str):
         """Add a node to the ring."""
         with self.lock:
@@ -22,11 +53,18 @@ class ConsistentHashRing:
                 return
             
             self.nodes.add(node_id)
+            self.version += 1
             
-            # Add virtual nodes
-            for i in range(self.num_virtual_nodes):
-                vnode = VirtualNode(node_id, i)
-                bisect.insort(self.ring, vnode)
+            slot = self._node_idx.get(node_id)
+            if slot is None:
+                slot = self._node_idx[node_id] = len(self._node_list)
+                self._node_list.append(node_id)
+            
+            # Add virtual nodes, merging them into the ring with one sort
+            entries = self._live_entries()
+            position = VirtualNode.position
+            entries.extend((position(node_id, i), slot) for i in range(self.num_virtual_nodes))
+            self._rebuild(entries)
     
     def remove_node(self, node_id: str):
         """Remove a node from the ring."""
@@ -35,48 +73,65 @@ class ConsistentHashRing:
                 return
             
             self.nodes.discard(node_id)
+            self.version += 1
+            
+            # Tombstone its virtual nodes in place. The node keeps its index,
+            # which is reused if it rejoins.
+            slots = self._slots
+            positions = self._positions.pop(node_id, [])
+            for pos in positions:
+                slots[pos] = 0
+            self._tombstones += len(positions)
             
-            # Remove virtual nodes
-            self.ring = [vn for vn in self.ring if vn.node_id != node_id]
+            if self._tombstones * 4 > len(slots):
+                self._rebuild(self._live_entries())
     
     def get_node(self, key: str) -> Optional[str]:
         """Get the node responsible for a key."""
         with self.lock:
-            if not self.ring:
+            slots = self._slots
+            if not slots:
                 return None
             
-            key_hash = hash_key(key)
+            # Binary search for the first virtual node > key_hash, then skip
+            # over tombstones (the ring always has live entries if non-empty)
+            idx = bisect.bisect_right(self._hashes, hash_key(key))
             
-            # Binary search for the first virtual node >= key_hash
-            idx = bisect.bisect_right(self.ring, type('obj', (object,), {'hash_value': key_hash})())
-            
-            if idx == len(self.ring):
-                idx = 0
-            
-            return self.ring[idx].node_id
+            size = len(slots)
+            slot = slots[idx % size]
+            while not slot:
+                idx += 1
+                slot = slots[idx % size]
+            return self._node_list[slot]
     
     def get_nodes_for_replication(self, key: str, replication_factor: int) -> List[str]:
         """Get multiple nodes for replication."""
         with self.lock:
-            if not self.ring:
+            slots = self._slots
+            if not slots:
                 return []
             
-            key_hash = hash_key(key)
-            idx = bisect.bisect_right(self.ring, type('obj', (object,), {'hash_value': key_hash})())
+            idx = bisect.bisect_right(self._hashes, hash_key(key))
             
-            if idx == len(self.ring):
-                idx = 0
+            node_list = self._node_list
+            nodes: List[str] = []
+            append = nodes.append
+            # Bitmask of node indexes seen so far; tombstones (bit 0) count
+            # as already seen
+            seen = 1
+            # There are only so many distinct nodes to find: stopping once all
+            # of them are found saves walking the whole ring when the cluster
+            # is smaller than the replication factor
+            wanted = min(replication_factor, len(self.nodes))
+            if wanted <= 0:
+                return nodes
             
-            nodes = []
-            seen = set()
-            
-            # Walk the ring to find unique nodes
-            for i in range(len(self.ring)):
-                vnode = self.ring[(idx + i) % len(self.ring)]
-                if vnode.node_id not in seen:
-                    nodes.append(vnode.node_id)
-                    seen.add(vnode.node_id)
-                    if len(nodes) >= replication_factor:
+            # Walk the ring from idx, wrapping around, to find unique nodes
+            for slot in itertools.chain(itertools.islice(slots, idx, None), slots):
+                if not (seen >> slot) & 1:
+                    append(node_list[slot])
+                    seen |= 1 << slot
+                    if len(nodes) == wanted:
                         break
             
             return nodes
@@ -96,6 +151,9 @@ class ShardManager:
         self.hash_ring = ConsistentHashRing()
         self.lock = threading.RLock()
         
+        # (key, ring version) -> replica nodes; stale versions age out
+        self._replicas = lru_cache(maxsize=8192)(self._compute_replicas)
+        
         # Add self to ring
         self.hash_ring.add_node(node_id)
     
@@ -109,27 +167,31 @@ class ShardManager:
         with self.lock:
             self.hash_ring.remove_node(node_id)
     
+    def _compute_replicas(self, key: str, version: int) -> Tuple[str, ...]:
+        """Walk the ring for a key's replicas; version only keys the cache."""
+        return tuple(self.hash_ring.get_nodes_for_replication(key, self.replication_factor))
+    
+    def _cached_replicas(self, key: str) -> Tuple[str, ...]:
+        """Get a key's replicas, primary first, from the per-version cache."""
+        with self.lock:
+            return self._replicas(key, self.hash_ring.version)
+    
     def get_primary_node(self, key: str) -> str:
         """Get the primary node for a key."""
-        with self.lock:
-            node = self.hash_ring.get_node(key)
-            return node if node else self.node_id
+        replicas = self._cached_replicas(key)
+        return replicas[0] if replicas else self.node_id
     
     def get_replica_nodes(self, key: str) -> List[str]:
         """Get all replica nodes for a key (including primary)."""
-        with self.lock:
-            return self.hash_ring.get_nodes_for_replication(key, self.replication_factor)
+        return list(self._cached_replicas(key))
     
     def is_responsible_for(self, key: str) -> bool:
         """Check if this node is responsible for a key."""
-        with self.lock:
-            replicas = self.get_replica_nodes(key)
-            return self.node_id in replicas
+        return self.node_id in self._cached_replicas(key)
     
     def is_primary_for(self, key: str) -> bool:
         """Check if this node is the primary for a key."""
-        with self.lock:
-            return self.get_primary_node(key) == self.node_id
+        return self.get_primary_node(key) == self.node_id
     
     def get_all_nodes(self) -> List[str]:
         """Get all nodes in the cluster."""
@@ -1,10 +1,69 @@
 """SQL parser for converting SQL to internal query representation."""
 
 import re
+import copy
+import threading
+from collections import OrderedDict
+from sys import intern
 import sqlparse
 from sqlparse.sql import IdentifierList, Identifier, Where, Token
 from sqlparse.tokens import Keyword, DML
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+
+class Parameter:
+    """Placeholder for a ``?`` parameter in a prepared statement."""
+    
+    def __repr__(self):
+        return "?"
+
+
+# Single shared placeholder; parameters are bound positionally in the order
+# they appear in the statement.
+PARAMETER = Parameter()
+
+
+# Literal values in a statement; LIMIT counts are matched separately so
+# they are left in place, as they are not bindable parameters
+_LITERAL_RE = re.compile(
+    r"""(LIMIT\s+\d+)|('(?:[^']|'')*'|"(?:[^"]|"")*"|(?<![\w.])-?\d+(?:\.\d+)?(?![\w.]))""",
+    re.IGNORECASE
+)
+
+# Leading keywords, which determine the statement type
+_HEAD_RE = re.compile(r'\s*(\w+)(?:\s+(\w+))?')
+
+# Clauses of the statements parsed from their text alone
+_INSERT_TABLE_RE = re.compile(r'INSERT\s+INTO\s+(\w+)', re.IGNORECASE)
+_INSERT_VALUES_RE = re.compile(r'\(([^)]+)\)\s+VALUES\s+(\(.+\))', re.IGNORECASE | re.DOTALL)
+_VALUES_ROW_RE = re.compile(r'\(([^)]+)\)')
+_UPDATE_TABLE_RE = re.compile(r'UPDATE\s+(\w+)', re.IGNORECASE)
+_UPDATE_SET_RE = re.compile(r'SET\s+(.+?)(?:WHERE|$)', re.IGNORECASE)
+_WHERE_RE = re.compile(r'\bWHERE\s+(.+)$', re.IGNORECASE | re.DOTALL)
+_DELETE_RE = re.compile(r'DELETE\s+FROM\s+(\w+)(?:\s+WHERE\s+(.+))?$', re.IGNORECASE | re.DOTALL)
+_CREATE_TABLE_RE = re.compile(r'CREATE\s+TABLE\s+(\w+)\s*\(([^)]+)\)', re.IGNORECASE)
+_DROP_TABLE_RE = re.compile(r'DROP\s+TABLE\s+(\w+)', re.IGNORECASE)
+_CREATE_INDEX_RE = re.compile(r'CREATE\s+INDEX\s+(\w+)\s+ON\s+(\w+)\s*\(([^)]+)\)', re.IGNORECASE)
+_DROP_INDEX_RE = re.compile(r'DROP\s+INDEX\s+(\w+)(?:\s+ON\s+(\w+))?', re.IGNORECASE)
+
+# SELECTs of plain columns with optional WHERE, ORDER BY and LIMIT clauses,
+# which cover nearly every SELECT issued and are parsed without sqlparse
+_SELECT_RE = re.compile(
+    r'\s*SELECT\s+(\*|\w+(?:\s*,\s*\w+)*)\s+FROM\s+(\w+)'
+    r'(?:\s+WHERE\s+(.+?))?(?:\s+ORDER\s+BY\s+(.+?))?(?:\s+LIMIT\s+(\d+))?\s*;?\s*$',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Conjunctions and equality tests within a WHERE clause
+_WHERE_AND_RE = re.compile(r'\s+AND\s+', re.IGNORECASE)
+_WHERE_EQ_RE = re.compile(r'(\w+)\s*=\s*(.+)')
+
+# First characters of a numeric literal
+_NUMBER_START = frozenset('0123456789+-.')
+
+# Statements whose literals all become bound values, so their parse can be
+# shared by every statement of the same shape
+_TEMPLATE_TYPES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
 
 
 class ParsedQuery:
@@ -16,12 +75,56 @@ class ParsedQuery:
         self.columns: List[str] = []
         self.conditions: Dict[str, Any] = {}
         self.values: Dict[str, Any] = {}
+        self.values_batch: Optional[List[Dict[str, Any]]] = None  # Multi-row INSERT
         self.schema: Dict[str, str] = {}
         self.order_by: List[Tuple[str, str]] = []  # [(column, direction)]
         self.limit: Optional[int] = None
         self.index_name: Optional[str] = None
         self.index_columns: List[str] = []
         self.index_type: str = 'btree'
+        self.sql: Optional[str] = None  # Source SQL text
+    
+    @property
+    def param_count(self) -> int:
+        """Number of ``?`` placeholders in the query."""
+        count = (sum(1 for v in self.values.values() if v is PARAMETER) +
+                 sum(1 for v in self.conditions.values() if v is PARAMETER))
+        if self.values_batch:
+            count += sum(1 for row in self.values_batch for v in row.values() if v is PARAMETER)
+        return count
+    
+    def bind(self, params: Sequence[Any]) -> 'ParsedQuery':
+        """Return a copy of the query with placeholders replaced by params."""
+        if len(params) != self.param_count:
+            raise ValueError(f"Expected {self.param_count} parameters, got {len(params)}")
+        
+        it = iter(params)
+        bound = copy.copy(self)
+        bound.values = {col: next(it) if val is PARAMETER else val
+                        for col, val in self.values.items()}
+        bound.conditions = {col: next(it) if val is PARAMETER else val
+                            for col, val in self.conditions.items()}
+        if self.values_batch:
+            bound.values_batch = [{col: next(it) if val is PARAMETER else val
+                                   for col, val in row.items()}
+                                  for row in self.values_batch]
+        return bound
+    
+    def copy(self) -> 'ParsedQuery':
+        """Return a copy of the query with its own values and conditions."""
+        clone = copy.copy(self)
+        clone.values = dict(self.values)
+        clone.conditions = dict(self.conditions)
+        if self.values_batch:
+            clone.values_batch = [dict(row) for row in self.values_batch]
+        return clone
+    
+    def __copy__(self) -> 'ParsedQuery':
+        # Shallow copy straight through __dict__, skipping copy.copy's
+        # generic __reduce_ex__ round trip
+        clone = ParsedQuery.__new__(ParsedQuery)
+        clone.__dict__.update(self.__dict__)
+        return clone
     
     def __repr__(self):
         return f"ParsedQuery(type={self.query_type}, table={self.table})"
@@ -30,196 +133,255 @@ class ParsedQuery:
 class SQLParser:
     """Parse SQL queries into internal representation."""
     
+    def __init__(self, template_cache_size: int = 1024):
+        # Parsed templates (LRU) keyed by statement shape: the SQL with its
+        # literals replaced by ? placeholders
+        self._templates: 'OrderedDict[str, ParsedQuery]' = OrderedDict()
+        self._template_cache_size = template_cache_size
+        # Bound parses (LRU) keyed by the exact SQL text, so a repeated
+        # statement skips literal extraction too; both guarded by one lock
+        self._statements: 'OrderedDict[str, ParsedQuery]' = OrderedDict()
+        self._templates_lock = threading.Lock()
+    
     def parse(self, sql: str) -> ParsedQuery:
-        """Parse SQL string into ParsedQuery."""
-        # Parse the SQL
-        statements = sqlparse.parse(sql)
-        if not statements:
-            raise ValueError("No SQL statement found")
+        """
+        Parse SQL string into ParsedQuery.
+        
+        DML statements differing only in their literal values share one
+        parse: the statement is parsed once with its literals replaced by
+        placeholders, and the template is bound to each statement's values.
+        Repeats of the same statement text are served from a cache of bound
+        parses; each call still returns its own copy.
+        """
+        if '?' in sql or sql.lstrip()[:6].upper() not in _TEMPLATE_TYPES:
+            return self._parse(sql)
+        
+        with self._templates_lock:
+            query = self._statements.get(sql)
+            if query is not None:
+                self._statements.move_to_end(sql)
+        if query is not None:
+            return query.copy()
+        
+        literals: List[str] = []
         
-        statement = statements[0]
+        def extract(match: 're.Match') -> str:
+            if match.group(1):
+                return match.group(1)
+            literals.append(match.group(2))
+            return '?'
         
-        # Determine query type
-        query_type = self._get_query_type(statement)
+        shape = _LITERAL_RE.sub(extract, sql)
+        template = self.prepare(shape)
+        
+        # Literals the parse did not turn into values (repeated columns,
+        # surplus values) would bind out of place; parse such SQL as is
+        if template.param_count != len(literals):
+            return self._parse(sql)
+        
+        query = template.bind([self._parse_value(literal) for literal in literals])
+        query.sql = sql
+        with self._templates_lock:
+            self._statements[sql] = query
+            if len(self._statements) > self._template_cache_size:
+                self._statements.popitem(last=False)
+        return query.copy()
+    
+    def prepare(self, sql: str) -> ParsedQuery:
+        """
+        Parse a statement with ``?`` placeholders once, for repeated execution.
+        
+        Prepared statements share the template cache with the statement
+        shapes parse() derives, so preparing the same SQL again returns the
+        same ParsedQuery. It must not be modified: execute it through
+        bind(), which returns a bound copy.
+        """
+        with self._templates_lock:
+            template = self._templates.get(sql)
+            if template is not None:
+                self._templates.move_to_end(sql)
+                return template
+        
+        template = self._parse(sql)
+        with self._templates_lock:
+            self._templates[sql] = template
+            if len(self._templates) > self._template_cache_size:
+                self._templates.popitem(last=False)
+        return template
+    
+    def _parse(self, sql: str) -> ParsedQuery:
+        """Parse SQL string into ParsedQuery, without the template cache."""
+        query_type = self._get_query_type(sql)
         query = ParsedQuery(query_type)
+        query.sql = sql
         
-        # Route to appropriate parser
+        # Only SELECTs the regex cannot take apart need sqlparse's token
+        # tree; every other statement is handled by a regex over the text
         if query_type == 'SELECT':
-            self._parse_select(statement, query)
-        elif query_type == 'INSERT':
-            self._parse_insert(statement, query)
+            match = _SELECT_RE.match(sql)
+            if match:
+                self._parse_simple_select(match, query)
+                return query
+            statements = sqlparse.parse(sql)
+            if not statements:
+                raise ValueError("No SQL statement found")
+            self._parse_select(statements[0], query)
+            return query
+        
+        sql = sql.strip().rstrip(';').rstrip()
+        if query_type == 'INSERT':
+            self._parse_insert(sql, query)
         elif query_type == 'UPDATE':
-            self._parse_update(statement, query)
+            self._parse_update(sql, query)
         elif query_type == 'DELETE':
-            self._parse_delete(statement, query)
+            self._parse_delete(sql, query)
         elif query_type == 'CREATE_TABLE':
-            self._parse_create_table(statement, query)
+            self._parse_create_table(sql, query)
         elif query_type == 'DROP_TABLE':
-            self._parse_drop_table(statement, query)
+            self._parse_drop_table(sql, query)
         elif query_type == 'CREATE_INDEX':
-            self._parse_create_index(statement, query)
+            self._parse_create_index(sql, query)
         elif query_type == 'DROP_INDEX':
-            self._parse_drop_index(statement, query)
+            self._parse_drop_index(sql, query)
         else:
             raise ValueError(f"Unsupported query type: {query_type}")
         
         return query
     
-    def _get_query_type(self, statement) -> str:
-        """Determine the type of SQL statement."""
-        first_token = statement.token_first(skip_ws=True, skip_cm=True)
-        if first_token:
-            value = first_token.value.upper()
-            if value == 'SELECT':
-                return 'SELECT'
-            elif value == 'INSERT':
-                return 'INSERT'
-            elif value == 'UPDATE':
-                return 'UPDATE'
-            elif value == 'DELETE':
-                return 'DELETE'
-            elif value == 'CREATE':
-                # Check if CREATE TABLE or CREATE INDEX
-                tokens = [t for t in statement.tokens if not t.is_whitespace]
-                if len(tokens) > 1:
-                    second = tokens[1].value.upper()
-                    if second == 'TABLE':
-                        return 'CREATE_TABLE'
-                    elif second == 'INDEX':
-                        return 'CREATE_INDEX'
-            elif value == 'DROP':
-                tokens = [t for t in statement.tokens if not t.is_whitespace]
-                if len(tokens) > 1:
-                    second = tokens[1].value.upper()
-                    if second == 'TABLE':
-                        return 'DROP_TABLE'
-                    elif second == 'INDEX':
-                        return 'DROP_INDEX'
+    def _get_query_type(self, sql: str) -> str:
+        """Determine the type of SQL statement from its leading keywords."""
+        match = _HEAD_RE.match(sql)
+        if not match:
+            raise ValueError("No SQL statement found")
+        first = match.group(1).upper()
+        if first in ('SELECT', 'INSERT', 'UPDATE', 'DELETE'):
+            return first
+        if first in ('CREATE', 'DROP'):
+            # CREATE/DROP TABLE or CREATE/DROP INDEX
+            second = (match.group(2) or '').upper()
+            if second in ('TABLE', 'INDEX'):
+                return f"{first}_{second}"
         raise ValueError("Unknown query type")
     
     def _parse_select(self, statement, query: ParsedQuery):
         """Parse SELECT statement."""
+        # Token values hold their full text, so they are read instead of
+        # str(token), which joins a group's children again on every call
         tokens = [t for t in statement.tokens if not t.is_whitespace]
+        n = len(tokens)
         
         i = 1  # Skip SELECT
         
         # Parse columns
-        if i < len(tokens):
-            if isinstance(tokens[i], IdentifierList):
-                query.columns = [str(ident).strip() for ident in tokens[i].get_identifiers()]
-            elif isinstance(tokens[i], Identifier):
-                query.columns = [str(tokens[i]).strip()]
-            elif tokens[i].ttype is None and str(tokens[i]).strip() == '*':
+        if i < n:
+            tok = tokens[i]
+            if isinstance(tok, IdentifierList):
+                query.columns = [intern(ident.value.strip()) for ident in tok.get_identifiers()]
+            elif isinstance(tok, Identifier):
+                query.columns = [intern(tok.value.strip())]
+            elif tok.value.strip() == '*':
                 query.columns = ['*']
             i += 1
         
         # Parse FROM
-        while i < len(tokens):
-            if tokens[i].ttype is Keyword and tokens[i].value.upper() == 'FROM':
-                i += 1
-                if i < len(tokens):
-                    query.table = str(tokens[i]).strip()
+        while i < n:
+            tok = tokens[i]
+            i += 1
+            if tok.ttype is Keyword and tok.normalized == 'FROM':
+                if i < n:
+                    query.table = intern(tokens[i].value.strip())
                     i += 1
                 break
-            i += 1
         
         # Parse WHERE
-        while i < len(tokens):
-            if isinstance(tokens[i], Where):
-                query.conditions = self._parse_where(tokens[i])
-                i += 1
-            elif tokens[i].ttype is Keyword:
-                keyword = tokens[i].value.upper()
-                if keyword == 'ORDER':
-                    # Parse ORDER BY
+        while i < n:
+            tok = tokens[i]
+            i += 1
+            if isinstance(tok, Where):
+                query.conditions = self._parse_where(tok)
+            elif tok.ttype is Keyword:
+                # Newer sqlparse lexes ORDER BY as a single keyword
+                keyword = tok.normalized
+                if keyword == 'ORDER' and i < n and tokens[i].normalized == 'BY':
+                    keyword = 'ORDER BY'
                     i += 1
-                    if i < len(tokens) and tokens[i].value.upper() == 'BY':
+                if keyword == 'ORDER BY':
+                    if i < n:
+                        query.order_by = self._parse_order_by(tokens[i].value.strip())
                         i += 1
-                        if i < len(tokens):
-                            order_str = str(tokens[i]).strip()
-                            query.order_by = self._parse_order_by(order_str)
-                            i += 1
                 elif keyword == 'LIMIT':
-                    i += 1
-                    if i < len(tokens):
-                        query.limit = int(str(tokens[i]).strip())
+                    if i < n:
+                        query.limit = int(tokens[i].value.strip())
                         i += 1
-                else:
-                    i += 1
-            else:
-                i += 1
     
-    def _parse_insert(self, statement, query: ParsedQuery):
+    def _parse_simple_select(self, match: 're.Match', query: ParsedQuery):
+        """Fill in a SELECT from a match of _SELECT_RE."""
+        columns, table, where, order_by, limit = match.groups()
+        query.columns = ['*'] if columns == '*' else [intern(c.strip()) for c in columns.split(',')]
+        query.table = intern(table)
+        if where:
+            query.conditions = self._parse_conditions(where)
+        if order_by:
+            query.order_by = self._parse_order_by(order_by)
+        if limit:
+            query.limit = int(limit)
+    
+    def _parse_insert(self, sql: str, query: ParsedQuery):
         """Parse INSERT statement."""
-        # Simple regex-based parsing for INSERT
-        sql = str(statement).strip()
-        
         # Extract table name
-        match = re.search(r'INSERT\s+INTO\s+(\w+)', sql, re.IGNORECASE)
+        match = _INSERT_TABLE_RE.search(sql)
         if match:
-            query.table = match.group(1)
+            query.table = intern(match.group(1))
         
-        # Extract columns and values
-        columns_match = re.search(r'\(([^)]+)\)\s+VALUES\s+\(([^)]+)\)', sql, re.IGNORECASE)
+        # Extract columns and values, one parenthesized group per row
+        columns_match = _INSERT_VALUES_RE.search(sql)
         if columns_match:
-            columns = [c.strip() for c in columns_match.group(1).split(',')]
-            values_str = [v.strip().strip("'\"") for v in columns_match.group(2).split(',')]
+            columns = [intern(c.strip()) for c in columns_match.group(1).split(',')]
+            
+            rows = []
+            for values_str in _VALUES_ROW_RE.findall(columns_match.group(2)):
+                row = {}
+                for col, val in zip(columns, values_str.split(',')):
+                    row[col] = self._parse_value(val)
+                rows.append(row)
             
-            query.values = {}
-            for col, val in zip(columns, values_str):
-                # Try to convert to appropriate type
-                query.values[col] = self._convert_value(val)
+            if len(rows) == 1:
+                query.values = rows[0]
+            else:
+                query.values_batch = rows
     
-    def _parse_update(self, statement, query: ParsedQuery):
+    def _parse_update(self, sql: str, query: ParsedQuery):
         """Parse UPDATE statement."""
-        sql = str(statement).strip()
-        
         # Extract table name
-        match = re.search(r'UPDATE\s+(\w+)', sql, re.IGNORECASE)
+        match = _UPDATE_TABLE_RE.search(sql)
         if match:
-            query.table = match.group(1)
+            query.table = intern(match.group(1))
         
         # Extract SET clause
-        set_match = re.search(r'SET\s+(.+?)(?:WHERE|$)', sql, re.IGNORECASE)
+        set_match = _UPDATE_SET_RE.search(sql)
         if set_match:
             set_str = set_match.group(1).strip()
             query.values = self._parse_set_clause(set_str)
         
         # Extract WHERE clause
-        tokens = [t for t in statement.tokens if not t.is_whitespace]
-        for token in tokens:
-            if isinstance(token, Where):
-                query.conditions = self._parse_where(token)
+        where_match = _WHERE_RE.search(sql)
+        if where_match:
+            query.conditions = self._parse_conditions(where_match.group(1))
     
-    def _parse_delete(self, statement, query: ParsedQuery):
+    def _parse_delete(self, sql: str, query: ParsedQuery):
         """Parse DELETE statement."""
-        tokens = [t for t in statement.tokens if not t.is_whitespace]
-        
-        i = 1  # Skip DELETE
-        
-        # Skip FROM
-        while i < len(tokens):
-            if tokens[i].ttype is Keyword and tokens[i].value.upper() == 'FROM':
-                i += 1
-                if i < len(tokens):
-                    query.table = str(tokens[i]).strip()
-                    i += 1
-                break
-            i += 1
-        
-        # Parse WHERE
-        for token in tokens[i:]:
-            if isinstance(token, Where):
-                query.conditions = self._parse_where(token)
+        match = _DELETE_RE.match(sql)
+        if match:
+            query.table = intern(match.group(1))
+            if match.group(2):
+                query.conditions = self._parse_conditions(match.group(2))
     
-    def _parse_create_table(self, statement, query: ParsedQuery):
+    def _parse_create_table(self, sql: str, query: ParsedQuery):
         """Parse CREATE TABLE statement."""
-        sql = str(statement).strip()
-        
         # Extract table name and schema
-        match = re.search(r'CREATE\s+TABLE\s+(\w+)\s*\(([^)]+)\)', sql, re.IGNORECASE)
+        match = _CREATE_TABLE_RE.search(sql)
         if match:
-            query.table = match.group(1)
+            query.table = intern(match.group(1))
             schema_str = match.group(2)
             
             # Parse schema
@@ -228,27 +390,24 @@ class SQLParser:
                 col_def = col_def.strip()
                 parts = col_def.split()
                 if len(parts) >= 2:
-                    col_name = parts[0]
+                    col_name = intern(parts[0])
                     col_type = parts[1].upper()
                     query.schema[col_name] = col_type
     
-    def _parse_drop_table(self, statement, query: ParsedQuery):
+    def _parse_drop_table(self, sql: str, query: ParsedQuery):
         """Parse DROP TABLE statement."""
-        sql = str(statement).strip()
-        match = re.search(r'DROP\s+TABLE\s+(\w+)', sql, re.IGNORECASE)
+        match = _DROP_TABLE_RE.search(sql)
         if match:
-            query.table = match.group(1)
+            query.table = intern(match.group(1))
     
-    def _parse_create_index(self, statement, query: ParsedQuery):
+    def _parse_create_index(self, sql: str, query: ParsedQuery):
         """Parse CREATE INDEX statement."""
-        sql = str(statement).strip()
-        
         # CREATE INDEX idx_name ON table (columns)
-        match = re.search(r'CREATE\s+INDEX\s+(\w+)\s+ON\s+(\w+)\s*\(([^)]+)\)', sql, re.IGNORECASE)
+        match = _CREATE_INDEX_RE.search(sql)
         if match:
-            query.index_name = match.group(1)
-            query.table = match.group(2)
-            query.index_columns = [c.strip() for c in match.group(3).split(',')]
+            query.index_name = intern(match.group(1))
+            query.table = intern(match.group(2))
+            query.index_columns = [intern(c.strip()) for c in match.group(3).split(',')]
         
         # Check for index type (USING HASH or USING BTREE)
         if 'USING HASH' in sql.upper():
@@ -256,33 +415,34 @@ class SQLParser:
         else:
             query.index_type = 'btree'
     
-    def _parse_drop_index(self, statement, query: ParsedQuery):
+    def _parse_drop_index(self, sql: str, query: ParsedQuery):
         """Parse DROP INDEX statement."""
-        sql = str(statement).strip()
-        
         # DROP INDEX idx_name ON table
-        match = re.search(r'DROP\s+INDEX\s+(\w+)(?:\s+ON\s+(\w+))?', sql, re.IGNORECASE)
+        match = _DROP_INDEX_RE.search(sql)
         if match:
-            query.index_name = match.group(1)
+            query.index_name = intern(match.group(1))
             if match.group(2):
-                query.table = match.group(2)
+                query.table = intern(match.group(2))
     
     def _parse_where(self, where_clause) -> Dict[str, Any]:
         """Parse WHERE clause into conditions."""
+        return self._parse_conditions(str(where_clause).replace('WHERE', '', 1))
+    
+    def _parse_conditions(self, where_str: str) -> Dict[str, Any]:
+        """Parse the text of a WHERE clause, after the keyword, into conditions."""
         conditions = {}
-        where_str = str(where_clause).replace('WHERE', '', 1).strip()
+        where_str = where_str.strip()
         
         # Simple parsing for basic conditions (column = value AND column2 = value2)
         # Split by AND
-        parts = re.split(r'\s+AND\s+', where_str, flags=re.IGNORECASE)
+        parts = _WHERE_AND_RE.split(where_str)
         
         for part in parts:
             # Parse column = value or column > value, etc.
-            match = re.search(r'(\w+)\s*=\s*(.+)', part.strip())
+            match = _WHERE_EQ_RE.search(part.strip())
             if match:
-                column = match.group(1).strip()
-                value = match.group(2).strip().strip("'\"")
-                conditions[column] = self._convert_value(value)
+                column = intern(match.group(1))
+                conditions[column] = self._parse_value(match.group(2))
         
         return conditions
     
@@ -300,7 +460,7 @@ class SQLParser:
             else:
                 col = part
                 direction = 'ASC'
-            result.append((col, direction))
+            result.append((intern(col), direction))
         return result
     
     def _parse_set_clause(self, set_str: str) -> Dict[str, Any]:
@@ -309,24 +469,33 @@ class SQLParser:
         for assignment in set_str.split(','):
             if '=' in assignment:
                 col, val = assignment.split('=', 1)
-                col = col.strip()
-                val = val.strip().strip("'\"")
-                values[col] = self._convert_value(val)
+                values[intern(col.strip())] = self._parse_value(val)
         return values
     
+    def _parse_value(self, value: str) -> Any:
+        """Parse a literal or ``?`` placeholder from SQL text."""
+        value = value.strip()
+        if value == '?':
+            return PARAMETER
+        if len(value) >= 2 and value[0] in "'\"" and value[-1] == value[0]:
+            # Quoted literal, with doubled quotes escaping the quote character
+            quote = value[0]
+            return self._convert_value(value[1:-1].replace(quote * 2, quote))
+        if value.upper() == 'NULL':
+            return None
+        # Try to convert to appropriate type
+        return self._convert_value(value.strip("'\""))
+    
     def _convert_value(self, value: str) -> Any:
         """Convert string value to appropriate Python type."""
-        # Try int
+        # Only text starting like a number is tried as one, so plain strings
+        # are returned without raising and catching a ValueError or two
+        if not value or value[0] not in _NUMBER_START:
+            return value
         try:
+            if '.' in value or 'e' in value or 'E' in value:
+                return float(value)
             return int(value)
         except ValueError:
-            pass
-        
-        # Try float
-        try:
-            return float(value)
-        except ValueError:
-            pass
-        
-        # Keep as string
-        return value
+            # Keep as string
+            return value
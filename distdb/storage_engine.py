@@ -2,239 +2,740 @@
 
 import os
 import json
+import mmap
 import threading
 import time
-from typing import Any, Dict, Optional, List, Tuple
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, Optional, List, Tuple, Union
 from collections import defaultdict
 from pathlib import Path
+from sys import intern
 
-from .utils import serialize, deserialize
+import msgpack
+
+from .utils import make_packer
+
+# WAL operation codes; each record is the array
+# [timestamp, operation, table, key, value]. An OP_UPDATE record holds the
+# list of updated keys and the column values set on all of them.
+OP_PUT = 1
+OP_DELETE = 2
+OP_CREATE_TABLE = 3
+OP_DROP_TABLE = 4
+OP_UPDATE = 5
+
+# Operation names of records logged as dicts, before the op codes
+_LEGACY_OPERATIONS = {
+    'PUT': OP_PUT,
+    'DELETE': OP_DELETE,
+    'CREATE_TABLE': OP_CREATE_TABLE,
+    'DROP_TABLE': OP_DROP_TABLE,
+}
+
+# Bytes of log fed to the unpacker at a time during recovery, and of
+# snapshot buffered between writes
+_READ_CHUNK = 1 << 20
+_WRITE_BUFFER = 1 << 20
 
 
 class WriteAheadLog:
-    """Write-Ahead Log for durability."""
+    """
+    Write-Ahead Log for durability.
     
-    def __init__(self, wal_dir: str):
+    Appends use group commit: operations are queued under a sequence
+    number, and the first thread waiting for one that is not yet durable
+    writes and fsyncs everything queued so far, on behalf of every waiter.
+    """
+    
+    def __init__(self, wal_dir: str, dsync: bool = False):
         self.wal_dir = Path(wal_dir)
         self.wal_dir.mkdir(parents=True, exist_ok=True)
         self.current_log_file = None
         self.log_index = 0
         self.lock = threading.Lock()
+        
+        # With O_DSYNC each write is durable when it returns, so no separate
+        # fsync is needed; platforms without it keep using fsync
+        self.dsync = dsync and hasattr(os, 'O_DSYNC')
+        
+        # Group commit state, guarded by lock: framed records not yet
+        # written, the sequence number of the last one queued and of the
+        # last one durable, and whether a thread is writing a group
+        self._cond = threading.Condition(self.lock)
+        self._pending: List[bytes] = []
+        self._queued_seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+        
+        # Per-thread msgpack Packers; records are encoded outside the lock
+        self._local = threading.local()
+        
+        # Start a new segment after any left by a previous run, so replay
+        # order matches the order operations were logged in
+        self.log_index = max((self._segment_index(path) for path in self.wal_dir.glob("wal_*.log")),
+                             default=0)
         self._open_new_log()
     
+    @staticmethod
+    def _segment_index(path: Path) -> int:
+        """Index of a log file from its name."""
+        return int(path.stem[len("wal_"):])
+    
     def _open_new_log(self):
         """Open a new log file."""
         self.log_index += 1
         log_path = self.wal_dir / f"wal_{self.log_index:010d}.log"
-        self.current_log_file = open(log_path, 'ab')
+        if self.dsync:
+            fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_DSYNC, 0o644)
+            self.current_log_file = os.fdopen(fd, 'ab')
+        else:
+            self.current_log_file = open(log_path, 'ab')
     
-    def append(self, operation: str, table: str, key: str, value: Any) -> int:
-        """Append an operation to the WAL."""
+    def _packer(self) -> msgpack.Packer:
+        """This thread's Packer, reused across records to keep its buffer."""
+        packer = getattr(self._local, 'packer', None)
+        if packer is None:
+            packer = self._local.packer = make_packer()
+        return packer
+    
+    def _frame(self, timestamp: float, operation: int, table: str, key: Any, value: Any) -> bytes:
+        """Serialize an operation as a log record."""
+        return self._packer().pack((timestamp, operation, table, key, value))
+    
+    def enqueue(self, operation: int, table: str, key: Any, value: Any) -> int:
+        """Queue an operation for the next group commit and return its sequence number."""
+        record = self._frame(time.time(), operation, table, key, value)
+        with self.lock:
+            self._pending.append(record)
+            self._queued_seq += 1
+            return self._queued_seq
+    
+    def enqueue_many(self, operation: int, table: str, items: List[Tuple[Any, Any]]) -> int:
+        """Queue one operation per (key, value) pair and return the last sequence number."""
+        timestamp = time.time()
+        records = [self._frame(timestamp, operation, table, key, value) for key, value in items]
         with self.lock:
-            entry = {
-                'timestamp': time.time(),
-                'operation': operation,
-                'table': table,
-                'key': key,
-                'value': value
-            }
-            serialized = serialize(entry)
-            # Write length prefix followed by data
-            length = len(serialized)
-            self.current_log_file.write(length.to_bytes(4, 'big'))
-            self.current_log_file.write(serialized)
-            self.current_log_file.flush()
-            os.fsync(self.current_log_file.fileno())
-            return self.log_index
-    
-    def read_all_entries(self) -> List[Dict]:
-        """Read all entries from all log files."""
+            self._pending.extend(records)
+            self._queued_seq += len(records)
+            return self._queued_seq
+    
+    def wait(self, seq: int):
+        """Block until the operation with sequence number seq is durable."""
+        with self._cond:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    # Another thread is writing a group; it may cover seq
+                    self._cond.wait()
+                    continue
+                
+                # Lead a group commit of everything queued so far
+                self._syncing = True
+                pending, self._pending = self._pending, []
+                target = self._queued_seq
+                log_file = self.current_log_file
+                self._cond.release()
+                try:
+                    log_file.write(b''.join(pending))
+                    log_file.flush()
+                    if not self.dsync:
+                        os.fsync(log_file.fileno())
+                except BaseException:
+                    self._cond.acquire()
+                    self._pending[:0] = pending
+                    self._syncing = False
+                    self._cond.notify_all()
+                    raise
+                self._cond.acquire()
+                self._synced_seq = target
+                self._syncing = False
+                self._cond.notify_all()
+    
+    def append(self, operation: int, table: str, key: str, value: Any) -> int:
+        """Append an operation to the WAL."""
+        self.wait(self.enqueue(operation, table, key, value))
+        return self.log_index
+    
+    def append_many(self, operation: int, table: str, items: List[Tuple[str, Any]]) -> int:
+        """Append one operation per (key, value) pair with a single fsync."""
+        self.wait(self.enqueue_many(operation, table, items))
+        return self.log_index
+    
+    @staticmethod
+    def _read_legacy_segment(f) -> List[Dict[str, Any]]:
+        """Read the length-prefixed dict records of a log file written before msgpack framing."""
+        entries = []
+        while True:
+            length_bytes = f.read(4)
+            if len(length_bytes) != 4:
+                break
+            length = int.from_bytes(length_bytes, 'big')
+            data = f.read(length)
+            if len(data) != length:
+                break
+            entries.append(msgpack.unpackb(data, raw=False))
+        return entries
+    
+    def read_all_entries(self) -> List[Union[List[Any], Dict[str, Any]]]:
+        """
+        Read all entries, as [timestamp, operation, table, key, value], from all log files.
+        
+        Log files written before msgpack framing hold 4-byte big-endian
+        length prefixes, so start with a zero byte where a record never
+        does; their dict records are returned as they are.
+        """
         entries = []
         for log_file in sorted(self.wal_dir.glob("wal_*.log")):
             with open(log_file, 'rb') as f:
-                while True:
-                    length_bytes = f.read(4)
-                    if not length_bytes:
-                        break
-                    length = int.from_bytes(length_bytes, 'big')
-                    data = f.read(length)
-                    if len(data) != length:
-                        break
-                    entries.append(deserialize(data))
+                if f.read(1) == b'\x00':
+                    f.seek(0)
+                    entries.extend(self._read_legacy_segment(f))
+                    continue
+                f.seek(0)
+                # Records are self-delimiting msgpack; a torn record at the
+                # tail is left unconsumed in the unpacker
+                unpacker = msgpack.Unpacker(raw=False)
+                for chunk in iter(partial(f.read, _READ_CHUNK), b''):
+                    unpacker.feed(chunk)
+                    entries.extend(unpacker)
         return entries
     
-    def truncate(self):
-        """Remove old log files."""
+    def rotate(self) -> int:
+        """
+        Seal the current log file and start a new one.
+        
+        Operations still queued are written to the sealed file first. Returns
+        the sealed file's index, to pass to truncate once a snapshot covering
+        everything logged so far is persisted.
+        """
+        with self._cond:
+            while self._syncing:
+                self._cond.wait()
+            if self._pending:
+                self.current_log_file.write(b''.join(self._pending))
+                self.current_log_file.flush()
+                if not self.dsync:
+                    os.fsync(self.current_log_file.fileno())
+                self._pending = []
+                self._synced_seq = self._queued_seq
+                self._cond.notify_all()
+            
+            sealed = self.log_index
+            self.current_log_file.close()
+            self._open_new_log()
+            return sealed
+    
+    def truncate(self, upto: int):
+        """Remove the log files with index up to and including upto."""
         with self.lock:
-            if self.current_log_file:
-                self.current_log_file.close()
             for log_file in self.wal_dir.glob("wal_*.log"):
-                log_file.unlink()
-            self.log_index = 0
-            self._open_new_log()
+                if self._segment_index(log_file) <= upto:
+                    log_file.unlink()
     
     def close(self):
-        """Close the WAL."""
+        """Close the WAL, writing any operations still queued."""
+        self.wait(self._queued_seq)
         with self.lock:
             if self.current_log_file:
                 self.current_log_file.close()
 
 
+Key = Union[str, bytes]
+
+
+class _Missing:
+    """Placeholder for a column a row has no value for."""
+    
+    __slots__ = ()
+    
+    def __eq__(self, other: Any) -> bool:
+        # Compares like row.get(column) on a row lacking the column
+        return other is None or other is self
+    
+    __hash__ = object.__hash__
+    
+    def __repr__(self) -> str:
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+# msgpack extension type code standing in for MISSING in snapshot columns
+_EXT_MISSING = 0
+
+
+def _pack_missing(obj: Any) -> msgpack.ExtType:
+    """msgpack default hook encoding MISSING."""
+    if obj is MISSING:
+        return msgpack.ExtType(_EXT_MISSING, b'')
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+def _from_legacy_record(entry: Dict[str, Any]) -> Tuple[Any, Optional[int], str, Any, Any]:
+    """Convert a WAL record logged as a dict to the [timestamp, operation, table, key, value] layout."""
+    operation = _LEGACY_OPERATIONS.get(str(entry.get('operation', '')).upper())
+    return (entry.get('timestamp'), operation, entry.get('table'),
+            entry.get('key'), entry.get('value'))
+
+
+def _unpack_ext(code: int, data: bytes) -> Any:
+    """msgpack ext hook decoding MISSING."""
+    return MISSING if code == _EXT_MISSING else msgpack.ExtType(code, data)
+
+
+class Table:
+    """
+    Column-oriented storage for the rows of one table.
+    
+    Each column is a list indexed by row slot, holding MISSING where a row
+    has no value for it. The lists are kept dense: deleting a row moves the
+    last row into its slot, so every slot below len(keys) holds a row and
+    scans need no tombstone checks. Rows are only assembled into dicts when
+    read.
+    """
+    
+    def __init__(self, columns: Iterable[str] = ()):
+        self.keys: List[Key] = []
+        self.columns: Dict[str, List[Any]] = {name: [] for name in columns}
+        self.slots: Dict[Key, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.slots)
+    
+    def __contains__(self, key: Key) -> bool:
+        return key in self.slots
+    
+    def put(self, key: Key, row: Dict[str, Any]):
+        """Insert or overwrite the row stored under key."""
+        keys = self.keys
+        columns = self.columns
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = self.slots[key] = len(keys)
+            keys.append(key)
+            for values in columns.values():
+                values.append(MISSING)
+        
+        for name in row:
+            if name not in columns:
+                columns[name] = [MISSING] * len(keys)
+        for name, values in columns.items():
+            values[slot] = row.get(name, MISSING)
+    
+    def update_many(self, keys: Iterable[Key], values: Dict[str, Any]):
+        """Set the columns in values on the rows stored under keys, one column at a time."""
+        slot_of = self.slots.get
+        slots = [slot for key in keys if (slot := slot_of(key)) is not None]
+        columns = self.columns
+        for name, value in values.items():
+            column = columns.get(name)
+            if column is None:
+                column = columns[name] = [MISSING] * len(self.keys)
+            for slot in slots:
+                column[slot] = value
+    
+    def delete(self, key: Key) -> bool:
+        """Delete the row stored under key, moving the last row into its slot."""
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return False
+        keys = self.keys
+        last = keys.pop()
+        if slot == len(keys):
+            for values in self.columns.values():
+                values.pop()
+        else:
+            keys[slot] = last
+            self.slots[last] = slot
+            for values in self.columns.values():
+                values[slot] = values.pop()
+        return True
+    
+    @classmethod
+    def from_columns(cls, keys: List[Key], columns: Dict[str, List[Any]]) -> 'Table':
+        """Build a table directly from its key list and column lists."""
+        table = cls()
+        table.keys = keys
+        table.columns = columns
+        table.slots = dict(zip(keys, range(len(keys))))
+        return table
+    
+    def copy(self) -> 'Table':
+        """Copy the table's lists, so the copy is unaffected by later writes."""
+        table = Table()
+        table.keys = self.keys.copy()
+        table.columns = {name: values.copy() for name, values in self.columns.items()}
+        table.slots = self.slots.copy()
+        return table
+    
+    def row(self, slot: int) -> Dict[str, Any]:
+        """Assemble the row in slot into a new dict."""
+        return {name: value for name, values in self.columns.items()
+                if (value := values[slot]) is not MISSING}
+    
+    def get(self, key: Key) -> Optional[Dict[str, Any]]:
+        """Get the row stored under key, if any."""
+        slot = self.slots.get(key)
+        return None if slot is None else self.row(slot)
+    
+    def items(self) -> Iterator[Tuple[Key, Dict[str, Any]]]:
+        """Iterate over (key, row) pairs, assembling each row as it goes."""
+        row = self.row
+        return ((key, row(slot)) for slot, key in enumerate(self.keys))
+
+
+def _intern_schema(schema: Dict[str, str]) -> Dict[str, str]:
+    """Copy of schema with interned column names, as the parser produces."""
+    return {intern(name): col_type for name, col_type in schema.items()}
+
+
 class StorageEngine:
     """In-memory key-value storage engine with persistence."""
     
-    def __init__(self, data_dir: str, wal_dir: str, snapshot_interval: int = 1000):
+    def __init__(self, data_dir: str, wal_dir: str, snapshot_interval: int = 1000,
+                 wal_dsync: bool = False):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
         
-        # Multi-table storage: table_name -> key -> value
-        self.tables: Dict[str, Dict[str, Any]] = defaultdict(dict)
+        # Multi-table storage: table_name -> columnar Table of rows. Keys are
+        # str or bytes; the WAL and snapshots store either natively
+        self.tables: Dict[str, Table] = defaultdict(Table)
         
         # Schema storage: table_name -> {column_name: type}
         self.schemas: Dict[str, Dict[str, str]] = {}
         
-        # Thread safety
-        self.lock = threading.RLock()
+        # Thread safety: each table's rows are guarded by its own lock, so
+        # writes to different tables proceed concurrently. _meta_lock guards
+        # schemas, the set of tables and _table_locks itself, and is taken
+        # before any table lock; _snapshot_lock keeps snapshots from
+        # interleaving
+        self._table_locks: Dict[str, threading.Lock] = {}
+        self._meta_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
         
         # WAL
-        self.wal = WriteAheadLog(wal_dir)
+        self.wal = WriteAheadLog(wal_dir, dsync=wal_dsync)
         self.snapshot_interval = snapshot_interval
+        # Bumped under differing table locks, so concurrent writers may
+        # occasionally lose a count; it only paces snapshots
         self.operations_since_snapshot = 0
         
+        # Per-thread WAL sequence number to wait for on leaving deferred_sync
+        self._deferred = threading.local()
+        
         # Recovery
         self._recover()
     
     def _recover(self):
         """Recover from snapshot and WAL."""
         # Load snapshot if exists
-        snapshot_path = self.data_dir / "snapshot.json"
+        snapshot_path = self.data_dir / "snapshot.msgpack"
+        legacy_path = self.data_dir / "snapshot.json"
         if snapshot_path.exists():
-            with open(snapshot_path, 'r') as f:
+            # Unpacked straight from the mapped file, without first reading
+            # a copy of it into memory
+            with open(snapshot_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    snapshot = msgpack.unpackb(data, raw=False, ext_hook=_unpack_ext)
+            self.schemas = {intern(table): _intern_schema(schema)
+                            for table, schema in snapshot.get('schemas', {}).items()}
+            self.tables = defaultdict(Table)
+            for table, (keys, columns) in snapshot.get('columns', {}).items():
+                columns = {intern(name): values for name, values in columns.items()}
+                self.tables[intern(table)] = Table.from_columns(keys, columns)
+            # Snapshots written row by row, before the columnar layout
+            for table, pairs in snapshot.get('tables', {}).items():
+                rows = self.tables[intern(table)] = Table(self.schemas.get(table, ()))
+                for key, value in pairs:
+                    rows.put(key, value)
+        elif legacy_path.exists():
+            # Snapshot written before the switch to msgpack; the next
+            # snapshot replaces it
+            with open(legacy_path, 'r') as f:
                 snapshot = json.load(f)
-                self.tables = defaultdict(dict, {
-                    table: dict(data) for table, data in snapshot.get('tables', {}).items()
-                })
-                self.schemas = snapshot.get('schemas', {})
+                self.schemas = {intern(table): _intern_schema(schema)
+                                for table, schema in snapshot.get('schemas', {}).items()}
+                self.tables = defaultdict(Table)
+                for table, data in snapshot.get('tables', {}).items():
+                    rows = self.tables[intern(table)] = Table(self.schemas.get(table, ()))
+                    for key, value in data.items():
+                        rows.put(key, value)
+                for table, data in snapshot.get('binary_keys', {}).items():
+                    rows = self.tables[table]
+                    for key, value in data.items():
+                        rows.put(bytes.fromhex(key), value)
         
         # Replay WAL
-        entries = self.wal.read_all_entries()
-        for entry in entries:
-            operation = entry['operation']
-            table = entry['table']
-            key = entry['key']
-            value = entry['value']
-            
-            if operation == 'PUT':
-                self.tables[table][key] = value
-            elif operation == 'DELETE':
-                self.tables[table].pop(key, None)
-            elif operation == 'CREATE_TABLE':
+        tables = self.tables
+        for entry in self.wal.read_all_entries():
+            if type(entry) is dict:
+                entry = _from_legacy_record(entry)
+            _, operation, table, key, value = entry
+            if operation == OP_PUT:
+                tables[table].put(key, value)
+            elif operation == OP_DELETE:
+                tables[table].delete(key)
+            elif operation == OP_UPDATE:
+                tables[table].update_many(key, value)
+            elif operation == OP_CREATE_TABLE:
+                table = intern(table)
+                value = _intern_schema(value)
                 self.schemas[table] = value
-            elif operation == 'DROP_TABLE':
-                self.tables.pop(table, None)
+                tables[table] = Table(value)
+            elif operation == OP_DROP_TABLE:
+                tables.pop(table, None)
                 self.schemas.pop(table, None)
     
+    @contextmanager
+    def deferred_sync(self):
+        """
+        Defer waiting for WAL durability until the block exits.
+        
+        Writes inside the block return as soon as they are queued in the
+        WAL; on exit the thread waits once for the last of them. Callers
+        holding a lock of their own around the writes can release it first,
+        so that concurrent writers share a single fsync. A nested block
+        leaves the wait to the outermost one.
+        """
+        if getattr(self._deferred, 'seq', None) is not None:
+            yield
+            return
+        self._deferred.seq = 0
+        try:
+            yield
+            if self._deferred.seq:
+                self.wal.wait(self._deferred.seq)
+                self._check_snapshot()
+        finally:
+            self._deferred.seq = None
+    
+    def _sync(self, seq: int):
+        """
+        Wait until WAL sequence number seq is durable, unless deferred.
+        
+        Called after a write releases the lock; a snapshot falling due is
+        taken here too, so it never runs with the caller's locks held.
+        """
+        deferred = getattr(self._deferred, 'seq', None)
+        if deferred is None:
+            self.wal.wait(seq)
+            self._check_snapshot()
+        elif seq > deferred:
+            self._deferred.seq = seq
+    
+    def _table_lock(self, table: str) -> threading.Lock:
+        """The lock guarding a table's rows, created on first use."""
+        lock = self._table_locks.get(table)
+        if lock is None:
+            with self._meta_lock:
+                lock = self._table_locks.setdefault(table, threading.Lock())
+        return lock
+    
     def create_table(self, table_name: str, schema: Dict[str, str]):
         """Create a new table with schema."""
-        with self.lock:
+        # Names are interned like the parser's, so lookups by parsed names
+        # compare by identity
+        table_name = intern(table_name)
+        with self._meta_lock:
             if table_name in self.schemas:
                 raise ValueError(f"Table {table_name} already exists")
             
-            self.schemas[table_name] = schema
-            self.tables[table_name] = {}
-            self.wal.append('CREATE_TABLE', table_name, '', schema)
-            self._check_snapshot()
+            schema = _intern_schema(schema)
+            with self._table_locks.setdefault(table_name, threading.Lock()):
+                self.schemas[table_name] = schema
+                self.tables[table_name] = Table(schema)
+                seq = self.wal.enqueue(OP_CREATE_TABLE, table_name, '', schema)
+        self._sync(seq)
     
     def drop_table(self, table_name: str):
         """Drop a table."""
-        with self.lock:
+        with self._meta_lock:
             if table_name not in self.schemas:
                 raise ValueError(f"Table {table_name} does not exist")
             
-            del self.schemas[table_name]
-            del self.tables[table_name]
-            self.wal.append('DROP_TABLE', table_name, '', None)
-            self._check_snapshot()
+            with self._table_locks.setdefault(table_name, threading.Lock()):
+                del self.schemas[table_name]
+                del self.tables[table_name]
+                seq = self.wal.enqueue(OP_DROP_TABLE, table_name, '', None)
+        self._sync(seq)
     
     def get_schema(self, table_name: str) -> Optional[Dict[str, str]]:
         """Get table schema."""
-        with self.lock:
+        with self._meta_lock:
             return self.schemas.get(table_name)
     
     def list_tables(self) -> List[str]:
         """List all tables."""
-        with self.lock:
+        with self._meta_lock:
             return list(self.schemas.keys())
     
     def put(self, table: str, key: str, value: Dict[str, Any]):
         """Store a key-value pair in a table."""
-        with self.lock:
-            if table not in self.schemas:
+        with self._table_lock(table):
+            # Creating or dropping the table needs its lock, so the schema
+            # cannot change while it is held
+            schema = self.schemas.get(table)
+            if schema is None:
                 raise ValueError(f"Table {table} does not exist")
             
             # Validate against schema
-            schema = self.schemas[table]
             for col_name in value.keys():
                 if col_name not in schema:
                     raise ValueError(f"Column {col_name} not in schema for table {table}")
             
-            self.tables[table][key] = value
-            self.wal.append('PUT', table, key, value)
+            self.tables[table].put(key, value)
+            seq = self.wal.enqueue(OP_PUT, table, key, value)
             self.operations_since_snapshot += 1
-            self._check_snapshot()
+        self._sync(seq)
+    
+    def put_many(self, table: str, items: List[Tuple[str, Dict[str, Any]]]):
+        """Store a batch of (key, value) pairs in a table with one WAL sync."""
+        with self._table_lock(table):
+            schema = self.schemas.get(table)
+            if schema is None:
+                raise ValueError(f"Table {table} does not exist")
+            
+            # Validate the whole batch before applying any of it
+            for _, value in items:
+                for col_name in value.keys():
+                    if col_name not in schema:
+                        raise ValueError(f"Column {col_name} not in schema for table {table}")
+            
+            rows = self.tables[table]
+            for key, value in items:
+                rows.put(key, value)
+            seq = self.wal.enqueue_many(OP_PUT, table, items)
+            self.operations_since_snapshot += len(items)
+        self._sync(seq)
+    
+    def update_many(self, table: str, keys: List[str], values: Dict[str, Any]):
+        """
+        Set the columns in values on the rows of a table stored under keys.
+        
+        Only the given columns are written, straight into the column lists,
+        and the whole update is logged as a single WAL record.
+        """
+        with self._table_lock(table):
+            schema = self.schemas.get(table)
+            if schema is None:
+                raise ValueError(f"Table {table} does not exist")
+            
+            for col_name in values.keys():
+                if col_name not in schema:
+                    raise ValueError(f"Column {col_name} not in schema for table {table}")
+            
+            self.tables[table].update_many(keys, values)
+            seq = self.wal.enqueue(OP_UPDATE, table, keys, values)
+            self.operations_since_snapshot += len(keys)
+        self._sync(seq)
     
     def get(self, table: str, key: str) -> Optional[Dict[str, Any]]:
         """Retrieve a value by key from a table."""
-        with self.lock:
-            return self.tables.get(table, {}).get(key)
+        with self._table_lock(table):
+            data = self.tables.get(table)
+            return data.get(key) if data is not None else None
     
     def delete(self, table: str, key: str) -> bool:
         """Delete a key-value pair from a table."""
-        with self.lock:
-            if table in self.tables and key in self.tables[table]:
-                del self.tables[table][key]
-                self.wal.append('DELETE', table, key, None)
-                self.operations_since_snapshot += 1
-                self._check_snapshot()
-                return True
-            return False
+        with self._table_lock(table):
+            if table not in self.tables or not self.tables[table].delete(key):
+                return False
+            seq = self.wal.enqueue(OP_DELETE, table, key, None)
+            self.operations_since_snapshot += 1
+        self._sync(seq)
+        return True
     
     def scan(self, table: str) -> List[Tuple[str, Dict[str, Any]]]:
         """Scan all key-value pairs in a table."""
-        with self.lock:
+        with self._table_lock(table):
             if table not in self.tables:
                 return []
             return list(self.tables[table].items())
     
+    def scan_view(self, table: str) -> Iterable[Tuple[str, Dict[str, Any]]]:
+        """
+        Live view of a table's (key, row) pairs.
+        
+        Unlike scan() the pairs are produced lazily from the table, so the
+        caller must keep writers to the table out for as long as it
+        iterates the view.
+        """
+        data = self.tables.get(table)
+        return data.items() if data is not None else ()
+    
+    def table_view(self, table: str) -> Optional[Table]:
+        """
+        The live columnar Table behind table, or None if there is none.
+        
+        As with scan_view(), the caller must keep writers out while using it.
+        """
+        return self.tables.get(table)
+    
     def _check_snapshot(self):
         """Create snapshot if needed."""
         if self.operations_since_snapshot >= self.snapshot_interval:
             self.snapshot()
     
     def snapshot(self):
-        """Create a snapshot of current state."""
-        with self.lock:
-            snapshot_path = self.data_dir / "snapshot.json"
-            temp_path = self.data_dir / "snapshot.json.tmp"
+        """
+        Create a snapshot of current state.
+        
+        Only copying the tables' lists and sealing the WAL happen under the
+        locks; rows are assembled, encoded and written while writers carry on
+        logging to the next WAL file.
+        """
+        with self._snapshot_lock:
+            # Hold every table still, in lock order, so the copies and the
+            # sealed WAL cover exactly the same writes
+            with self._meta_lock, ExitStack() as stack:
+                for table in sorted(self._table_locks):
+                    stack.enter_context(self._table_locks[table])
+                tables = {table: data.copy() for table, data in self.tables.items()}
+                schemas = dict(self.schemas)
+                sealed = self.wal.rotate()
+                self.operations_since_snapshot = 0
             
-            snapshot = {
-                'tables': {table: dict(data) for table, data in self.tables.items()},
-                'schemas': self.schemas,
-                'timestamp': time.time()
-            }
+            snapshot_path = self.data_dir / "snapshot.msgpack"
+            temp_path = self.data_dir / "snapshot.msgpack.tmp"
             
-            with open(temp_path, 'w') as f:
-                json.dump(snapshot, f)
+            # The snapshot is a single map, {'schemas', 'timestamp', 'columns'},
+            # with each table stored as it is held in memory: its key list and
+            # a map of column lists, MISSING packed as an extension type. Str
+            # and bytes keys both round-trip natively, and recovery adopts the
+            # unpacked lists without assembling a dict per row. Each list is
+            # packed straight into the file rather than the whole snapshot
+            # being built in memory first.
+            packer = msgpack.Packer(use_bin_type=True, default=_pack_missing)
+            with open(temp_path, 'wb', buffering=_WRITE_BUFFER) as f:
+                f.write(packer.pack_map_header(3))
+                f.write(packer.pack('schemas'))
+                f.write(packer.pack(schemas))
+                f.write(packer.pack('timestamp'))
+                f.write(packer.pack(time.time()))
+                f.write(packer.pack('columns'))
+                f.write(packer.pack_map_header(len(tables)))
+                for table, data in tables.items():
+                    f.write(packer.pack(table))
+                    f.write(packer.pack_array_header(2))
+                    f.write(packer.pack(data.keys))
+                    f.write(packer.pack_map_header(len(data.columns)))
+                    for name, values in data.columns.items():
+                        f.write(packer.pack(name))
+                        f.write(packer.pack(values))
+                f.flush()
+                os.fsync(f.fileno())
             
             # Atomic rename
             temp_path.rename(snapshot_path)
             
-            # Clear WAL after successful snapshot
-            self.wal.truncate()
-            self.operations_since_snapshot = 0
+            legacy_path = self.data_dir / "snapshot.json"
+            if legacy_path.exists():
+                legacy_path.unlink()
+            
+            # Clear the WAL files the snapshot covers
+            self.wal.truncate(sealed)
     
     def close(self):
         """Close the storage engine."""
-        with self.lock:
-            self.snapshot()
-            self.wal.close()
+        self.snapshot()
+        self.wal.close()
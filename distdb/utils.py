@@ -2,8 +2,10 @@
 
 import logging
 import hashlib
+import threading
 import msgpack
-from typing import Any, Dict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
 
 
 def setup_logging(level: int = logging.INFO) -> None:
@@ -20,6 +22,11 @@ def serialize(obj: Any) -> bytes:
     return msgpack.packb(obj, use_bin_type=True)
 
 
+def make_packer() -> msgpack.Packer:
+    """Create a reusable msgpack Packer encoding like serialize()."""
+    return msgpack.Packer(use_bin_type=True)
+
+
 def deserialize(data: bytes) -> Any:
     """Deserialize bytes to an object using msgpack."""
     return msgpack.unpackb(data, raw=False)
@@ -27,7 +34,9 @@ def deserialize(data: bytes) -> Any:
 
 def hash_key(key: str) -> int:
     """Compute hash of a key for consistent hashing."""
-    return int(hashlib.md5(key.encode()).hexdigest(), 16)
+    # A 64-bit BLAKE2b digest: well distributed and stable across processes,
+    # unlike hash(), without MD5's hex string round-trip
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
 
 
 def get_shard(key: str, num_shards: int) -> int:
@@ -38,13 +47,65 @@ def get_shard(key: str, num_shards: int) -> int:
 class VirtualNode:
     """Virtual node for consistent hashing."""
     
+    __slots__ = ('node_id', 'virtual_id', 'hash_value')
+    
     def __init__(self, node_id: str, virtual_id: int):
         self.node_id = node_id
         self.virtual_id = virtual_id
-        self.hash_value = hash_key(f"{node_id}:{virtual_id}")
+        self.hash_value = self.position(node_id, virtual_id)
+    
+    @staticmethod
+    def position(node_id: str, virtual_id: int) -> int:
+        """Ring position of a virtual node, without building the object."""
+        return hash_key(f"{node_id}:{virtual_id}")
     
     def __lt__(self, other):
         return self.hash_value < other.hash_value
     
     def __repr__(self):
         return f"VirtualNode({self.node_id}, {self.virtual_id})"
+
+
+class ReadWriteLock:
+    """Lock allowing many concurrent readers or a single writer.
+    
+    Waiting writers block new readers so a steady stream of reads cannot
+    starve them. Neither side is reentrant.
+    """
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def read_lock(self) -> Iterator[None]:
+        """Hold the lock shared for the duration of the block."""
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+    
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Hold the lock exclusively for the duration of the block."""
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
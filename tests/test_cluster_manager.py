@@ -0,0 +1,130 @@
+"""Tests for cluster manager."""
+
+import time
+
+import pytest
+from distdb.cluster_manager import ClusterManager
+
+
+@pytest.fixture
+def cluster():
+    manager = ClusterManager('node1', 'localhost', 5000, heartbeat_interval=0.05)
+    yield manager
+    manager.stop()
+
+
+def test_snapshot_reads(cluster):
+    """Test lock-free reads see the nodes as of the last membership change."""
+    assert cluster.get_all_nodes() == ['node1']
+    
+    cluster.add_node('node2', 'localhost', 5001)
+    cluster.add_node('node3', 'localhost', 5002)
+    assert cluster.get_all_nodes() == ['node1', 'node2', 'node3']
+    assert cluster.get_alive_nodes() == ['node1', 'node2', 'node3']
+    
+    # Liveness is read from the shared NodeInfo, without a new snapshot
+    cluster.nodes['node2'].is_alive = False
+    assert cluster.get_alive_nodes() == ['node1', 'node3']
+    assert cluster.get_all_nodes() == ['node1', 'node2', 'node3']
+    
+    cluster.remove_node('node3')
+    assert cluster.get_all_nodes() == ['node1', 'node2']
+    
+    # The local node is never removed
+    cluster.remove_node('node1')
+    assert cluster.get_all_nodes() == ['node1', 'node2']
+
+
+def test_get_node_info(cluster):
+    """Test node info reports the last heartbeat as wall-clock time."""
+    cluster.add_node('node2', 'localhost', 5001)
+    cluster.update_heartbeat('node2')
+    
+    info = cluster.get_node_info('node2')
+    assert info.host == 'localhost' and info.port == 5001
+    assert abs(info.last_seen - time.time()) < 1
+    assert info is not cluster.nodes['node2']
+    assert cluster.get_node_info('missing') is None
+
+
+def test_removed_node_slot_reused(cluster):
+    """Test a removed node's heartbeat slot is released and reused."""
+    cluster.add_node('node2', 'localhost', 5001)
+    slot = cluster._slots['node2']
+    
+    cluster.remove_node('node2')
+    assert 'node2' not in cluster._slots
+    cluster.update_heartbeat('node2')
+    assert cluster.get_node_info('node2') is None
+    
+    cluster.add_node('node3', 'localhost', 5002)
+    assert cluster._slots['node3'] == slot
+    assert len(cluster._last_seen) == 2
+
+
+def _wait_until(predicate, timeout: float = 2.0) -> bool:
+    """Poll predicate until it holds or timeout seconds pass."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_node_expires_after_timeout(cluster):
+    """Test a node without heartbeats is marked dead once its timeout passes."""
+    removed = []
+    cluster.on_node_removed = removed.append
+    cluster.start()
+    
+    start = time.monotonic()
+    cluster.add_node('node2', 'localhost', 5001)
+    assert _wait_until(lambda: 'node2' not in cluster.get_alive_nodes())
+    assert time.monotonic() - start >= cluster._timeout
+    assert removed == ['node2']
+    assert 'node2' in cluster.get_all_nodes()
+    
+    # A heartbeat brings it back
+    cluster.update_heartbeat('node2')
+    assert 'node2' in cluster.get_alive_nodes()
+
+
+def test_heartbeats_push_back_expiry(cluster):
+    """Test the monitor re-checks a node seen since its expiry was scheduled."""
+    cluster.start()
+    cluster.add_node('node2', 'localhost', 5001)
+    
+    # Heartbeat for several timeouts; each popped deadline finds a later
+    # heartbeat and is pushed back rather than expiring the node
+    end = time.monotonic() + cluster._timeout * 4
+    while time.monotonic() < end:
+        cluster.update_heartbeat('node2')
+        assert 'node2' in cluster.get_alive_nodes()
+        time.sleep(cluster.heartbeat_interval / 5)
+    
+    assert _wait_until(lambda: 'node2' not in cluster.get_alive_nodes())
+
+
+def test_node_removed_with_pending_expiry(cluster):
+    """Test a node removed before its expiry leaves the heap entry inert."""
+    removed = []
+    cluster.on_node_removed = removed.append
+    # Long enough a timeout to tell the stale deadline from the fresh one
+    cluster.heartbeat_interval = 0.2
+    cluster.start()
+    
+    cluster.add_node('node2', 'localhost', 5001)
+    cluster.remove_node('node2')
+    assert removed == ['node2']
+    assert 'node2' not in cluster._deadlines
+    
+    # Rejoining schedules a fresh expiry the stale entry must not cut short
+    time.sleep(cluster._timeout / 2)
+    cluster.add_node('node2', 'localhost', 5001)
+    time.sleep(cluster._timeout * 0.75)
+    assert 'node2' in cluster.get_alive_nodes()
+    
+    assert _wait_until(lambda: 'node2' not in cluster.get_alive_nodes())
+    assert removed == ['node2', 'node2']
+    assert cluster.monitor_thread.is_alive()
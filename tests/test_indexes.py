@@ -104,6 +104,14 @@ def test_find_best_index(index_manager):
     assert best in [index_name, index_age]
 
 
+def test_find_best_index_requires_full_key(index_manager):
+    """Test composite indexes are only used when every column has a condition."""
+    composite = index_manager.create_index('idx_name_age', 'users', ['name', 'age'], 'hash')
+    
+    assert index_manager.find_best_index('users', {'name': 'Alice'}) is None
+    assert index_manager.find_best_index('users', {'name': 'Alice', 'age': 25, 'id': 1}) == composite
+
+
 def test_index_manager_insert_row(index_manager):
     """Test IndexManager insert_row updates all indexes."""
     index_manager.create_index('idx_name', 'users', ['name'], 'hash')
@@ -127,3 +135,209 @@ def test_drop_index(index_manager):
     
     index_manager.drop_index('users', 'idx_test')
     assert index_manager.get_index('users', 'idx_test') is None
+
+
+def test_hash_index_composite_key(index_manager):
+    """Test hash index over multiple columns."""
+    index = index_manager.create_index('idx_name_age', 'users', ['name', 'age'], 'hash')
+    
+    index.insert('user1', {'name': 'Alice', 'age': 25})
+    index.insert('user2', {'name': 'Alice', 'age': 30})
+    
+    assert index.lookup(name='Alice', age=25) == {'user1'}
+    assert index.lookup(name='Alice', age=40) == set()
+    
+    index.delete('user1', {'name': 'Alice', 'age': 25})
+    assert index.lookup(name='Alice', age=25) == set()
+    assert index.lookup(name='Alice', age=30) == {'user2'}
+
+
+def test_index_manager_batch_rows(index_manager):
+    """Test IndexManager insert_rows/delete_rows update all indexes."""
+    index_manager.create_index('idx_name', 'users', ['name'], 'hash')
+    index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    
+    items = [
+        ('user1', {'name': 'Alice', 'age': 25}),
+        ('user2', {'name': 'Bob', 'age': 30}),
+        ('user3', {'name': 'Alice', 'age': 30}),
+    ]
+    index_manager.insert_rows('users', items)
+    
+    name_idx = index_manager.get_index('users', 'idx_name')
+    age_idx = index_manager.get_index('users', 'idx_age')
+    assert name_idx.lookup(name='Alice') == {'user1', 'user3'}
+    assert age_idx.lookup(age=30) == {'user2', 'user3'}
+    
+    index_manager.delete_rows('users', items[:2])
+    assert name_idx.lookup(name='Alice') == {'user3'}
+    assert age_idx.lookup(age=25) == set()
+    assert age_idx.lookup(age=30) == {'user3'}
+
+
+def test_btree_range_scan_open_bounds(index_manager):
+    """Test B-tree range scans with open start or end."""
+    index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    
+    index.insert('user1', {'age': 25})
+    index.insert('user2', {'age': 30})
+    index.insert('user3', {'age': 30})
+    index.insert('user4', {'age': 40})
+    
+    assert index.range_scan('age') == {'user1', 'user2', 'user3', 'user4'}
+    assert index.range_scan('age', end=30) == {'user1', 'user2', 'user3'}
+    assert index.range_scan('age', start=30) == {'user2', 'user3', 'user4'}
+    assert index.range_scan('age', 26, 29) == set()
+
+
+def test_btree_bulk_insert(index_manager):
+    """Test bulk loading a B-tree index."""
+    index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    index.insert('user0', {'age': 20})
+    
+    index.insert_many([(f'user{i}', {'age': 20 + i % 5}) for i in range(1, 50)])
+    
+    assert len(index.index) == 50
+    assert index.range_scan('age', 25) == set()
+    assert len(index.lookup(age=20)) == 10
+    assert len(index.range_scan('age', 21, 22)) == 20
+
+
+def test_bulk_load(index_manager):
+    """Test building indexes from existing rows."""
+    rows = [(f'user{i}', {'age': 20 + i % 5, 'name': f'n{i % 2}'}) for i in range(50)]
+    rows.append(('user50', {'name': 'n0'}))
+    
+    btree = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    btree.bulk_load(rows)
+    assert len(btree.index) == 50
+    assert len(btree.lookup(age=20)) == 10
+    
+    btree.bulk_load([('user51', {'age': 20}), ('user0', {'age': 20})])
+    assert len(btree.lookup(age=20)) == 11
+    
+    hash_index = index_manager.create_index('idx_name', 'users', ['name'], 'hash')
+    hash_index.bulk_load(iter(rows))
+    assert len(hash_index.lookup(name='n0')) == 26
+
+
+def test_find_best_index_after_drop(index_manager):
+    """Test that dropped indexes are no longer candidates."""
+    index_manager.create_index('idx_name', 'users', ['name'], 'hash')
+    composite = index_manager.create_index('idx_name_age', 'users', ['name', 'age'], 'hash')
+    
+    assert index_manager.find_best_index('users', {'name': 'Alice', 'age': 25}) == composite
+    
+    index_manager.drop_index('users', 'idx_name')
+    assert index_manager.find_best_index('users', {'name': 'Alice', 'age': 25}) == composite
+    
+    index_manager.drop_index('users', 'idx_name_age')
+    assert index_manager.find_best_index('users', {'name': 'Alice'}) is None
+
+
+def test_hash_index_unique_and_shared_values(index_manager):
+    """Test hash index postings as values gain and lose rows."""
+    index = index_manager.create_index('idx_name', 'users', ['name'], 'hash')
+    
+    index.insert('user1', {'name': 'Alice'})
+    index.insert('user1', {'name': 'Alice'})
+    assert index.lookup(name='Alice') == {'user1'}
+    
+    index.insert('user2', {'name': 'Alice'})
+    assert index.lookup(name='Alice') == {'user1', 'user2'}
+    
+    index.delete('user1', {'name': 'Alice'})
+    assert index.lookup(name='Alice') == {'user2'}
+    
+    index.delete('user2', {'name': 'Alice'})
+    assert index.lookup(name='Alice') == set()
+    assert index.index == {}
+
+
+def test_lookup_readonly(index_manager):
+    """Test uncopied lookups agree with lookup()."""
+    hash_index = index_manager.create_index('idx_name', 'users', ['name'], 'hash')
+    btree_index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    
+    for key, row in [('user1', {'name': 'Alice', 'age': 25}),
+                     ('user2', {'name': 'Bob', 'age': 25}),
+                     ('user3', {'name': 'Bob', 'age': 30})]:
+        index_manager.insert_row('users', key, row)
+    
+    assert set(hash_index.lookup_readonly(name='Alice')) == {'user1'}
+    assert set(hash_index.lookup_readonly(name='Bob')) == {'user2', 'user3'}
+    assert set(hash_index.lookup_readonly(name='Carol')) == set()
+    assert set(btree_index.lookup_readonly(age=25)) == {'user1', 'user2'}
+    assert set(btree_index.lookup_readonly(name='Alice')) == set()
+
+
+def test_single_inserts_deferred_until_read(index_manager):
+    """Test single-row inserts are added in one batch when the index is next used."""
+    hash_index = index_manager.create_index('idx_name', 'users', ['name'], 'hash')
+    btree_index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    for i in range(10):
+        index_manager.insert_row('users', f'user{i}', {'name': f'n{i % 2}', 'age': 20 + i % 5})
+    assert len(hash_index._pending) == 10
+    assert len(btree_index.index) == 0
+    
+    assert btree_index.lookup(age=20) == {'user0', 'user5'}
+    assert not btree_index._pending
+    assert len(hash_index.lookup_readonly(name='n0')) == 5
+    
+    # A delete of a row still pending removes it
+    index_manager.insert_row('users', 'user10', {'name': 'n0', 'age': 20})
+    index_manager.delete_row('users', 'user10', {'name': 'n0', 'age': 20})
+    assert 'user10' not in hash_index.lookup(name='n0')
+    assert btree_index.range_scan('age', 20, 20) == {'user0', 'user5'}
+
+
+def test_btree_rejects_unindexable_value(index_manager):
+    """Test a value that doesn't compare with the indexed ones is rejected on insert."""
+    index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    index.insert('user5', {'age': 5})
+    with pytest.raises(TypeError):
+        index.insert('bad', {'age': 'x'})
+    
+    for age in range(6, 10):
+        index.insert(f'user{age}', {'age': age})
+    with pytest.raises(TypeError):
+        index.insert('bad', {'age': 'x'})
+    assert index.lookup_readonly(age=7) == ['user7']
+    assert len(index.index) == 5
+    
+    # Deleting the rejected row finds nothing to remove
+    index.delete('bad', {'age': 'x'})
+    index.delete_many([('bad', {'age': 'x'}), ('user6', {'age': 6})])
+    assert index.range_scan('age') == {'user5', 'user7', 'user8', 'user9'}
+
+
+def test_deferred_inserts_are_bounded(index_manager):
+    """Test the queue of deferred inserts is flushed once it is full."""
+    index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    for i in range(2500):
+        index.insert(f'user{i}', {'age': i})
+    assert len(index._pending) < 1000
+    assert len(index.index) + len(index._pending) == 2500
+
+
+def test_btree_mixed_key_types(index_manager):
+    """Test rows with str and bytes keys can share an indexed value."""
+    index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    index.insert_many([('strkey', {'age': 1})])
+    index.insert_many([(b'\x01' * 16, {'age': 1})])
+    index.insert('other', {'age': 1})
+    
+    assert index.lookup(age=1) == {'strkey', 'other', b'\x01' * 16}
+    index.delete(b'\x01' * 16, {'age': 1})
+    assert index.range_scan('age', 0, 2) == {'strkey', 'other'}
+
+
+def test_btree_lookup_with_incomparable_value(index_manager):
+    """Test B-tree lookups with a value of another type find nothing."""
+    index = index_manager.create_index('idx_age', 'users', ['age'], 'btree')
+    index.insert_many([(f'user{i}', {'age': 20 + i}) for i in range(5)])
+    
+    assert index.lookup_readonly(age='a') == []
+    assert index.lookup(age='a') == set()
+    assert index.range_scan('age', 'a', 'z') == set()
+    assert index.lookup(age=21) == {'user1'}
@@ -1,6 +1,9 @@
 """Integration tests for the full database."""
 
+import threading
+
 import pytest
+from distdb import node as node_module
 from distdb.client import Client
 
 
@@ -150,6 +153,171 @@ def test_concurrent_operations():
         client.close()
 
 
+def test_pipeline():
+    """Test queued writes are executed together when the pipeline exits."""
+    client = Client()
+    
+    try:
+        client.create_table('items', {'id': 'INTEGER', 'qty': 'INTEGER'})
+        
+        with client.pipeline() as pipe:
+            for i in range(10):
+                pipe.insert('items', {'id': i, 'qty': 0})
+            pipe.update('items', {'qty': 5}, {'id': 3})
+            pipe.delete('items', {'id': 9})
+            assert len(pipe) == 12
+        
+        assert len(pipe.results) == 12
+        assert all(result['status'] == 'success' for result in pipe.results)
+        assert len(client.select('items')) == 9
+        assert client.select('items', {'id': 3})[0]['qty'] == 5
+        
+    finally:
+        client.close()
+
+
+def test_insert_many_values_match_insert():
+    """Test insert_many stores values exactly as insert() does."""
+    client = Client()
+    
+    try:
+        client.create_table('kinds', {'id': 'INTEGER', 'v': 'TEXT'})
+        values = [True, b'ab', float('inf'), "it's", None, 1.5]
+        result = client.insert_many('kinds', [{'id': i, 'v': v} for i, v in enumerate(values)])
+        assert result['status'] == 'success'
+        for i, v in enumerate(values):
+            client.insert('kinds', {'id': i + len(values), 'v': v})
+        
+        stored = {row['id']: row.get('v') for row in client.select('kinds')}
+        for i, v in enumerate(values):
+            assert stored[i] == stored[i + len(values)] == v
+            assert type(stored[i]) is type(v)
+        
+    finally:
+        client.close()
+
+
+def test_insert_many_order_and_partial_failure():
+    """Test insert_many keeps row order across column sets and reports rows inserted before a failure."""
+    client = Client()
+    
+    try:
+        client.create_table('seq', {'id': 'INTEGER', 'note': 'TEXT'})
+        rows = [{'id': 0}, {'id': 1, 'note': 'a'}, {'id': 2}, {'id': 3, 'note': 'b'}]
+        result = client.insert_many('seq', rows)
+        assert result['rows_affected'] == 4
+        
+        stored = {row['_key']: row['id'] for row in client.select('seq')}
+        assert [stored[key] for key in result['inserted_keys']] == [0, 1, 2, 3]
+        
+        # The second run names a column the table has not got
+        result = client.insert_many('seq', [{'id': 4}, {'id': 5, 'missing': 1}])
+        assert result['status'] == 'error'
+        assert result['rows_affected'] == 1
+        assert len(result['inserted_keys']) == 1
+        assert len(client.select('seq')) == 5
+        
+    finally:
+        client.close()
+
+
+def test_prepared_statements():
+    """Test prepared reads and writes, and prepared writes queued by begin()."""
+    client = Client()
+    
+    try:
+        client.create_table('stock', {'id': 'INTEGER', 'qty': 'INTEGER'})
+        insert = client.prepare("INSERT INTO stock (id, qty) VALUES (?, ?)")
+        update = client.prepare("UPDATE stock SET qty = ? WHERE id = ?")
+        select = client.prepare("SELECT * FROM stock WHERE id = ?")
+        assert insert.param_count == 2
+        assert client.prepare("INSERT INTO stock (id, qty) VALUES (?, ?)").parsed is insert.parsed
+        
+        # Writes and reads dispatch straight to the node
+        assert insert(1, 10)['status'] == 'success'
+        assert update(11, 1)['rows_affected'] == 1
+        result = select(1)
+        assert result['status'] == 'success'
+        assert [row['qty'] for row in result['rows']] == [11]
+        
+        # Inside a batch writes are only queued, reads still run
+        client.begin()
+        assert insert(2, 20)['status'] == 'queued'
+        assert update(21, 2)['status'] == 'queued'
+        assert select(2)['row_count'] == 0
+        results = client.commit()
+        assert [r['status'] for r in results] == ['success', 'success']
+        assert [row['qty'] for row in select(2)['rows']] == [21]
+        
+    finally:
+        client.close()
+
+
+def test_batch_queues_every_write_in_order():
+    """Test writes after begin() queue in order, and other statements are refused until commit()."""
+    client = Client()
+    
+    try:
+        client.create_table('ledger', {'id': 'INTEGER', 'amount': 'INTEGER'})
+        
+        client.begin()
+        assert client.insert('ledger', {'id': 1, 'amount': 10})['status'] == 'queued'
+        assert client.insert_many('ledger', [{'id': 2, 'amount': 20}, {'id': 3}])['status'] == 'queued'
+        assert client.update('ledger', {'amount': 0}, {'id': 2})['status'] == 'queued'
+        with pytest.raises(ValueError):
+            client.execute("DELETE FROM ledger WHERE id = 1")
+        with pytest.raises(ValueError):
+            client.create_table('other', {'id': 'INTEGER'})
+        assert client.query("SELECT * FROM ledger") == []
+        
+        results = client.commit()
+        assert [r['status'] for r in results] == ['success'] * 4
+        rows = {row['id']: row.get('amount') for row in client.select('ledger')}
+        assert rows == {1: 10, 2: 0, 3: None}
+        
+    finally:
+        client.close()
+
+
+def test_statement_cache_bounded():
+    """Test the client keeps only its most recently used prepared statements."""
+    client = Client(stmt_cache_size=3)
+    
+    try:
+        client.create_table('pages', {'id': 'INTEGER'})
+        client.insert_many('pages', [{'id': i} for i in range(10)])
+        for limit in range(1, 6):
+            assert len(client.select('pages', limit=limit)) == limit
+        assert len(client._stmt_cache) == 3
+        assert [key[-1] for key in client._stmt_cache] == [3, 4, 5]
+        
+    finally:
+        client.close()
+
+
+def test_write_outlives_coalescer(monkeypatch):
+    """Test a write queued for a coalescer that exits without it is replicated inline."""
+    monkeypatch.setattr(node_module, '_COALESCER_CHECK_INTERVAL', 0.01)
+    client = Client()
+    
+    try:
+        client.create_table('stalled', {'id': 'INTEGER'})
+        node = client.local_node
+        node._write_queue.put(None)
+        node._coalescer_thread.join()
+        
+        # Alive when the write is queued, gone before draining the queue
+        node._coalescer_thread = threading.Thread(target=threading.Event().wait, args=(0.05,))
+        node._coalescer_thread.start()
+        
+        result = client.insert('stalled', {'id': 1})
+        assert result['status'] == 'success'
+        assert client.select('stalled')[0]['id'] == 1
+        
+    finally:
+        client.close()
+
+
 def test_large_dataset():
     """Test with a larger dataset."""
     client = Client()
@@ -174,3 +342,26 @@ def test_large_dataset():
         
     finally:
         client.close()
+
+
+def test_large_dataset_insert_many():
+    """Test a larger dataset inserted as one batch into an indexed table."""
+    client = Client()
+    
+    try:
+        client.create_table('numbers_batch', {'id': 'INTEGER', 'value': 'INTEGER'})
+        client.create_index('idx_batch_value', 'numbers_batch', ['value'], 'btree')
+        
+        result = client.insert_many('numbers_batch', [{'id': i, 'value': i * 10} for i in range(100)])
+        assert result['rows_affected'] == 100
+        
+        rows = client.select('numbers_batch')
+        assert len(rows) == 100
+        
+        # Point query through the index built from the batch
+        rows = client.query("SELECT * FROM numbers_batch WHERE value = 500")
+        assert len(rows) == 1
+        assert rows[0]['id'] == 50
+        
+    finally:
+        client.close()
@@ -1,6 +1,7 @@
 """Tests for query executor."""
 
 import pytest
+from distdb import _kernels
 from distdb.storage_engine import StorageEngine
 from distdb.index_manager import IndexManager
 from distdb.sql_parser import SQLParser
@@ -41,6 +42,25 @@ def test_execute_insert(executor, parser):
     assert result['rows_affected'] == 1
 
 
+def test_execute_insert_multiple_rows(executor, parser):
+    """Test executing a multi-row INSERT."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT)"))
+    executor.execute(parser.parse("CREATE INDEX idx_id ON users (id)"))
+    
+    sql = "INSERT INTO users (id, name) VALUES (1, 'Alice'), (2, 'Bob'), (3, 'Charlie')"
+    result = executor.execute(parser.parse(sql))
+    
+    assert result['status'] == 'success'
+    assert result['rows_affected'] == 3
+    assert len(result['inserted_keys']) == 3
+    assert len(executor.storage.scan('users')) == 3
+    
+    # Indexes are maintained for every row
+    result = executor.execute(parser.parse("SELECT * FROM users WHERE id = 2"))
+    assert result['row_count'] == 1
+    assert result['rows'][0]['name'] == 'Bob'
+
+
 def test_execute_select(executor, parser):
     """Test executing SELECT."""
     # Setup
@@ -93,6 +113,58 @@ def test_execute_select_order_by(executor, parser):
     assert result['rows'][2]['id'] == 3
 
 
+def test_execute_select_order_by_unprojected_column(executor, parser):
+    """Test sorting on a column left out of the projection."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name) VALUES (3, 'Alice'), (1, 'Bob'), (2, 'Charlie')"))
+    
+    query = parser.parse("SELECT name FROM users")
+    query.order_by = [('id', 'DESC')]
+    query.limit = 2
+    result = executor.execute(query)
+    
+    assert result['rows'] == [{'name': 'Alice'}, {'name': 'Charlie'}]
+
+
+def test_execute_select_order_by_filtered_and_missing(executor, parser):
+    """Test sorting with a WHERE clause, and on a column some rows lack."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name) VALUES (3, 'Bob'), (1, 'Bob'), (2, 'Alice')"))
+    
+    query = parser.parse("SELECT id FROM users WHERE name = 'Bob' ORDER BY id ASC")
+    assert executor.execute(query)['rows'] == [{'id': 1}, {'id': 3}]
+    
+    executor.execute(parser.parse("INSERT INTO users (name) VALUES ('Carol')"))
+    query = parser.parse("SELECT name FROM users ORDER BY name DESC LIMIT 2")
+    assert executor.execute(query)['rows'] == [{'name': 'Carol'}, {'name': 'Bob'}]
+    
+    # Conditions left to check fall back to sorting the matched rows
+    query = parser.parse("SELECT name FROM users WHERE name = 'Carol' ORDER BY id ASC")
+    assert executor.execute(query)['rows'] == [{'name': 'Carol'}]
+
+
+def test_execute_columnar(executor, parser):
+    """Test SELECT results returned as a list per column."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name) VALUES (3, 'Carol'), (1, 'Alice'), (2, 'Bob')"))
+    executor.execute(parser.parse("INSERT INTO users (id) VALUES (4)"))
+    
+    result = executor.execute_columnar(parser.parse("SELECT id, name FROM users ORDER BY id ASC"))
+    assert result['columns'] == {'id': [1, 2, 3, 4], 'name': ['Alice', 'Bob', 'Carol', None]}
+    assert result['row_count'] == 4
+    
+    result = executor.execute_columnar(parser.parse("SELECT name FROM users WHERE id = 2"))
+    assert result['columns'] == {'name': ['Bob']}
+    
+    result = executor.execute_columnar(parser.parse("SELECT * FROM users ORDER BY id DESC LIMIT 2"))
+    assert result['columns']['id'] == [4, 3]
+    assert set(result['columns']) == {'id', 'name', '_key'}
+    
+    # Sorting on a column some rows lack falls back to sorting rows
+    result = executor.execute_columnar(parser.parse("SELECT id FROM users ORDER BY name ASC"))
+    assert result['columns'] == {'id': [4, 1, 2, 3]}
+
+
 def test_execute_select_limit(executor, parser):
     """Test executing SELECT with LIMIT."""
     # Setup
@@ -129,6 +201,41 @@ def test_execute_update(executor, parser):
     assert rows[0][1]['name'] == 'Alicia'
 
 
+def test_execute_update_indexed_columns(executor, parser):
+    """Test UPDATE keeps indexes on changed columns current."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT, age INTEGER)"))
+    executor.execute(parser.parse("CREATE INDEX idx_id ON users (id)"))
+    executor.execute(parser.parse("CREATE INDEX idx_age ON users (age)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name, age) VALUES (1, 'Alice', 30)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name, age) VALUES (2, 'Bob', 30)"))
+    
+    index_manager = executor.index_manager
+    assert index_manager.indexes_covering('users', ['age']) == [index_manager.get_index('users', 'idx_age')]
+    assert index_manager.indexes_covering('users', ['name']) == []
+    
+    executor.execute(parser.parse("UPDATE users SET name = 'Alicia' WHERE id = 1"))
+    executor.execute(parser.parse("UPDATE users SET age = 31 WHERE id = 2"))
+    
+    age_index = index_manager.get_index('users', 'idx_age')
+    assert len(age_index.lookup(age=30)) == 1
+    assert len(age_index.lookup(age=31)) == 1
+    result = executor.execute(parser.parse("SELECT name FROM users WHERE id = 1"))
+    assert result['rows'] == [{'name': 'Alicia'}]
+
+
+def test_execute_select_index_with_residual_conditions(executor, parser):
+    """Test SELECT checks conditions the chosen index does not cover."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT, age INTEGER)"))
+    executor.execute(parser.parse("CREATE INDEX idx_age ON users (age)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name, age) VALUES (1, 'Alice', 30), (2, 'Bob', 30), (3, 'Alice', 40)"))
+    
+    result = executor.execute(parser.parse("SELECT id FROM users WHERE age = 30 AND name = 'Alice'"))
+    assert result['rows'] == [{'id': 1}]
+    
+    result = executor.execute(parser.parse("SELECT id FROM users WHERE age = 30"))
+    assert sorted(row['id'] for row in result['rows']) == [1, 2]
+
+
 def test_execute_delete(executor, parser):
     """Test executing DELETE."""
     # Setup
@@ -149,6 +256,21 @@ def test_execute_delete(executor, parser):
     assert len(rows) == 1
 
 
+def test_execute_delete_index_with_residual_conditions(executor, parser):
+    """Test DELETE finds rows through an index and checks the other conditions."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT, age INTEGER)"))
+    executor.execute(parser.parse("CREATE INDEX idx_age ON users (age) USING HASH"))
+    executor.execute(parser.parse("INSERT INTO users (id, name, age) VALUES (1, 'Alice', 30), (2, 'Bob', 30), (3, 'Alice', 40)"))
+    
+    result = executor.execute(parser.parse("DELETE FROM users WHERE age = 30 AND name = 'Alice'"))
+    assert result['rows_affected'] == 1
+    
+    age_index = executor.index_manager.get_index('users', 'idx_age')
+    assert len(age_index.lookup(age=30)) == 1
+    result = executor.execute(parser.parse("SELECT id FROM users"))
+    assert sorted(row['id'] for row in result['rows']) == [2, 3]
+
+
 def test_execute_with_index(executor, parser):
     """Test query execution uses indexes."""
     # Setup table and index
@@ -166,6 +288,11 @@ def test_execute_with_index(executor, parser):
     
     assert result['status'] == 'success'
     assert result['row_count'] == 1
+    
+    # A value of another type than the indexed column's matches nothing
+    result = executor.execute(parser.parse("SELECT * FROM users WHERE id = 'a'"))
+    assert result['status'] == 'success'
+    assert result['row_count'] == 0
 
 
 def test_execute_drop_table(executor, parser):
@@ -181,3 +308,92 @@ def test_execute_drop_table(executor, parser):
     
     assert result['status'] == 'success'
     assert 'users' not in executor.storage.list_tables()
+
+
+def test_execute_where_multiple_conditions(executor, parser):
+    """Test full-scan filtering on several columns at once."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT, age INTEGER)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name, age) VALUES (1, 'Alice', 30), (2, 'Bob', 30), (3, 'Alice', 25)"))
+    
+    result = executor.execute(parser.parse("SELECT * FROM users WHERE name = 'Alice' AND age = 30"))
+    assert [row['id'] for row in result['rows']] == [1]
+    
+    result = executor.execute(parser.parse("UPDATE users SET age = 31 WHERE age = 30"))
+    assert result['rows_affected'] == 2
+    
+    result = executor.execute(parser.parse("DELETE FROM users WHERE name = 'Alice' AND age = 31"))
+    assert result['rows_affected'] == 1
+    
+    result = executor.execute(parser.parse("SELECT * FROM users"))
+    assert sorted(row['id'] for row in result['rows']) == [2, 3]
+
+
+def test_concurrent_selects_share_lock(executor, parser):
+    """Test SELECTs run while another reader holds the lock."""
+    import threading
+    
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER)"))
+    executor.execute(parser.parse("INSERT INTO users (id) VALUES (1)"))
+    
+    results = []
+    with executor.lock.read_lock():
+        thread = threading.Thread(
+            target=lambda: results.append(executor.execute(parser.parse("SELECT * FROM users")))
+        )
+        thread.start()
+        thread.join(timeout=2.0)
+    
+    assert results and results[0]['row_count'] == 1
+
+
+def test_execute_select_projection_and_limit(executor, parser):
+    """Test projected columns and LIMIT on the fused scan path."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT, age INTEGER)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name, age) VALUES (1, 'Alice', 30), (2, 'Bob', 30), (3, 'Carol', 25)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name) VALUES (4, 'Dave')"))
+    
+    result = executor.execute(parser.parse("SELECT name, age FROM users WHERE age = 30"))
+    assert sorted(result['rows'], key=lambda r: r['name']) == [
+        {'name': 'Alice', 'age': 30},
+        {'name': 'Bob', 'age': 30},
+    ]
+    
+    result = executor.execute(parser.parse("SELECT age FROM users WHERE name = 'Dave'"))
+    assert result['rows'] == [{}]
+    
+    result = executor.execute(parser.parse("SELECT id FROM users LIMIT 2"))
+    assert result['row_count'] == 2
+
+
+def test_execute_select_scan_missing_values_and_limit(executor, parser):
+    """Test the column scan matches missing values as NULL and stops at LIMIT."""
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, age INTEGER)"))
+    executor.execute(parser.parse("INSERT INTO users (id, age) VALUES (1, 30), (2, 30), (3, 30)"))
+    executor.execute(parser.parse("INSERT INTO users (id) VALUES (4)"))
+    
+    result = executor.execute(parser.parse("SELECT id FROM users WHERE age = NULL"))
+    assert result['rows'] == [{'id': 4}]
+    
+    result = executor.execute(parser.parse("SELECT id FROM users WHERE age = 30 LIMIT 2"))
+    assert result['row_count'] == 2
+    
+    result = executor.execute(parser.parse("DELETE FROM users WHERE age = 30"))
+    assert result['rows_affected'] == 3
+
+
+def test_kernel_caches_bounded(executor, parser, monkeypatch):
+    """Test compiled kernels are evicted least recently used first."""
+    monkeypatch.setattr(_kernels, '_kernel_cache_size', 2)
+    monkeypatch.setattr(_kernels, '_select_kernels', _kernels.OrderedDict())
+    executor.execute(parser.parse("CREATE TABLE users (id INTEGER, name TEXT, age INTEGER)"))
+    executor.execute(parser.parse("INSERT INTO users (id, name, age) VALUES (1, 'Alice', 30)"))
+    
+    for projection in ['id', 'name', 'age', 'id, name']:
+        result = executor.execute(parser.parse(f"SELECT {projection} FROM users WHERE id = 1"))
+        assert result['row_count'] == 1
+    assert len(_kernels._select_kernels) == 2
+    
+    # The most recent kernels are kept
+    layout = tuple(executor.storage.tables['users'].columns)
+    assert [key[1] for key in _kernels._select_kernels] == [('age',), ('id', 'name')]
+    assert all(key[2] == layout for key in _kernels._select_kernels)
@@ -1,8 +1,9 @@
 """Tests for replication."""
 
 import pytest
+import threading
 import time
-from distdb.replication import RaftNode, ReplicationManager
+from distdb.replication import RaftNode, RaftScheduler, ReplicationManager
 from distdb.config import Config
 
 
@@ -22,19 +23,58 @@ def test_raft_single_node_becomes_leader():
     """Test single node becomes leader."""
     node = RaftNode('node1', ['node1'])
     
-    # Wait a bit for election
-    time.sleep(2)
-    
     # Single node should become leader
+    assert node.wait_for_leader(5)
     assert node.is_leader()
     
     node.shutdown()
 
 
+def test_raft_wait_for_leader_times_out():
+    """Test waiting for leadership gives up on a node that cannot win."""
+    node = RaftNode('node1', ['node1', 'node2', 'node3'])
+    
+    assert not node.wait_for_leader(0.05)
+    assert not node.is_leader()
+    
+    node.shutdown()
+
+
+def test_raft_scheduler_survives_failing_callback():
+    """Test a timer callback raising doesn't stop later timers."""
+    scheduler = RaftScheduler()
+    fired = threading.Event()
+    
+    def fail():
+        raise RuntimeError("boom")
+    
+    scheduler.schedule('fail', 0, fail)
+    scheduler.schedule('ok', 0.01, fired.set)
+    assert fired.wait(timeout=2)
+    scheduler.shutdown()
+
+
+def test_raft_append_entries_heartbeat():
+    """Test followers accept heartbeats and reject stale terms."""
+    node = RaftNode('node2', ['node1', 'node2', 'node3'])
+    
+    assert node.append_entries(1, 'node1', 0, 0, [], 0)
+    assert node.current_term == 1
+    
+    before = node.last_heartbeat
+    time.sleep(0.01)
+    assert node.append_entries(1, 'node1', 0, 0, [], 0)
+    assert node.last_heartbeat > before
+    
+    assert not node.append_entries(0, 'node3', 0, 0, [], 0)
+    
+    node.shutdown()
+
+
 def test_raft_append_entry():
     """Test appending entries as leader."""
     node = RaftNode('node1', ['node1'])
-    time.sleep(2)  # Become leader
+    assert node.wait_for_leader(5)
     
     # Append entries
     command = {'type': 'put', 'key': 'key1', 'value': 'value1'}
@@ -56,29 +96,57 @@ def test_raft_apply_callback():
     node = RaftNode('node1', ['node1'])
     node.set_apply_callback(callback)
     
-    time.sleep(2)  # Become leader
+    assert node.wait_for_leader(5)
     
-    # Append entry
+    # Append entry; committed entries are applied before it returns
     command = {'type': 'put', 'key': 'key1'}
     node.append_entry(command)
     
-    # Wait for apply
-    time.sleep(0.5)
-    
     assert len(applied_commands) > 0
     assert applied_commands[0]['type'] == 'put'
     
     node.shutdown()
 
 
+def test_raft_apply_runs_outside_lock():
+    """Test is_leader() does not wait on an apply callback in progress."""
+    entered = threading.Event()
+    release = threading.Event()
+    applied_commands = []
+    
+    def callback(command):
+        entered.set()
+        release.wait(5)
+        applied_commands.append(command)
+    
+    node = RaftNode('node1', ['node1'])
+    node.set_apply_callback(callback)
+    assert node.wait_for_leader(5)
+    
+    writer = threading.Thread(target=node.append_entry, args=({'type': 'put'},))
+    writer.start()
+    assert entered.wait(5)
+    
+    # The writer is blocked inside the callback, as on a WAL sync
+    start = time.monotonic()
+    assert node.is_leader()
+    assert time.monotonic() - start < 1
+    assert applied_commands == []
+    
+    release.set()
+    writer.join(5)
+    assert applied_commands == [{'type': 'put'}]
+    assert node.last_applied == node.commit_index == 1
+    
+    node.shutdown()
+
+
 def test_replication_manager():
     """Test replication manager."""
     config = Config()
     manager = ReplicationManager('node1', ['node1'], config)
     
-    time.sleep(2)  # Become leader
-    
-    assert manager.is_leader()
+    assert manager.wait_for_leader(5)
     
     # Replicate write
     operation = {'type': 'insert', 'table': 'users'}
@@ -86,3 +154,20 @@ def test_replication_manager():
     assert success
     
     manager.shutdown()
+
+
+def test_replication_manager_batch():
+    """Test a batch of writes is replicated and applied as one entry."""
+    config = Config()
+    manager = ReplicationManager('node1', ['node1'], config)
+    applied_commands = []
+    manager.set_apply_callback(applied_commands.append)
+    
+    assert manager.wait_for_leader(5)
+    
+    operations = [{'type': 'insert', 'table': 'users'}, {'type': 'delete', 'table': 'users'}]
+    assert manager.replicate_batch(operations)
+    assert len(applied_commands) == 1
+    assert applied_commands[0] == {'type': 'batch', 'operations': operations}
+    
+    manager.shutdown()
@@ -0,0 +1,99 @@
+"""Tests for shard manager."""
+
+import pytest
+from distdb.shard_manager import ConsistentHashRing, ShardManager
+from distdb.utils import VirtualNode, hash_key
+
+
+def test_ring_get_node():
+    """Test routing a key to the owner of the next virtual node."""
+    ring = ConsistentHashRing(num_virtual_nodes=10)
+    assert ring.get_node('key') is None
+    
+    ring.add_node('node1')
+    ring.add_node('node2')
+    
+    vnodes = sorted((VirtualNode(node_id, i).hash_value, node_id)
+                    for node_id in ['node1', 'node2'] for i in range(10))
+    key_hash = hash_key('key')
+    owner = next((node_id for hash_value, node_id in vnodes if hash_value > key_hash), vnodes[0][1])
+    assert ring.get_node('key') == owner
+
+
+def test_virtual_node_position():
+    """Test virtual nodes are slotted and placed by their static position."""
+    vnode = VirtualNode('node1', 3)
+    assert vnode.hash_value == VirtualNode.position('node1', 3) == hash_key('node1:3')
+    assert not hasattr(vnode, '__dict__')
+
+
+def test_ring_replication_nodes():
+    """Test replica selection returns distinct nodes, primary first."""
+    ring = ConsistentHashRing(num_virtual_nodes=10)
+    for node_id in ['node1', 'node2', 'node3']:
+        ring.add_node(node_id)
+    
+    replicas = ring.get_nodes_for_replication('key', 2)
+    assert len(replicas) == 2
+    assert len(set(replicas)) == 2
+    assert replicas[0] == ring.get_node('key')
+    
+    assert sorted(ring.get_nodes_for_replication('key', 5)) == ['node1', 'node2', 'node3']
+
+
+def test_ring_remove_node():
+    """Test removed nodes no longer receive keys."""
+    ring = ConsistentHashRing(num_virtual_nodes=10)
+    ring.add_node('node1')
+    ring.add_node('node2')
+    ring.remove_node('node2')
+    
+    assert all(ring.get_node(f'key{i}') == 'node1' for i in range(50))
+    assert ring.get_nodes_for_replication('key', 3) == ['node1']
+
+
+def test_shard_manager_responsibility():
+    """Test a single-node shard manager owns every key."""
+    manager = ShardManager('node1', replication_factor=2)
+    assert manager.is_primary_for('key')
+    assert manager.is_responsible_for('key')
+    
+    manager.add_node('node2')
+    assert manager.is_responsible_for('key')
+    assert sorted(manager.get_replica_nodes('key')) == ['node1', 'node2']
+
+
+def test_shard_manager_cache_follows_membership():
+    """Test cached replica lookups are invalidated by ring changes."""
+    manager = ShardManager('node1', replication_factor=1)
+    keys = [f'key{i}' for i in range(50)]
+    assert all(manager.is_primary_for(key) for key in keys)
+    
+    manager.add_node('node2')
+    primaries = {manager.get_primary_node(key) for key in keys}
+    assert primaries == {'node1', 'node2'}
+    
+    manager.remove_node('node2')
+    assert all(manager.is_primary_for(key) for key in keys)
+
+
+def test_ring_tombstones_and_compaction():
+    """Test lookups skip removed nodes before and after compaction."""
+    ring = ConsistentHashRing(num_virtual_nodes=10)
+    for i in range(8):
+        ring.add_node(f'node{i}')
+    
+    # One node out of eight stays below the compaction threshold
+    ring.remove_node('node0')
+    assert len(ring._hashes) == 80
+    for i in range(100):
+        assert ring.get_node(f'key{i}') != 'node0'
+        assert 'node0' not in ring.get_nodes_for_replication(f'key{i}', 3)
+    
+    ring.remove_node('node1')
+    ring.remove_node('node2')
+    assert len(ring._hashes) == 50
+    assert {ring.get_node(f'key{i}') for i in range(100)} <= {f'node{i}' for i in range(3, 8)}
+    
+    ring.add_node('node0')
+    assert len(ring._hashes) == 60
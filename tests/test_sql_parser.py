@@ -142,3 +142,151 @@ def test_parse_drop_index(parser):
     assert query.query_type == 'DROP_INDEX'
     assert query.index_name == 'idx_age'
     assert query.table == 'users'
+
+
+def test_parse_placeholders_and_bind(parser):
+    """Test parsing ? placeholders and binding parameters."""
+    query = parser.parse("UPDATE users SET name = ?, age = ? WHERE id = ?")
+    assert query.param_count == 3
+    
+    bound = query.bind(['Alice', 26, 1])
+    assert bound.values == {'name': 'Alice', 'age': 26}
+    assert bound.conditions == {'id': 1}
+    
+    # The template itself is left untouched for reuse
+    assert query.param_count == 3
+    
+    with pytest.raises(ValueError):
+        query.bind([1])
+
+
+def test_prepare_parses_once(parser):
+    """Test a prepared statement is parsed once and shared with parse()."""
+    query = parser.prepare("INSERT INTO users (id, name) VALUES (?, ?)")
+    assert parser.prepare("INSERT INTO users (id, name) VALUES (?, ?)") is query
+    assert query.bind([1, 'Alice']).values == {'id': 1, 'name': 'Alice'}
+    
+    # Statements of the same shape bind the prepared template
+    assert parser.parse("INSERT INTO users (id, name) VALUES (2, 'Bob')").values == {'id': 2, 'name': 'Bob'}
+    assert query.param_count == 2
+
+
+def test_parse_quoted_question_mark_is_literal(parser):
+    """Test a quoted ? is a value, not a placeholder."""
+    query = parser.parse("INSERT INTO users (id, name) VALUES (?, '?')")
+    assert query.param_count == 1
+    assert query.bind([7]).values == {'id': 7, 'name': '?'}
+
+
+def test_parse_multi_row_insert(parser):
+    """Test parsing INSERT with multiple VALUES rows."""
+    sql = "INSERT INTO users (id, name) VALUES (1, 'Alice'), (2, 'Bob')"
+    query = parser.parse(sql)
+    
+    assert query.query_type == 'INSERT'
+    assert query.table == 'users'
+    assert query.values_batch == [
+        {'id': 1, 'name': 'Alice'},
+        {'id': 2, 'name': 'Bob'},
+    ]
+
+
+def test_parse_escaped_quotes_and_null(parser):
+    """Test doubled quotes inside literals and unquoted NULL."""
+    query = parser.parse("INSERT INTO users (id, name, email) VALUES (1, 'O''Brien', NULL)")
+    assert query.values == {'id': 1, 'name': "O'Brien", 'email': None}
+    
+    query = parser.parse("SELECT * FROM users WHERE name = 'O''Brien'")
+    assert query.conditions == {'name': "O'Brien"}
+
+
+def test_convert_value(parser):
+    """Test numeric literals are converted and other text kept as is."""
+    assert parser._convert_value('42') == 42
+    assert parser._convert_value('-7') == -7
+    assert parser._convert_value('2.5') == 2.5
+    assert parser._convert_value('1e3') == 1000.0
+    assert parser._convert_value('12abc') == '12abc'
+    assert parser._convert_value('inf') == 'inf'
+    assert parser._convert_value('') == ''
+
+
+def test_parse_reuses_template_for_same_shape(parser):
+    """Test statements differing only in literals share one parse."""
+    first = parser.parse("SELECT * FROM users WHERE age = 30 AND name = 'Alice' LIMIT 5")
+    second = parser.parse("SELECT * FROM users WHERE age = -2.5 AND name = 'O''Brien' LIMIT 5")
+    
+    assert len(parser._templates) == 1
+    assert first.conditions == {'age': 30, 'name': 'Alice'}
+    assert second.conditions == {'age': -2.5, 'name': "O'Brien"}
+    assert second.limit == 5
+    assert second.sql.endswith("LIMIT 5")
+    
+    query = parser.parse("UPDATE users SET age = 31 WHERE id = 7")
+    assert query.values == {'age': 31}
+    assert query.conditions == {'id': 7}
+    
+    # Repeated columns cannot be bound positionally, so are parsed as is
+    query = parser.parse("SELECT * FROM users WHERE id = 1 AND id = 2")
+    assert query.conditions == {'id': 2}
+
+
+def test_parse_dml_without_sqlparse(parser):
+    """Test statements parsed from their text handle semicolons and bare DELETE."""
+    query = parser.parse("DELETE FROM users WHERE id = 1;")
+    assert query.table == 'users'
+    assert query.conditions == {'id': 1}
+    
+    query = parser.parse("delete from users")
+    assert query.query_type == 'DELETE'
+    assert query.conditions == {}
+    
+    query = parser.parse("  CREATE TABLE t (a INTEGER, b TEXT);")
+    assert query.schema == {'a': 'INTEGER', 'b': 'TEXT'}
+    
+    with pytest.raises(ValueError):
+        parser.parse("TRUNCATE users")
+
+
+def test_parse_select_all_clauses(parser):
+    """Test a SELECT with every clause the fast path handles."""
+    query = parser.parse("select id, name from users where age = 30 and city = 'Paris' "
+                         "order by name desc, id limit 5;")
+    assert query.columns == ['id', 'name']
+    assert query.table == 'users'
+    assert query.conditions == {'age': 30, 'city': 'Paris'}
+    assert query.order_by == [('name', 'DESC'), ('id', 'ASC')]
+    assert query.limit == 5
+
+
+def test_parse_interns_identifiers(parser):
+    """Test table and column names come back as interned strings."""
+    query = parser.parse("INSERT INTO users (id, name) VALUES (1, 'Alice')")
+    other = parser.parse("SELECT name FROM users WHERE id = 2")
+    assert query.table is other.table
+    assert next(iter(query.values)) is next(iter(other.conditions))
+    assert list(query.values)[1] is other.columns[0]
+
+
+def test_parse_select_sqlparse_fallback(parser):
+    """Test SELECTs outside the regex fast path still parse their clauses."""
+    query = parser.parse("SELECT * FROM users u WHERE id = 1 ORDER BY name DESC LIMIT 3")
+    assert query.columns == ['*']
+    assert query.table == 'users u'
+    assert query.conditions == {'id': 1}
+    assert query.order_by == [('name', 'DESC')]
+    assert query.limit == 3
+
+
+def test_parse_repeated_statement_returns_copies(parser):
+    """Test a repeated statement is served from the cache as an independent copy."""
+    sql = "UPDATE users SET age = 31 WHERE id = 1"
+    first = parser.parse(sql)
+    first.values['age'] = 99
+    first.order_by = [('id', 'ASC')]
+    
+    second = parser.parse(sql)
+    assert second.values == {'age': 31}
+    assert second.conditions == {'id': 1}
+    assert second.order_by == []
+    assert second.sql == sql
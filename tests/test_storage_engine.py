@@ -1,7 +1,13 @@
 """Tests for storage engine."""
 
+import json
+import sys
+import threading
+from pathlib import Path
+
+import msgpack
 import pytest
-from distdb.storage_engine import StorageEngine
+from distdb.storage_engine import MISSING, StorageEngine, Table
 
 
 def test_create_table(storage_engine):
@@ -126,6 +132,51 @@ def test_wal_recovery(test_config):
     engine2.close()
 
 
+def test_wal_recovery_ignores_torn_record(test_config):
+    """Test a record cut short at the end of the WAL is skipped on recovery."""
+    engine1 = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    engine1.create_table('test', {'id': 'INTEGER'})
+    engine1.put('test', 'key1', {'id': 1})
+    engine1.put('test', 'key2', {'id': 2})
+    engine1.wal.close()
+    
+    # Chop the last record in half, as a crash mid-write would
+    log_path = engine1.wal.current_log_file.name
+    with open(log_path, 'rb+') as f:
+        size = f.seek(0, 2)
+        f.truncate(size - 5)
+    
+    engine2 = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert engine2.get('test', 'key1') == {'id': 1}
+    assert engine2.get('test', 'key2') is None
+    engine2.close()
+
+
+def test_snapshot_keeps_later_wal_segments(test_config):
+    """Test writes logged after a snapshot are replayed on top of it."""
+    engine1 = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    engine1.create_table('test', {'id': 'INTEGER'})
+    engine1.put('test', 'key1', {'id': 1})
+    engine1.snapshot()
+    engine1.put('test', 'key2', {'id': 2})
+    engine1.delete('test', 'key1')
+    engine1.wal.close()
+    
+    # Only the segment written after the snapshot is left
+    assert len(list(Path(test_config.wal_dir).glob('wal_*.log'))) == 1
+    
+    engine2 = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert engine2.get('test', 'key1') is None
+    assert engine2.get('test', 'key2') == {'id': 2}
+    engine2.put('test', 'key3', {'id': 3})
+    engine2.wal.close()
+    
+    # A restart logs to a new segment, replayed after the older one
+    engine3 = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert sorted(key for key, _ in engine3.scan('test')) == ['key2', 'key3']
+    engine3.close()
+
+
 def test_drop_table(storage_engine):
     """Test dropping a table."""
     schema = {'id': 'INTEGER'}
@@ -134,3 +185,257 @@ def test_drop_table(storage_engine):
     
     storage_engine.drop_table('test')
     assert 'test' not in storage_engine.list_tables()
+
+
+def test_put_many(test_config):
+    """Test batch puts are stored, logged and recovered."""
+    storage = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    storage.create_table('users', {'id': 'INTEGER', 'name': 'TEXT'})
+    
+    storage.put_many('users', [('user1', {'id': 1, 'name': 'Alice'}),
+                               ('user2', {'id': 2, 'name': 'Bob'})])
+    assert storage.get('users', 'user2') == {'id': 2, 'name': 'Bob'}
+    
+    with pytest.raises(ValueError):
+        storage.put_many('users', [('user3', {'id': 3}), ('user4', {'age': 4})])
+    assert storage.get('users', 'user3') is None
+    
+    # Recover from the WAL alone
+    storage.wal.close()
+    recovered = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert len(recovered.scan('users')) == 2
+    recovered.close()
+
+
+def test_snapshot_recovers_bytes_keys(test_config):
+    """Test bytes keys survive a snapshot alongside str keys."""
+    engine1 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    engine1.create_table('test', {'id': 'INTEGER'})
+    engine1.put('test', b'\x00\xffkey', {'id': 1})
+    engine1.put('test', 'key2', {'id': 2})
+    engine1.close()
+    
+    engine2 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    assert engine2.get('test', b'\x00\xffkey') == {'id': 1}
+    assert engine2.get('test', 'key2') == {'id': 2}
+    engine2.close()
+
+
+def test_snapshot_keeps_missing_columns(test_config):
+    """Test rows lacking a column, or holding None, round-trip a columnar snapshot."""
+    engine1 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    engine1.create_table('test', {'id': 'INTEGER', 'name': 'TEXT'})
+    engine1.put('test', 'key1', {'id': 1})
+    engine1.put('test', 'key2', {'id': 2, 'name': None})
+    engine1.put('test', 'key3', {'id': 3, 'name': 'c'})
+    engine1.close()
+    
+    engine2 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    assert engine2.get('test', 'key1') == {'id': 1}
+    assert engine2.get('test', 'key2') == {'id': 2, 'name': None}
+    assert engine2.get('test', 'key3') == {'id': 3, 'name': 'c'}
+    engine2.delete('test', 'key1')
+    assert engine2.get('test', 'key3') == {'id': 3, 'name': 'c'}
+    engine2.close()
+
+
+def test_recover_from_json_snapshot(test_config):
+    """Test a snapshot in the old JSON format is loaded and then replaced."""
+    data_dir = Path(test_config.data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    with open(data_dir / 'snapshot.json', 'w') as f:
+        json.dump({
+            'tables': {'test': {'key1': {'id': 1}}},
+            'binary_keys': {'test': {'00ff': {'id': 2}}},
+            'schemas': {'test': {'id': 'INTEGER'}},
+            'timestamp': 0
+        }, f)
+    
+    engine1 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    assert engine1.get('test', 'key1') == {'id': 1}
+    assert engine1.get('test', b'\x00\xff') == {'id': 2}
+    # Names decoded from JSON are interned like the parser's
+    for table, schema in engine1.schemas.items():
+        assert sys.intern(table) is table
+        assert all(sys.intern(col) is col for col in schema)
+    engine1.close()
+    
+    assert not (data_dir / 'snapshot.json').exists()
+    engine2 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    assert len(engine2.scan('test')) == 2
+    engine2.close()
+
+
+def test_recover_dict_wal_records(test_config):
+    """Test WAL records logged as dicts with operation names are replayed."""
+    wal_dir = Path(test_config.wal_dir)
+    wal_dir.mkdir(parents=True, exist_ok=True)
+    records = [
+        {'timestamp': 0, 'operation': 'create_table', 'table': 'test', 'key': None, 'value': {'id': 'INTEGER'}},
+        {'timestamp': 0, 'operation': 'put', 'table': 'test', 'key': 'key1', 'value': {'id': 1}},
+        {'timestamp': 0, 'operation': 'PUT', 'table': 'test', 'key': 'key2', 'value': {'id': 2}},
+        {'timestamp': 0, 'operation': 'delete', 'table': 'test', 'key': 'key1', 'value': None},
+    ]
+    with open(wal_dir / 'wal_0000000001.log', 'wb') as f:
+        for record in records:
+            f.write(msgpack.packb(record, use_bin_type=True))
+    
+    engine = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    assert engine.get_schema('test') == {'id': 'INTEGER'}
+    assert engine.get('test', 'key1') is None
+    assert engine.get('test', 'key2') == {'id': 2}
+    engine.close()
+
+
+def test_recover_from_length_prefixed_wal(test_config):
+    """Test a WAL segment in the old length-prefixed format is replayed."""
+    wal_dir = Path(test_config.wal_dir)
+    wal_dir.mkdir(parents=True, exist_ok=True)
+    # Written by the storage engine before msgpack framing: creates users,
+    # puts user1 to user3 and deletes user2
+    fixture = Path(__file__).parent / 'fixtures' / 'baseline_wal.log'
+    (wal_dir / 'wal_0000000001.log').write_bytes(fixture.read_bytes())
+    
+    engine1 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    assert engine1.get_schema('users') == {'id': 'INTEGER', 'name': 'TEXT'}
+    assert engine1.get('users', 'user1') == {'id': 1, 'name': 'Alice'}
+    assert engine1.get('users', 'user2') is None
+    engine1.put('users', 'user4', {'id': 4, 'name': 'Dan'})
+    engine1.close()
+    
+    # The old segment is replayed alongside the new one after it
+    engine2 = StorageEngine(test_config.data_dir, test_config.wal_dir)
+    assert sorted(row['id'] for _, row in engine2.scan('users')) == [1, 3, 4]
+    engine2.close()
+
+
+def test_table_columns_stay_dense():
+    """Test columnar tables fill deleted slots and keep missing values out of rows."""
+    table = Table(['id', 'name'])
+    table.put('a', {'id': 1, 'name': 'Alice'})
+    table.put('b', {'id': 2})
+    
+    assert table.get('b') == {'id': 2}
+    assert table.columns['name'] == ['Alice', MISSING]
+    assert MISSING == None  # like row.get() on a missing column
+    
+    assert table.delete('a')
+    assert not table.delete('a')
+    assert table.get('a') is None
+    assert len(table) == 1
+    
+    # The last row moved into the freed slot
+    assert table.keys == ['b']
+    assert table.slots['b'] == 0
+    assert table.columns['id'] == [2]
+    
+    table.put('c', {'id': 3, 'name': 'Carol', 'extra': True})
+    assert table.slots['c'] == 1
+    assert table.columns['extra'] == [MISSING, True]
+    assert sorted(table.items()) == [('b', {'id': 2}), ('c', {'id': 3, 'name': 'Carol', 'extra': True})]
+    
+    assert table.delete('b')
+    assert table.keys == ['c'] and table.slots == {'c': 0}
+    assert table.get('c') == {'id': 3, 'name': 'Carol', 'extra': True}
+
+
+def test_group_commit_concurrent_puts(test_config):
+    """Test puts from concurrent threads are all durable and recovered."""
+    storage = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    storage.create_table('users', {'id': 'INTEGER'})
+    
+    def writer(start):
+        for i in range(start, start + 50):
+            storage.put('users', f"user{i}", {'id': i})
+    
+    threads = [threading.Thread(target=writer, args=(n * 50,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Writes deferred inside the block are synced when it exits
+    with storage.deferred_sync():
+        storage.put('users', 'late', {'id': -1})
+    
+    storage.wal.close()
+    recovered = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert len(recovered.scan('users')) == 201
+    assert recovered.get('users', 'user199') == {'id': 199}
+    recovered.close()
+
+
+def test_update_many_sets_columns_and_replays(test_config):
+    """Test update_many writes only the given columns and survives WAL replay."""
+    storage = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    storage.create_table('users', {'id': 'INTEGER', 'name': 'TEXT', 'age': 'INTEGER'})
+    storage.put('users', 'user1', {'id': 1, 'name': 'Alice'})
+    storage.put('users', 'user2', {'id': 2, 'name': 'Bob', 'age': 30})
+    storage.put('users', 'user3', {'id': 3, 'name': 'Carol'})
+    
+    storage.update_many('users', ['user1', 'user2', 'missing'], {'age': 40})
+    assert storage.get('users', 'user1') == {'id': 1, 'name': 'Alice', 'age': 40}
+    assert storage.get('users', 'user3') == {'id': 3, 'name': 'Carol'}
+    with pytest.raises(ValueError):
+        storage.update_many('users', ['user1'], {'email': 'x'})
+    
+    storage.wal.close()
+    recovered = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert recovered.get('users', 'user2') == {'id': 2, 'name': 'Bob', 'age': 40}
+    assert recovered.get('users', 'user3') == {'id': 3, 'name': 'Carol'}
+    recovered.close()
+
+
+def test_nested_deferred_sync_waits_once(test_config):
+    """Test nested deferred_sync blocks leave the WAL wait to the outermost."""
+    storage = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    storage.create_table('users', {'id': 'INTEGER'})
+    
+    waits = []
+    wait = storage.wal.wait
+    storage.wal.wait = lambda seq: (waits.append(seq), wait(seq))
+    with storage.deferred_sync():
+        for i in range(3):
+            with storage.deferred_sync():
+                storage.put('users', f"user{i}", {'id': i})
+        assert waits == []
+    assert len(waits) == 1
+    storage.close()
+
+
+def test_concurrent_writes_to_separate_tables(test_config):
+    """Test writers to different tables and a concurrent snapshot stay consistent."""
+    storage = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    for name in ('t1', 't2'):
+        storage.create_table(name, {'id': 'INTEGER'})
+    
+    def writer(table):
+        for i in range(100):
+            storage.put(table, f"key{i}", {'id': i})
+            if i % 2:
+                storage.delete(table, f"key{i}")
+    
+    threads = [threading.Thread(target=writer, args=(name,)) for name in ('t1', 't2')]
+    for thread in threads:
+        thread.start()
+    storage.snapshot()
+    for thread in threads:
+        thread.join()
+    
+    storage.wal.close()
+    recovered = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert len(recovered.scan('t1')) == 50
+    assert len(recovered.scan('t2')) == 50
+    recovered.close()
+
+
+def test_wal_dsync(test_config):
+    """Test a WAL opened with O_DSYNC logs and recovers like the default."""
+    storage = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000, wal_dsync=True)
+    storage.create_table('users', {'id': 'INTEGER'})
+    storage.put('users', 'user1', {'id': 1})
+    storage.wal.close()
+    
+    recovered = StorageEngine(test_config.data_dir, test_config.wal_dir, 1000)
+    assert recovered.get('users', 'user1') == {'id': 1}
+    recovered.close()